@@ -1,27 +1,12 @@
-import os
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
+from lab_client import get_client
+from model_router import route
 
 # Load environment variables
 load_dotenv()
 
-def get_client():
-    
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("❌ Error: OPENAI_API_KEY not found in environment variables.")
-        print("   Please copy .env.example to .env and add your API key.")
-        sys.exit(1)
-    
-    org_id = os.getenv("OPENAI_ORG")
-    client_kwargs = {"api_key": api_key}
-    if org_id:
-        client_kwargs["organization"] = org_id
-    
-    return OpenAI(**client_kwargs)
-
 def load_assistant_id():
     """Load existing assistant ID from .assistant file if it exists."""
     assistant_file = Path(".assistant")
@@ -41,7 +26,7 @@ def create_or_update_assistant(client):
     
     assistant_config = {
         "name": "Practice Lab Assistant",
-        "model": "gpt-4o-mini",
+        "model": route("assistant"),
         "instructions": """You are a helpful lab assistant for OpenAI API practice sessions.
 
 You can help with:
@@ -109,6 +94,9 @@ import sys
 from pathlib import Path
 from dotenv import load_dotenv
 from openai import OpenAI
+from upload_cache import upload_cached
+from resource_ledger import record
+from model_router import route
 
 load_dotenv()
 
@@ -141,7 +129,7 @@ def create_or_update_assistant(client):
     existing_id = load_assistant_id()
     config = {
         "name": "Practice Lab Assistant",
-        "model": "gpt-4-turbo",
+        "model": route("assistant"),
         "instructions": """You are a helpful lab assistant for OpenAI API practice sessions.
 You can help with:
 - Explaining API concepts and responses
@@ -168,9 +156,10 @@ provide specific citations and references to the source material.""",
 
 def upload_file_to_vector_store(client, file_path):
     print("📂 Uploading file...")
-    file = client.files.create(file=open(file_path, "rb"), purpose="assistants")
+    file, _ = upload_cached(client, file_path)
     
     vector_store = client.vector_stores.create(name="study_pdf_vector_store")
+    record("vector_stores", vector_store.id, name=vector_store.name)
     print(f"📚 Vector Store Created: {vector_store.id}")
 
     client.vector_stores.files.create(vector_store_id=vector_store.id, file_id=file.id)
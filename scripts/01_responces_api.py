@@ -1,28 +1,17 @@
-import os
 import sys
 import time
-import json
-from io import StringIO
 from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
+from lab_client import get_client
+from api_metrics import percentile
+from message_history import iter_messages, message_text
+from run_telemetry import execute_run
+from run_waiter import create_and_wait, wait_for_run
+from resource_ledger import record
 
 
 load_dotenv()
 
-def get_client():
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("❌ Error: OPENAI_API_KEY not found in environment variables.")
-        sys.exit(1)
-    
-    org_id = os.getenv("OPENAI_ORG")
-    client_kwargs = {"api_key": api_key}
-    if org_id:
-        client_kwargs["organization"] = org_id
-    
-    return OpenAI(**client_kwargs)
-
 def load_assistant_id():
     """Load assistant ID from .assistant file."""
     assistant_file = Path(".assistant")
@@ -48,47 +37,56 @@ def create_thread_with_messages(client):
         ]
     )
     
+    record("threads", thread.id)
     print(f"✅ Thread created: {thread.id}")
     return thread
 
-def demonstrate_polling_run(client, assistant_id, thread_id):
-    """Demonstrate run creation with polling until completion."""
-    print("\n🔄 Starting run with polling...")
-    
-    start_time = time.time()
-    
-    run = client.beta.threads.runs.create(
-        thread_id= "thread_IhJPoj0tvgXAqOuqI7BLhXD5",
-        assistant_id= "asst_LwL0pB4sxXTFIA7k9p4xPQgU",
-        instructions="Please provide clear, educational explanations suitable for someone learning the API."
-    )
-    
-    print(f"🚀 Run started: {run.id}")
-    print(f"📊 Initial status: {run.status}")
-    
-    while run.status in ["queued", "in_progress", "requires_action"]:
-        time.sleep(1)
-        run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
-        print(f"⏳ Status: {run.status}")
+def demonstrate_polling_run(client, assistant_id, thread_id, stream=True):
+    """Demonstrate run creation and waiting for completion.
+
+    By default the run's event stream reports completion, steps and usage, so
+    nothing is polled or listed; stream=False polls with adaptive backoff.
+    Returns (run, telemetry); telemetry is the streamed RunResult, or None when polling.
+    """
+    instructions = "Please provide clear, educational explanations suitable for someone learning the API."
+    telemetry = None
+    
+    if stream:
+        print("\n🔄 Starting run (completion via stream events)...")
+        telemetry = execute_run(client, thread_id, assistant_id, instructions=instructions)
+        run, stats = telemetry.run, telemetry.stats
+    else:
+        print("\n🔄 Starting run with polling...")
+        run = client.beta.threads.runs.create(
+            thread_id=thread_id,
+            assistant_id=assistant_id,
+            instructions=instructions
+        )
         
-        if run.status == "requires_action":
-            print("🔧 Run requires action (tool calls)")
-            break
+        record("runs", run.id, thread_id=thread_id)
+        print(f"🚀 Run started: {run.id}")
+        print(f"📊 Initial status: {run.status}")
+        
+        run, stats = wait_for_run(
+            client, thread_id, run,
+            on_status=lambda r: print(f"⏳ Status: {r.status}")
+        )
     
-    end_time = time.time()
-    duration = end_time - start_time
+    if run.status == "requires_action":
+        print("🔧 Run requires action (tool calls)")
     
-    print(f"✅ Run completed in {duration:.2f} seconds")
+    print(f"✅ Run completed in {stats.elapsed:.2f} seconds")
     print(f"📊 Final status: {run.status}")
+    print(f"📡 Wait cost: {stats.describe()}")
     
     if run.usage:
         print(f"💰 Token usage: {run.usage.total_tokens} total "
               f"({run.usage.prompt_tokens} prompt + {run.usage.completion_tokens} completion)")
     
-    return run
+    return run, telemetry
 
 def demonstrate_streaming_run(client, assistant_id, thread_id):
-    """Demonstrate streaming run with real-time token display."""
+    """Demonstrate streaming run with real-time token display and stream timing."""
     print("\n🌊 Starting streaming run...")
     
     client.beta.threads.messages.create(
@@ -100,63 +98,102 @@ def demonstrate_streaming_run(client, assistant_id, thread_id):
     print("📡 Streaming response:")
     print("-" * 50)
     
-    stream = client.beta.threads.runs.create(
-        thread_id= "thread_IhJPoj0tvgXAqOuqI7BLhXD5",
-        assistant_id= "asst_LwL0pB4sxXTFIA7k9p4xPQgU",
-        stream=True,
+    def show_delta(event):
+        if event.event == "thread.message.delta":
+            for content in event.data.delta.content or []:
+                if hasattr(content, 'text') and content.text and content.text.value:
+                    print(content.text.value, end="", flush=True)
+    
+    # Message, tool calls and usage are all assembled from this one stream
+    result = execute_run(
+        client, thread_id, assistant_id,
+        on_event=show_delta,
         instructions="Provide a concise but practical example with code snippets if helpful."
     )
     
-    full_response = ""
-    for event in stream:
-        if event.event == "thread.message.delta":
-            if hasattr(event.data.delta, 'content') and event.data.delta.content:
-                for content in event.data.delta.content:
-                    if hasattr(content, 'text') and hasattr(content.text, 'value'):
-                        chunk = content.text.value
-                        print(chunk, end="", flush=True)
-                        full_response += chunk
-        elif event.event == "thread.run.completed":
-            print(f"\n\n✅ Streaming completed")
-            if hasattr(event.data, 'usage') and event.data.usage:
-                usage = event.data.usage
-                print(f"💰 Token usage: {usage.total_tokens} total "
-                      f"({usage.prompt_tokens} prompt + {usage.completion_tokens} completion)")
+    print(f"\n\n✅ Streaming completed ({result.status})")
+    print(f"⏱️  Stream timing: {result.timing.describe()}")
+    if result.tool_calls:
+        print(f"🔧 Tool calls: {', '.join(call.type for call in result.tool_calls)}")
+    if result.citations:
+        print(f"📎 Citations: {len(result.citations)}")
+    if result.usage:
+        print(f"💰 Token usage: {result.usage.total_tokens} total "
+              f"({result.usage.prompt_tokens} prompt + {result.usage.completion_tokens} completion)")
     
     print("-" * 50)
-    return full_response
+    return result
+
+COMPARE_PROMPT = "In two sentences, what is the difference between a thread and a run?"
+
+def compare_run_modes(client, assistant_id, runs=3, prompt=COMPARE_PROMPT):
+    """Run the same prompt with polling and with streaming, and compare latency."""
+    print(f"\n⚖️  Polling vs streaming: {runs} runs each")
+    print(f"   Prompt: {prompt}")
+    
+    results = {"polling": [], "streaming": []}
+    for i in range(runs):
+        for mode in results:
+            thread = client.beta.threads.create(messages=[{"role": "user", "content": prompt}])
+            record("threads", thread.id)
+            start = time.perf_counter()
+            run, stats = create_and_wait(client, thread.id, assistant_id, stream=(mode == "streaming"))
+            if mode == "polling":
+                # The answer is only visible once it has been fetched
+                client.beta.threads.messages.list(thread_id=thread.id, limit=1)
+                first_text = time.perf_counter() - start
+            else:
+                first_text = stats.timing.ttft or stats.elapsed
+            results[mode].append({
+                "first_text": first_text,
+                "complete": time.perf_counter() - start,
+                "requests": stats.polls + (2 if mode == "polling" else 1),  # create (+ list)
+                "tokens_per_second": stats.timing.tokens_per_second if stats.timing else 0.0,
+            })
+            print(f"   {mode:>9} #{i + 1}: first text {first_text:.2f}s, "
+                  f"complete {results[mode][-1]['complete']:.2f}s ({run.status if run else 'unknown'})")
+    
+    print(f"\n{'mode':>10} {'first text p50/p95':>20} {'complete p50/p95':>18} {'requests':>9} {'tok/s':>7}")
+    for mode, rows in results.items():
+        first = [r["first_text"] for r in rows]
+        complete = [r["complete"] for r in rows]
+        requests = sum(r["requests"] for r in rows) / len(rows)
+        rate = f"{sum(r['tokens_per_second'] for r in rows) / len(rows):.1f}" if mode == "streaming" else "-"
+        print(f"{mode:>10} {percentile(first, 50):>9.2f}s/{percentile(first, 95):.2f}s "
+              f"{percentile(complete, 50):>8.2f}s/{percentile(complete, 95):.2f}s "
+              f"{requests:>9.1f} {rate:>7}")
+    faster = min(results, key=lambda mode: percentile([r["first_text"] for r in results[mode]], 95))
+    print(f"💡 Lower p95 time to first text: {faster}")
+    return results
 
-def retrieve_thread_messages(client, thread_id):
-    """Retrieve and display all messages in the thread."""
+def retrieve_thread_messages(client, thread_id, roles=None, since=None, until=None):
+    """Display the thread's messages oldest first, paging lazily through the whole history."""
     print("\n📋 Thread conversation history:")
     print("=" * 50)
     
-    messages = client.beta.threads.messages.list(thread_id=thread_id)
-    
-    for message in reversed(messages.data):
-        role = message.role.upper()
-        content = ""
-        
-        for content_block in message.content:
-            if content_block.type == "text":
-                content = content_block.text.value
-                break
-        
-        print(f"\n{role}:")
+    count = 0
+    for message in iter_messages(client, thread_id, roles, since, until):
+        count += 1
+        content = message_text(message)
+        print(f"\n{message.role.upper()}:")
         print(content[:500] + ("..." if len(content) > 500 else ""))
     
+    print(f"\n📊 {count} messages")
     print("=" * 50)
 
-def demonstrate_run_steps(client, thread_id, run_id):
-    """Retrieve and display run steps for debugging."""
+def demonstrate_run_steps(client, thread_id, run_id, steps=None):
+    """Display run steps for debugging; listed from the API unless a streamed run already gave them."""
     print(f"\n🔍 Analyzing run steps for run: {run_id}")
     
     try:
-        steps = client.beta.threads.runs.steps.list(thread_id=thread_id, run_id=run_id)
+        if steps is None:
+            steps = client.beta.threads.runs.steps.list(thread_id=thread_id, run_id=run_id).data
+        else:
+            print("📡 (collected from the run's event stream, no list call)")
         
-        print(f"📊 Found {len(steps.data)} steps:")
+        print(f"📊 Found {len(steps)} steps:")
         
-        for i, step in enumerate(steps.data, 1):
+        for i, step in enumerate(steps, 1):
             print(f"\n  Step {i}: {step.type}")
             print(f"    Status: {step.status}")
             print(f"    Created: {step.created_at}")
@@ -179,14 +216,20 @@ def main():
     assistant_id = load_assistant_id()
     print(f"✅ Using assistant: {assistant_id}")
     
+    if "--compare" in sys.argv:
+        index = sys.argv.index("--compare")
+        runs = int(sys.argv[index + 1]) if len(sys.argv) > index + 1 and sys.argv[index + 1].isdigit() else 3
+        compare_run_modes(client, assistant_id, runs)
+        return
+    
     # 1. Create thread with messages
     thread = create_thread_with_messages(client)
     
-    # 2. Demonstrate polling run
-    run = demonstrate_polling_run(client, assistant_id, thread.id)
+    # 2. Demonstrate a run (streamed telemetry; --poll to poll with backoff instead)
+    run, telemetry = demonstrate_polling_run(client, assistant_id, thread.id, stream="--poll" not in sys.argv)
     
     # 3. Show run steps for debugging
-    demonstrate_run_steps(client, thread.id, run.id)
+    demonstrate_run_steps(client, thread.id, run.id, telemetry.steps if telemetry else None)
     
     # 4. Demonstrate streaming run
     demonstrate_streaming_run(client, assistant_id, thread.id)
@@ -1,7 +1,19 @@
-from openai import OpenAI
+from lab_client import get_client
 from pydantic import BaseModel, Field
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from run_waiter import BackoffPolicy
+from pdf_pages import iter_pages
+from token_chunker import chunk_by_tokens, chunk_pages, count_tokens
+from validation_repair import validate_or_repair
+from schema_registry import response_format
+from model_router import AUTO, resolve
+from hedging import create_completion
+from resource_ledger import record
+from rate_limiter import PRIORITY_BATCH, request_priority
 import json
-import os
+import sys
+import time
 
 # Define the Note schema
 class Note(BaseModel):
@@ -10,47 +22,176 @@ class Note(BaseModel):
     summary: str = Field(..., max_length=150)
     page_ref: int | None = Field(None, description="Page number in source PDF")
 
+class NoteList(BaseModel):
+    notes: list[Note]
+
 # Initialize OpenAI client
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY", "your-api-key-here"),
-)
+client = get_client()
 
-# Read the content of the file
-with open("new/data/calculus_basics.txt", "r") as f:
-    content = f.read()
+MODEL = AUTO  # routed per request (strict json_schema needs a structured-outputs model)
+SOURCE_FILE = "new/data/calculus_basics.txt"
+SOURCE_SUFFIXES = (".txt", ".md")
+NOTE_COUNT = 10
+CHUNK_TOKENS = 3000    # largest source excerpt sent in one prompt
+NOTES_PER_CHUNK = 5
+MERGE_BATCH = 40       # candidate notes per reduce call
+MAP_WORKERS = 8
+BATCH_POLICY = BackoffPolicy(initial_interval=5.0, multiplier=1.5, max_interval=60.0, deadline=24 * 3600)
 
 # System prompt for JSON generation
-system_prompt = (
-    "You are a study summarizer. "
-    "Return exactly 10 unique notes that will help prepare for the exam. "
-    "Use the following content to create the notes:\n\n"
-    f"{content}\n\n"
-    "Respond *only* with valid JSON matching the Note[] schema with this structure: "
-    '{"notes": [{"id": 1, "heading": "Topic", "summary": "Brief explanation", "page_ref": null}]}'
-)
-
-def generate_notes():
+def build_system_prompt(content):
+    return (
+        "You are a study summarizer. "
+        "Return exactly 10 unique notes that will help prepare for the exam. "
+        "Use the following content to create the notes:\n\n"
+        f"{content}\n\n"
+        "Keep each summary under 150 characters."
+    )
+
+def build_request_body(content):
+    messages = [
+        {"role": "system", "content": build_system_prompt(content)},
+        {"role": "user", "content": "Generate the study notes."}
+    ]
+    return {
+        "model": resolve(MODEL, "notes_batch", messages),
+        "messages": messages,
+        "response_format": response_format(NoteList)
+    }
+
+def parse_notes(raw_json):
+    # Parse the response and validate against schema; an invalid note gets
+    # only its bad fields repaired instead of regenerating every note
+    data = json.loads(raw_json)
+    notes = []
+    for item in data["notes"]:
+        note, _ = validate_or_repair(client, Note, item)
+        if note is None:
+            print(f"⚠️  Dropping note that could not be repaired: {item.get('heading')}")
+            continue
+        notes.append(note)
+    return notes
+
+def request_notes(system_prompt, user_prompt="Generate the study notes.", task="notes_reduce"):
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    response = create_completion(
+        client,
+        model=resolve(MODEL, task, messages),
+        messages=messages,
+        response_format=response_format(NoteList)
+    )
+    return parse_notes(response.choices[0].message.content)
+
+# --- Map-reduce for inputs larger than one prompt ---
+
+def extract_chunk_notes(chunk):
+    # Map: a handful of candidate notes from one excerpt
+    page_hint = f" It starts on page {chunk.page}; set page_ref to that page." if chunk.page else ""
+    system_prompt = (
+        "You are a study summarizer. "
+        f"Return up to {NOTES_PER_CHUNK} notes covering the most exam-relevant ideas "
+        f"in this excerpt from the section '{chunk.heading or 'untitled'}'.{page_hint}\n\n"
+        f"{chunk.text}\n\n"
+        "Keep each summary under 150 characters."
+    )
+    # Bulk map calls queue behind interactive requests in the shared limiter
+    with request_priority(PRIORITY_BATCH):
+        return request_notes(system_prompt, task="notes_map")
+
+def dedupe_notes(notes):
+    # Drop candidates whose heading is already covered, keeping the first seen
+    seen, unique = set(), []
+    for note in notes:
+        key = " ".join(note.heading.lower().split())
+        if key not in seen:
+            seen.add(key)
+            unique.append(note)
+    return unique
+
+def merge_notes(candidates):
+    # Reduce: pick and merge the candidates into NOTE_COUNT notes; with fewer
+    # candidates than that, asking for NOTE_COUNT would invite invented notes
+    count = min(NOTE_COUNT, len(candidates))
+    listing = "\n".join(
+        f"- {note.heading} (page {note.page_ref}): {note.summary}" for note in candidates
+    )
+    system_prompt = (
+        "You are a study summarizer. "
+        f"Merge these candidate notes into exactly {count} unique notes that will help prepare "
+        "for the exam. Combine duplicates, keep the most important topics and keep each note's "
+        "page_ref from the candidate it came from.\n\n"
+        f"{listing}\n\n"
+        "Keep each summary under 150 characters."
+    )
+    return request_notes(system_prompt)
+
+def map_reduce_notes(chunks):
+    # chunks may be a lazy generator (e.g. PDF pages), so only a bounded
+    # window of them is pulled and in flight at any time
+    print("🧩 Map: extracting notes from chunks")
+    candidates, pending, mapped, failed = [], [], 0, 0
+    chunks = iter(chunks)
+    with ThreadPoolExecutor(max_workers=MAP_WORKERS) as pool:
+        while True:
+            while len(pending) < MAP_WORKERS * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append(pool.submit(extract_chunk_notes, chunk))
+            if not pending:
+                break
+            # Collect in submission order so earlier sections win ties in dedupe
+            try:
+                candidates.extend(pending.pop(0).result())
+                mapped += 1
+            except Exception as e:
+                # One failed excerpt costs its own notes, not everyone else's
+                failed += 1
+                print(f"⚠️  Skipping a chunk whose notes could not be extracted: {e}")
+    print(f"🧩 Map: {len(candidates)} candidate notes from {mapped} chunks"
+          f"{f', {failed} failed' if failed else ''}")
+    if not candidates:
+        raise RuntimeError("no notes could be extracted from any chunk")
+
+    # Reduce in rounds so no merge prompt grows with the input size
+    candidates = dedupe_notes(candidates)
+    while len(candidates) > MERGE_BATCH:
+        print(f"🔁 Reduce: merging {len(candidates)} candidate notes")
+        groups = [candidates[i:i + MERGE_BATCH] for i in range(0, len(candidates), MERGE_BATCH)]
+        with ThreadPoolExecutor(max_workers=MAP_WORKERS) as pool:
+            candidates = dedupe_notes([note for notes in pool.map(merge_notes, groups) for note in notes])
+
+    print(f"🔁 Reduce: merging {len(candidates)} candidate notes into {min(NOTE_COUNT, len(candidates))}")
+    notes = merge_notes(candidates)[:NOTE_COUNT]
+    return [note.model_copy(update={"id": n}) for n, note in enumerate(notes, 1)]
+
+def notes_from_text(content):
+    if count_tokens(content) <= CHUNK_TOKENS:
+        # Small enough for one prompt
+        return request_notes(build_system_prompt(content))
+    return map_reduce_notes(chunk_by_tokens(content, CHUNK_TOKENS))
+
+def save_notes(notes, path):
+    with open(path, "w") as f:
+        json.dump({"notes": [note.model_dump() for note in notes]}, f, indent=2)
+
+def generate_notes(source_file=SOURCE_FILE):
     try:
-        # Make the API call
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": "Generate the study notes."}
-            ],
-            response_format={"type": "json_object"}
-        )
-
-        # Parse the response
-        data = json.loads(response.choices[0].message.content)
-        
-        # Validate against schema
-        notes = [Note(**item) for item in data["notes"]]
-        
+        if source_file.endswith(".pdf"):
+            # Stream pages so page_ref comes from the real page numbers
+            notes = map_reduce_notes(chunk_pages(iter_pages(source_file), CHUNK_TOKENS))
+        else:
+            # Read the content of the file
+            with open(source_file, "r") as f:
+                content = f.read()
+            notes = notes_from_text(content)
+
         # Save to file
-        with open("exam_notes.json", "w") as f:
-            json.dump({"notes": [note.model_dump() for note in notes]}, f, indent=2)
-        
+        save_notes(notes, "exam_notes.json")
+
         # Print pretty notes
         print("\n📝 Generated Exam Notes:\n" + "=" * 40)
         for note in notes:
@@ -59,12 +200,129 @@ def generate_notes():
             print(note.summary)
             if note.page_ref:
                 print(f"[Page: {note.page_ref}]")
-        
+
         return notes
-    
+
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return None
 
+# --- Batch mode: many source documents in one go ---
+
+def write_batch_file(source_dir, batch_path):
+    # One chat completion request per source document, keyed by file stem
+    sources = sorted(p for p in Path(source_dir).iterdir() if p.suffix in SOURCE_SUFFIXES)
+    with open(batch_path, "w") as f:
+        for source in sources:
+            request = {
+                "custom_id": source.stem,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": build_request_body(source.read_text()),
+            }
+            f.write(json.dumps(request) + "\n")
+    print(f"🧾 Wrote {len(sources)} requests to {batch_path}")
+    return len(sources)
+
+def write_document_notes(custom_id, raw_json, out_dir):
+    # Validate one document's notes and write them next to the others
+    try:
+        notes = parse_notes(raw_json)
+    except Exception as e:
+        print(f"  ❌ {custom_id}: {e}")
+        return False
+    save_notes(notes, Path(out_dir) / f"{custom_id}.json")
+    print(f"  ✅ {custom_id}: {len(notes)} notes")
+    return True
+
+def run_batch_api(batch_path, out_dir):
+    # Submit through the Batch API and stream the output file line by line
+    with open(batch_path, "rb") as f:
+        batch_file = client.files.create(file=f, purpose="batch")
+    record("files", batch_file.id, filename=batch_file.filename, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    print(f"🚀 Batch submitted: {batch.id}")
+
+    start = time.perf_counter()
+    for interval in BATCH_POLICY.intervals():
+        if batch.status in ("completed", "failed", "expired", "cancelled"):
+            break
+        if time.perf_counter() - start > BATCH_POLICY.deadline:
+            print(f"⏰ Gave up waiting on batch {batch.id}")
+            return 0
+        time.sleep(interval)
+        batch = client.batches.retrieve(batch.id)
+        print(f"⏳ Status: {batch.status} "
+              f"({batch.request_counts.completed}/{batch.request_counts.total} done)")
+
+    if not batch.output_file_id:
+        print(f"❌ Batch ended with status {batch.status} and no output")
+        return 0
+
+    written = 0
+    with client.files.with_streaming_response.content(batch.output_file_id) as output:
+        for line in output.iter_lines():
+            if not line:
+                continue
+            result = json.loads(line)
+            if result.get("error") or result["response"]["status_code"] != 200:
+                print(f"  ❌ {result['custom_id']}: {result.get('error') or result['response']['body']}")
+                continue
+            raw_json = result["response"]["body"]["choices"][0]["message"]["content"]
+            written += write_document_notes(result["custom_id"], raw_json, out_dir)
+    return written
+
+def run_batch_locally(batch_path, out_dir, workers=8):
+    # Same request file, executed by a concurrent in-process executor
+    def execute(request):
+        # Waits for RPM/TPM budget instead of failing on 429 partway through
+        with request_priority(PRIORITY_BATCH):
+            response = create_completion(client, **request["body"])
+        return request["custom_id"], response.choices[0].message.content
+
+    with open(batch_path) as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+
+    written = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(execute, request): request["custom_id"] for request in requests}
+        for future in as_completed(futures):
+            try:
+                custom_id, raw_json = future.result()
+            except Exception as e:
+                print(f"  ❌ {futures[future]}: {e}")
+                continue
+            written += write_document_notes(custom_id, raw_json, out_dir)
+    return written
+
+def generate_notes_batch(source_dir, out_dir="notes", local=False):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(exist_ok=True)
+    batch_path = out_dir / "batch_requests.jsonl"
+
+    total = write_batch_file(source_dir, batch_path)
+    if not total:
+        print(f"❌ No {'/'.join(SOURCE_SUFFIXES)} files found in {source_dir}")
+        return 0
+
+    start = time.perf_counter()
+    written = run_batch_locally(batch_path, out_dir) if local else run_batch_api(batch_path, out_dir)
+    print(f"\n📝 Notes written for {written}/{total} documents to {out_dir}/ "
+          f"in {time.perf_counter() - start:.1f}s")
+    return written
+
 if __name__ == "__main__":
-    notes = generate_notes() 
\ No newline at end of file
+    # python 02_generate_notes.py [--source docs/calculus.pdf]
+    # python 02_generate_notes.py --batch <source_dir> [--out notes] [--local]
+    if "--batch" in sys.argv:
+        source_dir = sys.argv[sys.argv.index("--batch") + 1]
+        out_dir = sys.argv[sys.argv.index("--out") + 1] if "--out" in sys.argv else "notes"
+        generate_notes_batch(source_dir, out_dir, local="--local" in sys.argv)
+    elif "--source" in sys.argv:
+        notes = generate_notes(sys.argv[sys.argv.index("--source") + 1])
+    else:
+        notes = generate_notes()
@@ -1,11 +1,15 @@
-import os
 import sys
 import json
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Literal, Optional
 from dotenv import load_dotenv
-from openai import OpenAI
-from pydantic import BaseModel, Field
+from lab_client import get_client
+from streaming_json import stream_structured
+from validation_repair import repair
+from schema_registry import response_format, schema_for
+from model_router import route
+from hedging import create_completion
+from pydantic import BaseModel, Field, ValidationError
 
 # Load environment variables
 load_dotenv()
@@ -23,26 +27,12 @@ class WeatherAlert(BaseModel):
 class TechAnalysis(BaseModel):
     """Technical analysis of a programming concept."""
     concept: str = Field(description="The programming concept being analyzed")
-    difficulty_level: str = Field(description="Beginner, Intermediate, or Advanced")
+    difficulty_level: Literal["Beginner", "Intermediate", "Advanced"] = Field(description="Difficulty level")
     key_benefits: List[str] = Field(description="Main advantages of this concept")
     common_pitfalls: List[str] = Field(description="Common mistakes to avoid")
     use_cases: List[str] = Field(description="Practical applications")
     learning_resources: List[str] = Field(description="Recommended learning materials")
 
-def get_client():
-    """Initialize OpenAI client with API key from environment."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("❌ Error: OPENAI_API_KEY not found in environment variables.")
-        sys.exit(1)
-    
-    org_id = os.getenv("OPENAI_ORG")
-    client_kwargs = {"api_key": api_key}
-    if org_id:
-        client_kwargs["organization"] = org_id
-    
-    return OpenAI(**client_kwargs)
-
 def load_assistant_id():
     """Load assistant ID from .assistant file (for reference, not used)."""
     assistant_file = Path(".assistant")
@@ -51,25 +41,49 @@ def load_assistant_id():
         sys.exit(1)
     return assistant_file.read_text().strip()
 
-def demonstrate_json_mode(client):
+def consume_stream(events):
+    """Print fields and list items as they complete; return the final result."""
+    for event in events:
+        if event.kind == "first_token":
+            print(f"⚡ First token after {event.elapsed:.2f}s")
+        elif event.kind == "item":
+            print(f"  [{event.elapsed:5.2f}s] {event.field} += {event.value}")
+        elif event.kind == "field" and not isinstance(event.value, list):
+            print(f"  [{event.elapsed:5.2f}s] {event.field} = {event.value}")
+        elif event.kind == "done":
+            print(f"🏁 Complete after {event.elapsed:.2f}s")
+            if event.error:
+                print(f"⚠️  Pydantic validation failed: {event.error}")
+            return event.value
+        if event.error:
+            print(f"  ⚠️  {event.field} is invalid: {event.error}")
+    return None
+
+def demonstrate_json_mode(client, stream=False):
     """Demonstrate basic JSON mode without strict schema validation."""
     print("🔧 Demonstrating JSON Mode (Basic)")
     print("-" * 40)
     
+    request = dict(
+        messages=[
+            {
+                "role": "user",
+                "content": """Create a weather alert for a severe thunderstorm in Chicago. 
+                Return the response as a JSON object with fields: location, severity, alert_type, 
+                description, advice, and expires_at."""
+            }
+        ],
+        response_format={"type": "json_object"}
+    )
+    request["model"] = route("json_mode", request["messages"])
+
     # Use chat completions with JSON mode
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo",  # Use a suitable model, e.g., gpt-4o or gpt-3.5-turbo
-            messages=[
-                {
-                    "role": "user",
-                    "content": """Create a weather alert for a severe thunderstorm in Chicago. 
-                    Return the response as a JSON object with fields: location, severity, alert_type, 
-                    description, advice, and expires_at."""
-                }
-            ],
-            response_format={"type": "json_object"}
-        )
+        if stream:
+            # Show each field as soon as its value is complete
+            return consume_stream(stream_structured(client, WeatherAlert, **request))
+
+        response = create_completion(client, **request)
         
         response_content = response.choices[0].message.content
         print("📄 Raw JSON Response:")
@@ -82,12 +96,19 @@ def demonstrate_json_mode(client):
             
             # Try to validate with Pydantic (may fail due to loose schema)
             try:
-                weather_alert = WeatherAlert(**json_data)
+                weather_alert = schema_for(WeatherAlert).validate(json_data)
                 print("✅ Pydantic validation successful!")
                 return weather_alert
-            except Exception as e:
+            except ValidationError as e:
                 print(f"⚠️  Pydantic validation failed: {e}")
-                return json_data
+
+                # Send back only the invalid fields instead of asking again
+                weather_alert, calls = repair(client, WeatherAlert, json_data, e)
+                if weather_alert is None:
+                    print(f"❌ Repair failed after {calls} call(s)")
+                    return json_data
+                print(f"✅ Repaired with {calls} small call(s)")
+                return weather_alert
                 
         except json.JSONDecodeError as e:
             print(f"❌ Invalid JSON: {e}")
@@ -96,77 +117,42 @@ def demonstrate_json_mode(client):
         print(f"❌ Request failed: {e}")
         return None
 
-def demonstrate_function_tools_strict(client):
+def demonstrate_function_tools_strict(client, stream=False):
     """Demonstrate function-like structured output with strict schema validation."""
     print("\n🎯 Demonstrating Function Tools (Strict Schema)")
     print("-" * 50)
     
-    # Define function schema for structured output
-    function_schema = {
-        "name": "analyze_tech_concept",
-        "description": "Analyze a programming or technology concept",
-        "strict": True,
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "concept": {
-                    "type": "string",
-                    "description": "The programming concept being analyzed"
-                },
-                "difficulty_level": {
-                    "type": "string",
-                    "enum": ["Beginner", "Intermediate", "Advanced"],
-                    "description": "Difficulty level"
-                },
-                "key_benefits": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Main advantages of this concept"
-                },
-                "common_pitfalls": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Common mistakes to avoid"
-                },
-                "use_cases": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Practical applications"
-                },
-                "learning_resources": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Recommended learning materials"
-                }
-            },
-            "required": ["concept", "difficulty_level", "key_benefits", "common_pitfalls", "use_cases", "learning_resources"],
-            "additionalProperties": False
-        }
-    }
-    
-    # Use chat completions with structured output
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo",  # Use a suitable model
-            messages=[
-                {
-                    "role": "user",
-                    "content": "Please analyze the concept of 'Async/Await in Python' using the analyze_tech_concept function."
-                }
-            ],
-            response_format={
-                "type": "json_schema",
-                "json_schema": function_schema
+    request = dict(
+        messages=[
+            {
+                "role": "user",
+                "content": "Please analyze the concept of 'Async/Await in Python' using the analyze_tech_concept function."
             }
+        ],
+        # Strict schema derived from TechAnalysis (built once, then cached)
+        response_format=response_format(
+            TechAnalysis, name="analyze_tech_concept",
+            description="Analyze a programming or technology concept"
         )
+    )
+    # Strict json_schema narrows the router to structured-outputs models
+    request["model"] = route("structured_output", request["messages"])
+
+    # Use chat completions with structured output
+    try:
+        if stream:
+            # key_benefits / use_cases items are printed as each one completes
+            return consume_stream(stream_structured(client, TechAnalysis, **request))
+
+        response = create_completion(client, **request)
         response_content = response.choices[0].message.content
         print("📋 Function Call Arguments:")
         print(json.dumps(json.loads(response_content), indent=2))
         
-        # Validate with Pydantic
+        # Validate with the cached TechAnalysis validator
         try:
             function_args = json.loads(response_content)
-            tech_analysis = TechAnalysis(**function_args)
+            tech_analysis = schema_for(TechAnalysis).validate(function_args)
             print("\n✅ Strict schema validation successful!")
             print(f"📊 Concept: {tech_analysis.concept}")
             print(f"📊 Difficulty: {tech_analysis.difficulty_level}")
@@ -223,6 +209,9 @@ def main():
     print("🚀 OpenAI Practice Lab - Structured Output")
     print("=" * 50)
     
+    # --stream parses the JSON while it is generated
+    stream = "--stream" in sys.argv
+
     # Initialize client and get assistant ID (for reference only)
     client = get_client()
     assistant_id = load_assistant_id()
@@ -230,10 +219,10 @@ def main():
     
     try:
         # 1. Demonstrate JSON mode
-        json_result = demonstrate_json_mode(client)
+        json_result = demonstrate_json_mode(client, stream)
         
         # 2. Demonstrate function-like structured output
-        function_result = demonstrate_function_tools_strict(client)
+        function_result = demonstrate_function_tools_strict(client, stream)
         
         # 3. Compare approaches
         compare_approaches(json_result, function_result)
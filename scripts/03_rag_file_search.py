@@ -5,35 +5,36 @@
 End-to-end RAG demonstration using OpenAI's built-in file_search tool.
 No external vector DB required - OpenAI hosts the vector store.
 
-Usage: python scripts/03_rag_file_search.py
+Usage: python scripts/03_rag_file_search.py [--concurrency 5] [--sync]
+       --sync keeps one persisted vector store and only uploads what changed
+       python scripts/03_rag_file_search.py --backend local [--ann] [--offline]
+       answers from an in-process index; --offline also skips the model call
+       --no-cache disables the response cache (.response_cache.sqlite)
 
 Docs: https://platform.openai.com/docs/tools/file-search
 """
 
-import os
 import sys
-import json
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
+from api_metrics import METRICS, percentile
+from lab_client import create_async_client, get_client
+from upload_cache import UploadCache
+from parallel_uploader import attach_in_batches, upload_files_parallel
+from vector_store_sync import forget_vector_store, load_vector_store_id, sync_vector_store, synced_digests
+from model_router import AUTO
+from thread_pool import ThreadPolicy, ThreadPool
+from rag_engine import DEFAULT_CONCURRENCY, local_backend, run_rag_query, run_rag_queries, summarize_batch
+from response_cache import ResponseCache, cached_backend, context_fingerprint
+from resource_ledger import record, record_deleted
+
+LOCAL_MODEL = AUTO  # chosen per query by model_router
+EXTRA_DOCUMENTS = [Path("data/calculus_basics.txt"), Path("../data/calculus_basics.txt")]
 
 # Load environment variables
 load_dotenv()
 
-def get_client():
-    """Initialize OpenAI client with API key from environment."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("❌ Error: OPENAI_API_KEY not found in environment variables.")
-        sys.exit(1)
-    
-    org_id = os.getenv("OPENAI_ORG")
-    client_kwargs = {"api_key": api_key}
-    if org_id:
-        client_kwargs["organization"] = org_id
-    
-    return OpenAI(**client_kwargs)
-
 def load_assistant_id():
     """Load assistant ID from .assistant file."""
     assistant_file = Path(".assistant")
@@ -251,21 +252,22 @@ The field of LLMs continues to evolve with:
     ]
 
 def upload_documents(client, file_paths):
-    """Upload documents for knowledge retrieval."""
+    """Upload documents for knowledge retrieval in parallel, skipping unchanged ones."""
     print("📤 Uploading documents...")
     
-    uploaded_files = []
-    for file_path in file_paths:
-        print(f"  Uploading: {file_path.name}")
-        
-        with open(file_path, "rb") as file:
-            uploaded_file = client.files.create(
-                file=file,
-                purpose="assistants"
-            )
-        
-        uploaded_files.append(uploaded_file)
-        print(f"  ✅ File ID: {uploaded_file.id}")
+    def show_file(path, uploaded_file, uploaded):
+        if uploaded:
+            print(f"  Uploaded: {path.name}")
+            print(f"  ✅ File ID: {uploaded_file.id}")
+        else:
+            print(f"  Unchanged: {path.name}")
+            print(f"  ♻️  Reusing File ID: {uploaded_file.id}")
+    
+    uploaded_files, report, _ = upload_files_parallel(client, file_paths, on_file=show_file)
+    
+    for path, error in report.failures.items():
+        print(f"  ❌ Could not upload {path}: {error}")
+    print(f"📈 Upload throughput: {report.describe()}")
     
     return uploaded_files
 
@@ -274,7 +276,7 @@ def create_vector_store(client, uploaded_files):
     print("\n🗂️  Creating vector store...")
     
     # Create vector store
-    vector_store = client.beta.vector_stores.create(
+    vector_store = client.vector_stores.create(
         name="Practice Lab Knowledge Base",
         expires_after={
             "anchor": "last_active_at",
@@ -282,16 +284,16 @@ def create_vector_store(client, uploaded_files):
         }
     )
     
+    record("vector_stores", vector_store.id, name=vector_store.name)
     print(f"✅ Vector store created: {vector_store.id}")
     
-    # Add files to vector store
-    file_batch = client.beta.vector_stores.file_batches.create_and_poll(
-        vector_store_id=vector_store.id,
-        file_ids=[file.id for file in uploaded_files]
-    )
+    # Add files to vector store, in parallel batches when there are many
+    file_ids = list(dict.fromkeys(file.id for file in uploaded_files))
+    file_batches = attach_in_batches(client, vector_store.id, file_ids)
     
-    print(f"📊 File batch status: {file_batch.status}")
-    print(f"📊 Files processed: {file_batch.file_counts.completed}/{file_batch.file_counts.total}")
+    for file_batch in file_batches:
+        print(f"📊 File batch status: {file_batch.status}")
+        print(f"📊 Files processed: {file_batch.file_counts.completed}/{file_batch.file_counts.total}")
     
     return vector_store
 
@@ -311,8 +313,45 @@ def attach_vector_store_to_assistant(client, assistant_id, vector_store_id):
     print("✅ Vector store attached to assistant")
     return assistant
 
-def demonstrate_rag_queries(client, assistant_id):
-    """Demonstrate RAG queries with file_search."""
+def print_rag_result(result):
+    """Print one query result as soon as it arrives."""
+    print(f"\n📝 Query {result['index']}: {result['query']}")
+    print("-" * 50)
+
+    if "response" not in result:
+        if result.get("error"):
+            print(f"❌ Query failed: {result['error']}")
+        else:
+            print(f"❌ Query failed with status: {result['status']}")
+        return
+
+    response = result["response"]
+    source = "cached" if result.get("cached") else f"{result['latency']:.2f}s"
+    print(f"🤖 Assistant Response ({source}):")
+    print(response[:300] + ("..." if len(response) > 300 else ""))
+
+    citations = result["citations"]
+    if citations:
+        print(f"\n📚 Citations found: {len(citations)}")
+        for j, file_id in enumerate(citations[:3], 1):  # Show first 3
+            print(f"  {j}. File: {file_id}")
+
+    if result.get("backend") == "local":
+        print(f"📚 Local index retrieval took {result['retrieval_latency'] * 1000:.1f} ms")
+    elif result["file_search_used"]:
+        print("🔍 file_search tool was used")
+    else:
+        print("⚠️  file_search tool was not used")
+
+def demonstrate_rag_queries(assistant_id, concurrency=DEFAULT_CONCURRENCY, local_index=None, model=LOCAL_MODEL,
+                            cache=None, cache_context=None):
+    """Demonstrate RAG queries, running them concurrently.
+
+    With a local_index the queries are answered from the in-process index
+    (model=None skips the model call entirely) instead of hosted file_search.
+    With a cache, repeated or near-identical questions reuse earlier answers.
+    Hosted queries run on threads from a warm ThreadPool, deleted in bulk at the end.
+    """
     print("\n🔍 Demonstrating RAG Queries")
     print("=" * 40)
     
@@ -324,77 +363,35 @@ def demonstrate_rag_queries(client, assistant_id):
         "Can you compare different LLM models mentioned in the documents?"
     ]
     
-    results = []
-    
-    for i, query in enumerate(queries, 1):
-        print(f"\n📝 Query {i}: {query}")
-        print("-" * 50)
-        
-        # Create thread for this query
-        thread = client.beta.threads.create(
-            messages=[{
-                "role": "user",
-                "content": f"{query}\n\nPlease provide a comprehensive answer based on the uploaded documents and include specific citations."
-            }]
-        )
-        
-        # Run with file_search
-        run = client.beta.threads.runs.create_and_poll(
-            thread_id=thread.id,
-            assistant_id=assistant_id,
-            instructions="Use the file_search tool to find relevant information from the uploaded documents. Always cite your sources and provide specific references."
-        )
-        
-        if run.status == "completed":
-            # Get the response
-            messages = client.beta.threads.messages.list(thread_id=thread.id)
-            response = messages.data[0].content[0].text.value
-            
-            print("🤖 Assistant Response:")
-            print(response[:300] + ("..." if len(response) > 300 else ""))
-            
-            # Check for citations
-            if hasattr(messages.data[0].content[0].text, 'annotations'):
-                annotations = messages.data[0].content[0].text.annotations
-                if annotations:
-                    print(f"\n📚 Citations found: {len(annotations)}")
-                    for j, annotation in enumerate(annotations[:3], 1):  # Show first 3
-                        if hasattr(annotation, 'file_citation'):
-                            print(f"  {j}. File: {annotation.file_citation.file_id}")
-            
-            # Analyze run steps for file_search usage
-            steps = client.beta.threads.runs.steps.list(thread_id=thread.id, run_id=run.id)
-            file_search_used = False
-            
-            for step in steps.data:
-                if step.type == "tool_calls":
-                    for tool_call in step.step_details.tool_calls:
-                        if tool_call.type == "file_search":
-                            file_search_used = True
-                            print("🔍 file_search tool was used")
-                            break
-            
-            if not file_search_used:
-                print("⚠️  file_search tool was not used")
-            
-            results.append({
-                "query": query,
-                "response_length": len(response),
-                "file_search_used": file_search_used,
-                "thread_id": thread.id
-            })
-        
+    async def run_all():
+        async_client = create_async_client() if local_index is None or model else None
+        thread_pool = None
+        if local_index is not None:
+            backend = local_backend(async_client, local_index, model)
         else:
-            print(f"❌ Query failed with status: {run.status}")
-            results.append({
-                "query": query,
-                "status": run.status,
-                "thread_id": thread.id
-            })
+            thread_pool = ThreadPool(async_client, ThreadPolicy(warm_size=concurrency, expected_leases=len(queries)))
+            thread_pool.start()
+            backend = lambda query, index: run_rag_query(async_client, assistant_id, query, index, thread_pool)
+        if cache is not None:
+            backend = cached_backend(backend, cache, model if local_index is not None else assistant_id, cache_context)
+        try:
+            return await run_rag_queries(async_client, assistant_id, queries, concurrency,
+                                         on_result=print_rag_result, backend=backend)
+        finally:
+            if thread_pool:
+                await thread_pool.close()
+                print(f"\n🧵 Thread pool: {thread_pool.stats.describe()}")
+            if async_client:
+                await async_client.close()
+    
+    results, wall_time = asyncio.run(run_all())
+    summary = summarize_batch(results, wall_time)
+    print(f"\n⏱️  {summary['queries']} queries in {summary['wall_time']:.2f}s "
+          f"(slowest {summary['max_latency']:.2f}s, serial cost {summary['sum_latency']:.2f}s)")
     
     return results
 
-def analyze_rag_performance(results):
+def analyze_rag_performance(results, cache_stats=None):
     """Analyze the performance of RAG queries."""
     print("\n📊 RAG Performance Analysis")
     print("=" * 50)
@@ -406,9 +403,26 @@ def analyze_rag_performance(results):
     if successful_queries:
         avg_response_length = sum(r["response_length"] for r in successful_queries) / len(successful_queries)
         file_search_usage = sum(1 for r in successful_queries if r["file_search_used"])
+        local_queries = [r for r in successful_queries if r.get("backend") == "local"]
         
+        latencies = [r["latency"] for r in successful_queries if "latency" in r and not r.get("cached")]
+        if latencies:
+            print(f"⏱️  Query latency: p50 {percentile(latencies, 50):.2f}s, "
+                  f"p95 {percentile(latencies, 95):.2f}s, max {max(latencies):.2f}s")
+        api = METRICS.summary()
+        if api["calls"]:
+            print(f"📡 API calls: {api['calls']}, p50 {api['p50']:.2f}s, p95 {api['p95']:.2f}s, "
+                  f"first byte p50 {api['ttfb_p50']:.2f}s, queued p95 {api['queue_p95']:.2f}s")
+            print(f"🔢 Tokens: {api['prompt_tokens']} prompt + {api['completion_tokens']} completion, "
+                  f"{api['retries']} retries")
         print(f"📏 Average response length: {avg_response_length:.0f} characters")
-        print(f"🔍 file_search usage: {file_search_usage}/{len(successful_queries)} queries")
+        if local_queries:
+            avg_retrieval = sum(r["retrieval_latency"] for r in local_queries) / len(local_queries)
+            print(f"📚 Local index retrieval: {len(local_queries)} queries, {avg_retrieval * 1000:.1f} ms average")
+        else:
+            print(f"🔍 file_search usage: {file_search_usage}/{len(successful_queries)} queries")
+        if cache_stats is not None:
+            print(f"♻️  Response cache: {cache_stats.describe()}")
         
         print("\n💡 Key Insights:")
         print("  • file_search automatically retrieves relevant document chunks")
@@ -421,25 +435,71 @@ def cleanup_resources(client, uploaded_files, vector_store_id):
     print("\n🧹 Cleaning up resources...")
     
     # Delete uploaded files
+    deleted_ids = []
     for file in uploaded_files:
         try:
             client.files.delete(file.id)
+            deleted_ids.append(file.id)
             print(f"🗑️  Deleted file: {file.id}")
         except Exception as e:
             print(f"⚠️  Could not delete file {file.id}: {e}")
+    UploadCache().forget_file_ids(deleted_ids)
+    record_deleted("files", deleted_ids)
     
     # Delete vector store
     try:
-        client.beta.vector_stores.delete(vector_store_id)
+        client.vector_stores.delete(vector_store_id)
+        record_deleted("vector_stores", [vector_store_id])
         print(f"🗑️  Deleted vector store: {vector_store_id}")
+        if load_vector_store_id() == vector_store_id:
+            forget_vector_store()
     except Exception as e:
         print(f"⚠️  Could not delete vector store {vector_store_id}: {e}")
 
+def open_response_cache():
+    """Response cache with a similarity layer, unless --no-cache was given."""
+    if "--no-cache" in sys.argv:
+        return None
+    from local_index import HashingEmbedder
+    return ResponseCache(embedder=HashingEmbedder())
+
+def run_local_lab(concurrency, offline=False):
+    """Run the same queries against an in-process index instead of hosted file_search."""
+    from local_index import LocalIndex
+    
+    file_paths = create_sample_documents()
+    file_paths += [p for p in EXTRA_DOCUMENTS if p.exists()][:1]
+    
+    local_index = LocalIndex.from_files(file_paths, ann="--ann" in sys.argv)
+    print(f"📚 Local index: {len(local_index.chunks)} chunks from {len(file_paths)} documents"
+          f"{' (ANN)' if local_index.lsh else ''}")
+    
+    cache = open_response_cache()
+    cache_context = context_fingerprint([(c.source, c.text) for c in local_index.chunks])
+    results = demonstrate_rag_queries(None, concurrency, local_index, model=None if offline else LOCAL_MODEL,
+                                      cache=cache, cache_context=cache_context)
+    analyze_rag_performance(results, cache.stats if cache else None)
+    
+    print(f"\n🎯 Lab Complete!")
+    print(f"   No files were uploaded; retrieval ran locally")
+
 def main():
     """Main function to run the RAG file_search lab."""
     print("🚀 OpenAI Practice Lab - RAG with file_search")
     print("=" * 50)
     
+    concurrency = DEFAULT_CONCURRENCY
+    if "--concurrency" in sys.argv:
+        try:
+            concurrency = int(sys.argv[sys.argv.index("--concurrency") + 1])
+        except (IndexError, ValueError):
+            print(f"⚠️  Invalid --concurrency value, using default {DEFAULT_CONCURRENCY}")
+    sync_mode = "--sync" in sys.argv
+    
+    if "--backend" in sys.argv and sys.argv[sys.argv.index("--backend") + 1:][:1] == ["local"]:
+        run_local_lab(concurrency, offline="--offline" in sys.argv)
+        return
+    
     # Initialize client and get assistant
     client = get_client()
     assistant_id = load_assistant_id()
@@ -452,20 +512,29 @@ def main():
         # 1. Create sample documents
         file_paths = create_sample_documents()
         
-        # 2. Upload documents
-        uploaded_files = upload_documents(client, file_paths)
-        
-        # 3. Create vector store
-        vector_store = create_vector_store(client, uploaded_files)
+        if sync_mode:
+            # 2-3. Bring the persisted vector store in line with data/ and docs/
+            uploaded_files = []
+            vector_store = sync_vector_store(client)
+        else:
+            # 2. Upload documents
+            uploaded_files = upload_documents(client, file_paths)
+            
+            # 3. Create vector store
+            vector_store = create_vector_store(client, uploaded_files)
         
         # 4. Attach vector store to assistant
         attach_vector_store_to_assistant(client, assistant_id, vector_store.id)
         
         # 5. Demonstrate RAG queries
-        results = demonstrate_rag_queries(client, assistant_id)
+        # A re-sync keeps the store id but changes its documents: key answers by content
+        contents = synced_digests() if sync_mode else sorted(f.id for f in uploaded_files)
+        cache = open_response_cache()
+        results = demonstrate_rag_queries(assistant_id, concurrency, cache=cache,
+                                          cache_context=context_fingerprint(vector_store.id, contents))
         
         # 6. Analyze performance
-        analyze_rag_performance(results)
+        analyze_rag_performance(results, cache.stats if cache else None)
         
         print(f"\n🎯 Lab Complete!")
         print(f"   Vector store will auto-expire in 7 days")
@@ -478,7 +547,7 @@ def main():
     finally:
         # Optional: Clean up resources immediately
         cleanup_choice = input("\n🤔 Clean up resources now? (y/N): ").lower().strip()
-        if cleanup_choice == 'y' and uploaded_files and vector_store:
+        if cleanup_choice == 'y' and uploaded_files is not None and vector_store:
             cleanup_resources(client, uploaded_files, vector_store.id)
 
 if __name__ == "__main__":
@@ -5,113 +5,77 @@
 Delete test threads, files, runs, and other temporary resources to avoid quota bloat.
 Helps maintain a clean OpenAI account and manage costs.
 
-Usage: python scripts/99_cleanup.py
+Resources are found in the local ledger (.resource_ledger.jsonl) that the
+lab scripts append to; --scan lists the whole account instead (threads
+cannot be listed, so they always come from the ledger).
+
+Usage: python scripts/99_cleanup.py [--max-age 24] [--dry-run] [--scan]
 
 Docs: https://platform.openai.com/docs/api-reference
 """
 
-import os
 import sys
-import time
 from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
+from lab_client import get_client
+from upload_cache import UploadCache
+from cleanup_engine import DEFAULT_WORKERS, RESOURCE_TYPES, describe_plan, execute_plan, plan_cleanup, plan_from_ledger
+from resource_ledger import LEDGER
 
 # Load environment variables
 load_dotenv()
 
-def get_client():
-    """Initialize OpenAI client with API key from environment."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("❌ Error: OPENAI_API_KEY not found in environment variables.")
-        sys.exit(1)
-    
-    org_id = os.getenv("OPENAI_ORG")
-    client_kwargs = {"api_key": api_key}
-    if org_id:
-        client_kwargs["organization"] = org_id
-    
-    return OpenAI(**client_kwargs)
+def print_deleted(item, error):
+    """Progress line for each finished delete."""
+    if error:
+        print(f"⚠️  Could not delete {RESOURCE_TYPES[item.kind].name[:-1]} {item.label}: {error}")
+    else:
+        print(f"🗑️  Deleted {RESOURCE_TYPES[item.kind].name[:-1]}: {item.label} (age: {item.age_hours:.1f}h)")
+
+def make_plan(client, kinds, max_age_hours, scan=False):
+    """Resources to delete: from the ledger, or by listing the account with scan=True."""
+    if not scan:
+        return plan_from_ledger(LEDGER, kinds, max_age_hours)
+    # Threads have no list endpoint, so even a scan finds them in the ledger
+    ledger_only = [kind for kind in kinds if RESOURCE_TYPES[kind].list_all is None]
+    listed = [kind for kind in kinds if kind not in ledger_only]
+    return plan_cleanup(client, listed, max_age_hours) + plan_from_ledger(LEDGER, ledger_only, max_age_hours)
+
+def cleanup_resources(client, kind, max_age_hours=24, dry_run=False, workers=DEFAULT_WORKERS, scan=False):
+    """Delete every resource of one type older than max_age_hours, in parallel."""
+    resource = RESOURCE_TYPES[kind]
+    print(f"\n🧹 Cleaning up {resource.name}...")
 
-def cleanup_threads(client, max_age_hours=24):
-    """Clean up old threads created during lab sessions."""
-    print("🧹 Cleaning up threads...")
-    
     try:
-        threads = client.beta.threads.list(limit=100)
-        current_time = int(time.time())
-        deleted_count = 0
-        
-        for thread in threads.data:
-            # Calculate age in hours
-            age_hours = (current_time - thread.created_at) / 3600
-            
-            if age_hours > max_age_hours:
-                try:
-                    client.beta.threads.delete(thread.id)
-                    print(f"🗑️  Deleted thread: {thread.id} (age: {age_hours:.1f}h)")
-                    deleted_count += 1
-                except Exception as e:
-                    print(f"⚠️  Could not delete thread {thread.id}: {e}")
-        
-        print(f"✅ Deleted {deleted_count} threads older than {max_age_hours} hours")
-        
+        plan = make_plan(client, [kind], max_age_hours, scan)
+        if dry_run:
+            describe_plan(plan, workers, [kind])
+            return None
+
+        report = execute_plan(client, plan, workers, on_result=print_deleted)
+        LEDGER.record_deleted(kind, report.deleted_ids(kind))
+        print(f"✅ Deleted {len(report.deleted)} {resource.name} older than {max_age_hours} hours "
+              f"({report.describe()})")
+        return report
+
     except Exception as e:
-        print(f"❌ Error cleaning up threads: {e}")
+        print(f"❌ Error cleaning up {resource.name}: {e}")
+        return None
 
-def cleanup_files(client, max_age_hours=24):
+def cleanup_threads(client, max_age_hours=24, dry_run=False, workers=DEFAULT_WORKERS, scan=False):
+    """Clean up old threads created during lab sessions."""
+    return cleanup_resources(client, "threads", max_age_hours, dry_run, workers, scan)
+
+def cleanup_files(client, max_age_hours=24, dry_run=False, workers=DEFAULT_WORKERS, scan=False):
     """Clean up uploaded files from lab sessions."""
-    print("\n🧹 Cleaning up files...")
-    
-    try:
-        files = client.files.list()
-        current_time = int(time.time())
-        deleted_count = 0
-        
-        for file in files.data:
-            # Calculate age in hours
-            age_hours = (current_time - file.created_at) / 3600
-            
-            # Only delete files used for assistants (not fine-tuning, etc.)
-            if file.purpose == "assistants" and age_hours > max_age_hours:
-                try:
-                    client.files.delete(file.id)
-                    print(f"🗑️  Deleted file: {file.id} ({file.filename}) (age: {age_hours:.1f}h)")
-                    deleted_count += 1
-                except Exception as e:
-                    print(f"⚠️  Could not delete file {file.id}: {e}")
-        
-        print(f"✅ Deleted {deleted_count} assistant files older than {max_age_hours} hours")
-        
-    except Exception as e:
-        print(f"❌ Error cleaning up files: {e}")
+    report = cleanup_resources(client, "files", max_age_hours, dry_run, workers, scan)
+    if report:
+        UploadCache().forget_file_ids(report.deleted_ids("files"))
+    return report
 
-def cleanup_vector_stores(client, max_age_hours=24):
+def cleanup_vector_stores(client, max_age_hours=24, dry_run=False, workers=DEFAULT_WORKERS, scan=False):
     """Clean up vector stores from lab sessions."""
-    print("\n🧹 Cleaning up vector stores...")
-    
-    try:
-        vector_stores = client.beta.vector_stores.list()
-        current_time = int(time.time())
-        deleted_count = 0
-        
-        for vs in vector_stores.data:
-            # Calculate age in hours
-            age_hours = (current_time - vs.created_at) / 3600
-            
-            if age_hours > max_age_hours:
-                try:
-                    client.beta.vector_stores.delete(vs.id)
-                    print(f"🗑️  Deleted vector store: {vs.id} ({vs.name}) (age: {age_hours:.1f}h)")
-                    deleted_count += 1
-                except Exception as e:
-                    print(f"⚠️  Could not delete vector store {vs.id}: {e}")
-        
-        print(f"✅ Deleted {deleted_count} vector stores older than {max_age_hours} hours")
-        
-    except Exception as e:
-        print(f"❌ Error cleaning up vector stores: {e}")
+    return cleanup_resources(client, "vector_stores", max_age_hours, dry_run, workers, scan)
 
 def cleanup_assistant(client, keep_assistant=True):
     """Optionally clean up the practice lab assistant."""
@@ -170,23 +134,17 @@ def cleanup_local_files():
     print(f"✅ Cleaned up {deleted_count} local files")
 
 def show_current_usage(client):
-    """Display current resource usage for awareness."""
-    print("\n📊 Current Resource Usage")
+    """Display resources the labs created and have not cleaned up yet."""
+    print("\n📊 Current Resource Usage (from local ledger)")
     print("=" * 40)
     
     try:
-        # Count threads
-        threads = client.beta.threads.list(limit=100)
-        print(f"🧵 Threads: {len(threads.data)}")
-        
-        # Count files
-        files = client.files.list()
-        assistant_files = [f for f in files.data if f.purpose == "assistants"]
-        print(f"📄 Assistant files: {len(assistant_files)}")
-        
-        # Count vector stores
-        vector_stores = client.beta.vector_stores.list()
-        print(f"🗂️  Vector stores: {len(vector_stores.data)}")
+        # No list calls: the ledger already knows what the labs created
+        counts = LEDGER.counts()
+        print(f"🧵 Threads: {counts['threads']}")
+        print(f"🏃 Runs: {counts['runs']}")
+        print(f"📄 Files: {counts['files']}")
+        print(f"🗂️  Vector stores: {counts['vector_stores']}")
         
         # Check for assistant
         assistant_file = Path(".assistant")
@@ -206,7 +164,10 @@ def main():
     
     # Parse command line arguments
     delete_assistant = "--delete-assistant" in sys.argv
+    dry_run = "--dry-run" in sys.argv
+    scan = "--scan" in sys.argv
     max_age = 24  # Default to 24 hours
+    workers = DEFAULT_WORKERS
     
     if "--max-age" in sys.argv:
         try:
@@ -214,6 +175,12 @@ def main():
             max_age = int(sys.argv[age_index])
         except (IndexError, ValueError):
             print("⚠️  Invalid --max-age value, using default 24 hours")
+    if "--workers" in sys.argv:
+        try:
+            workers_index = sys.argv.index("--workers") + 1
+            workers = int(sys.argv[workers_index])
+        except (IndexError, ValueError):
+            print(f"⚠️  Invalid --workers value, using default {DEFAULT_WORKERS}")
     
     # Initialize client
     client = get_client()
@@ -221,6 +188,13 @@ def main():
     # Show current usage
     show_current_usage(client)
     
+    if dry_run:
+        # Report the plan only; nothing is deleted
+        print(f"\n🔍 Dry run: resources older than {max_age} hours")
+        plan = make_plan(client, RESOURCE_TYPES, max_age, scan)
+        describe_plan(plan, workers)
+        return
+    
     # Confirm cleanup
     print(f"\n🤔 This will delete resources older than {max_age} hours.")
     if delete_assistant:
@@ -232,17 +206,21 @@ def main():
         return
     
     # Perform cleanup
-    cleanup_threads(client, max_age)
-    cleanup_files(client, max_age)
-    cleanup_vector_stores(client, max_age)
+    cleanup_threads(client, max_age, workers=workers, scan=scan)
+    cleanup_files(client, max_age, workers=workers, scan=scan)
+    cleanup_vector_stores(client, max_age, workers=workers, scan=scan)
     cleanup_assistant(client, keep_assistant=not delete_assistant)
     cleanup_local_files()
+    LEDGER.compact()  # drop tombstones so the ledger stays small
     
     print("\n🎯 Cleanup Complete!")
     print("\n💡 Usage Tips:")
     print("   • Run cleanup regularly to manage costs")
     print("   • Use --max-age <hours> to adjust cleanup threshold")
     print("   • Use --delete-assistant to remove the practice assistant")
+    print("   • Use --dry-run to see what would be deleted and how long it would take")
+    print("   • Use --workers <n> to change how many deletes run in parallel")
+    print("   • Use --scan to also find resources created before the local ledger existed")
     print("   • Example: python scripts/99_cleanup.py --max-age 1 --delete-assistant")
 
 if __name__ == "__main__":
@@ -0,0 +1,334 @@
+"""
+API Call Metrics
+
+Records one CallRecord for every request made through the lab clients:
+endpoint, model, status, queue time (waiting on the rate limiter), time to
+first byte, total latency (until the body, or the event stream, is fully
+read), prompt/completion tokens and retries. Every attempt is its own
+record; one the SDK re-sent (x-stainless-retry-count) counts as a retry, as
+do the 429s the rate limiter re-sent inside it.
+
+It is an httpx transport installed by lab_client around the rate-limited
+transport, so no call site changes. Records aggregate into Prometheus
+histograms and counters, which can be written to a text file for the node
+exporter's textfile collector, or served over HTTP:
+
+    write_prometheus("metrics/openai.prom")
+    serve_metrics(port=9464)   # GET /metrics
+
+Any lab script exports automatically when these are set:
+    OPENAI_METRICS_FILE    write the textfile when the script exits
+    OPENAI_METRICS_PORT    serve /metrics while the script runs
+"""
+
+import atexit
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rate_limiter import DEFAULT_BUDGET, estimate_request, parse_usage
+from sdk_httpx import httpx
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ID_SEGMENT = re.compile(r"^(thread|run|msg|step|asst|file|vs|vsfb|batch|upload|part|chatcmpl)[_-][\w-]+$")
+
+
+def endpoint_of(path):
+    """Path with resource ids replaced, e.g. /v1/threads/{id}/runs/{id}."""
+    return "/".join("{id}" if ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+def percentile(values, q):
+    """q-th percentile (0-100) with linear interpolation; 0.0 for no values."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    rank = (len(values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+@dataclass
+class CallRecord:
+    """Timing and usage of one API call."""
+    endpoint: str
+    method: str
+    model: str
+    status: int
+    queue_seconds: float
+    ttfb_seconds: float
+    latency_seconds: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retries: int = 0
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRecorder:
+    """Thread-safe store of call records and their Prometheus aggregates."""
+
+    def __init__(self, keep_records=10_000):
+        self.records = []
+        self.keep_records = keep_records
+        self.histograms = {}  # (metric, endpoint, model) -> Histogram
+        self.counters = {}    # (metric, labels...) -> value
+        self._lock = threading.Lock()
+
+    def record(self, call):
+        with self._lock:
+            self.records.append(call)
+            del self.records[:-self.keep_records]
+            for metric, value in (("request_duration_seconds", call.latency_seconds),
+                                  ("request_ttfb_seconds", call.ttfb_seconds),
+                                  ("request_queue_seconds", call.queue_seconds)):
+                key = (metric, call.endpoint, call.model)
+                self.histograms.setdefault(key, Histogram()).observe(value)
+            for key, value in ((("requests_total", call.endpoint, call.model, str(call.status)), 1),
+                               (("retries_total", call.endpoint, call.model), call.retries),
+                               (("tokens_total", call.endpoint, call.model, "prompt"), call.prompt_tokens),
+                               (("tokens_total", call.endpoint, call.model, "completion"), call.completion_tokens)):
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def calls(self, endpoint=None, model=None):
+        with self._lock:
+            return [r for r in self.records
+                    if (endpoint is None or r.endpoint == endpoint) and (model is None or r.model == model)]
+
+    def summary(self, endpoint=None, model=None):
+        """p50/p95/p99 latency and totals for the matching calls."""
+        calls = self.calls(endpoint, model)
+        latencies = [c.latency_seconds for c in calls]
+        return {
+            "calls": len(calls),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "ttfb_p50": percentile([c.ttfb_seconds for c in calls], 50),
+            "queue_p95": percentile([c.queue_seconds for c in calls], 95),
+            "prompt_tokens": sum(c.prompt_tokens for c in calls),
+            "completion_tokens": sum(c.completion_tokens for c in calls),
+            "retries": sum(c.retries for c in calls),
+        }
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for metric in ("request_duration_seconds", "request_ttfb_seconds", "request_queue_seconds"):
+                lines.append(f"# TYPE openai_{metric} histogram")
+                for (name, endpoint, model), hist in sorted(self.histograms.items()):
+                    if name != metric:
+                        continue
+                    labels = f'endpoint="{endpoint}",model="{model}"'
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        lines.append(f'openai_{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'openai_{metric}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                    lines.append(f"openai_{metric}_sum{{{labels}}} {hist.sum:.6f}")
+                    lines.append(f"openai_{metric}_count{{{labels}}} {hist.count}")
+            for metric, extra in (("requests_total", "status"), ("retries_total", None), ("tokens_total", "type")):
+                lines.append(f"# TYPE openai_{metric} counter")
+                for key, value in sorted(self.counters.items()):
+                    if key[0] != metric:
+                        continue
+                    labels = f'endpoint="{key[1]}",model="{key[2]}"'
+                    if extra:
+                        labels += f',{extra}="{key[3]}"'
+                    lines.append(f"openai_{metric}{{{labels}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRecorder()
+
+
+def write_prometheus(path, recorder=METRICS):
+    """Write the current metrics to a Prometheus textfile (atomically)."""
+    from pathlib import Path
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(recorder.prometheus_text())
+    tmp.replace(path)
+
+
+def serve_metrics(port=9464, host="127.0.0.1", recorder=METRICS):
+    """Serve GET /metrics from a background thread; returns the server."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = recorder.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _sdk_retry_count(request):
+    """Retries the SDK had already made before sending this request."""
+    try:
+        return int(request.headers.get("x-stainless-retry-count", 0))
+    except ValueError:
+        return 0
+
+
+class _Call:
+    """Measurements for one request, finished when its body has been consumed."""
+
+    def __init__(self, recorder, request, start):
+        self.recorder = recorder
+        self.request = request
+        self.start = start
+        model, _ = estimate_request(request)
+        self.model = "" if model == DEFAULT_BUDGET else model
+        self.chunks = []
+        self.done = False
+
+    def headers_received(self, response):
+        self.response = response
+        self.ttfb = time.perf_counter() - self.start
+        self.queue = response.extensions.get("queue_seconds", 0.0)
+        # 429s re-sent by the rate limiter, plus this request itself when the SDK re-sent it
+        self.retries = response.extensions.get("retries", 0) + (_sdk_retry_count(self.request) > 0)
+        self.is_json = response.headers.get("content-type", "").startswith("application/json")
+
+    def chunk(self, data):
+        if self.is_json:
+            self.chunks.append(data)
+
+    def finish(self):
+        if self.done:
+            return
+        self.done = True
+        prompt, completion = parse_usage(b"".join(self.chunks)) if self.is_json else (0, 0)
+        self.recorder.record(CallRecord(
+            endpoint=endpoint_of(self.request.url.path),
+            method=self.request.method,
+            model=self.model,
+            status=self.response.status_code,
+            queue_seconds=self.queue,
+            ttfb_seconds=max(0.0, self.ttfb - self.queue),
+            latency_seconds=time.perf_counter() - self.start,
+            prompt_tokens=prompt,
+            completion_tokens=completion,
+            retries=self.retries,
+        ))
+
+
+class _MeteredStream(httpx.SyncByteStream):
+    def __init__(self, stream, call):
+        self.stream = stream
+        self.call = call
+
+    def __iter__(self):
+        for data in self.stream:
+            self.call.chunk(data)
+            yield data
+
+    def close(self):
+        try:
+            self.stream.close()
+        finally:
+            self.call.finish()
+
+
+class _AsyncMeteredStream(httpx.AsyncByteStream):
+    def __init__(self, stream, call):
+        self.stream = stream
+        self.call = call
+
+    async def __aiter__(self):
+        async for data in self.stream:
+            self.call.chunk(data)
+            yield data
+
+    async def aclose(self):
+        try:
+            await self.stream.aclose()
+        finally:
+            self.call.finish()
+
+
+def _wrap(response, stream):
+    return httpx.Response(
+        status_code=response.status_code,
+        headers=response.headers,
+        stream=stream,
+        extensions=response.extensions,
+    )
+
+
+class MeteredTransport(httpx.BaseTransport):
+    """httpx transport that records a CallRecord per request."""
+
+    def __init__(self, transport, recorder=METRICS):
+        self.transport = transport
+        self.recorder = recorder
+
+    def handle_request(self, request):
+        call = _Call(self.recorder, request, time.perf_counter())
+        response = self.transport.handle_request(request)
+        call.headers_received(response)
+        return _wrap(response, _MeteredStream(response.stream, call))
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncMeteredTransport(httpx.AsyncBaseTransport):
+    """Async variant of MeteredTransport."""
+
+    def __init__(self, transport, recorder=METRICS):
+        self.transport = transport
+        self.recorder = recorder
+
+    async def handle_async_request(self, request):
+        call = _Call(self.recorder, request, time.perf_counter())
+        response = await self.transport.handle_async_request(request)
+        call.headers_received(response)
+        return _wrap(response, _AsyncMeteredStream(response.stream, call))
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+_exporting = False
+
+
+def export_from_env(recorder=METRICS):
+    """Start the exports requested by OPENAI_METRICS_FILE / OPENAI_METRICS_PORT (once)."""
+    global _exporting
+    if _exporting:
+        return
+    _exporting = True
+    if os.getenv("OPENAI_METRICS_FILE"):
+        atexit.register(write_prometheus, os.getenv("OPENAI_METRICS_FILE"), recorder)
+    if os.getenv("OPENAI_METRICS_PORT"):
+        serve_metrics(int(os.getenv("OPENAI_METRICS_PORT")), recorder=recorder)
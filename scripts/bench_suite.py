@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Offline Benchmark Suite
+
+Runs each lab flow end to end against the local mock server (no quota, no
+network) and compares the results with recorded baselines:
+    responses          01: thread, run with streamed telemetry and steps, streamed run, history
+    structured_output  02: JSON mode (with repair), strict schema, both streamed
+    generate_notes     02: map-reduce notes over a multi-chunk source
+    rag                03: upload, vector store, concurrent file_search queries, cleanup
+    cleanup            99: ledger-driven parallel delete of seeded resources
+
+Each flow runs --iterations times; the report has p50/p95 wall time and the
+number of requests the mock server served per iteration. A flow regresses
+when its p50 is more than --tolerance above the baseline, or when it needs
+more than 5% (at least one) more requests than it used to. Baselines live in
+benchmarks/baselines.json and are rewritten with --record, which refuses
+(exit 1) when a flow fails.
+
+Every iteration starts from the same state: `random` is reseeded (backoff
+jitter and the mock's simulated run times) and the run waiter's history of
+run durations is cleared, so one iteration's warm start cannot speed up the
+next. A first, unmeasured iteration pays for imports and connection setup.
+
+Not covered: the mock has no Uploads (multipart upload of large files) or
+Batch API endpoints, so those paths are only exercised against the real API.
+
+The flows run in a scratch directory, so upload caches, ledgers and notes
+written by the labs never touch the working tree.
+
+Usage: python scripts/bench_suite.py [--flows rag,cleanup] [--iterations 5]
+                                     [--error-rate 0.05] [--tolerance 0.25] [--record] [--verbose]
+"""
+
+import contextlib
+import importlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from api_metrics import percentile
+from mock_openai_server import MockConfig, start_mock_server
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BASELINE_FILE = SCRIPTS_DIR.parent / "benchmarks" / "baselines.json"
+NOTES_SOURCE = SCRIPTS_DIR.parent / "data" / "calculus_basics.txt"
+DEFAULT_ITERATIONS = 3
+DEFAULT_TOLERANCE = 0.25
+REQUEST_TOLERANCE = 0.05  # poll counts move with timing; at least one extra request is allowed
+SEED = 20
+BENCH_CONFIG = MockConfig(queued_seconds=0.05, run_seconds=0.3, run_jitter=0.1,
+                          latency_seconds=0.01, completion_seconds=0.1)
+SEED_COUNTS = {"threads": 20, "files": 10, "vector_stores": 3}
+
+
+def _lab(name):
+    """Import a numbered lab script (e.g. "01_responces_api") as a module."""
+    return importlib.import_module(name)
+
+
+def flow_responses(client):
+    lab = _lab("01_responces_api")
+    thread = lab.create_thread_with_messages(client)
+    run, telemetry = lab.demonstrate_polling_run(client, "asst_bench", thread.id)
+    lab.demonstrate_run_steps(client, thread.id, run.id, telemetry.steps)
+    lab.demonstrate_streaming_run(client, "asst_bench", thread.id)
+    lab.retrieve_thread_messages(client, thread.id)
+
+
+def flow_structured_output(client):
+    lab = _lab("02_structured_output")
+    for stream in (False, True):
+        lab.demonstrate_json_mode(client, stream=stream)
+        lab.demonstrate_function_tools_strict(client, stream=stream)
+
+
+def flow_generate_notes(client):
+    from token_chunker import count_tokens
+
+    lab = _lab("02_generate_notes")
+    # Long enough for several map calls and a reduce, not a single prompt
+    text = NOTES_SOURCE.read_text()
+    lab.notes_from_text(text * (lab.CHUNK_TOKENS // count_tokens(text) + 1))
+
+
+def flow_rag(client):
+    lab = _lab("03_rag_file_search")
+    file_paths = lab.create_sample_documents()
+    uploaded_files = lab.upload_documents(client, file_paths)
+    vector_store = lab.create_vector_store(client, uploaded_files)
+    lab.attach_vector_store_to_assistant(client, "asst_bench", vector_store.id)
+    lab.demonstrate_rag_queries("asst_bench")
+    lab.cleanup_resources(client, uploaded_files, vector_store.id)
+
+
+def flow_cleanup(client):
+    from resource_ledger import record
+
+    lab = _lab("99_cleanup")
+    for _ in range(SEED_COUNTS["threads"]):
+        record("threads", client.beta.threads.create().id)
+    for i in range(SEED_COUNTS["files"]):
+        file = client.files.create(file=(f"seed_{i}.txt", b"seed"), purpose="assistants")
+        record("files", file.id, filename=file.filename, purpose="assistants")
+    for i in range(SEED_COUNTS["vector_stores"]):
+        store = client.vector_stores.create(name=f"seed {i}")
+        record("vector_stores", store.id, name=store.name)
+    for kind in SEED_COUNTS:
+        lab.cleanup_resources(client, kind, max_age_hours=0)
+
+
+FLOWS = {
+    "responses": flow_responses,
+    "structured_output": flow_structured_output,
+    "generate_notes": flow_generate_notes,
+    "rag": flow_rag,
+    "cleanup": flow_cleanup,
+}
+
+
+def run_flow(name, server, iterations, verbose=False):
+    """Run one flow `iterations` times after a warm-up; returns its timing and request counts."""
+    from lab_client import get_client
+    from run_waiter import RUN_DURATIONS
+
+    client = get_client()
+    seconds, requests, failures = [], [], 0
+    for iteration in range(iterations + 1):
+        random.seed(SEED)
+        RUN_DURATIONS.samples.clear()
+        served = sum(server.state.calls.values())
+        start = time.perf_counter()
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        try:
+            with output:
+                FLOWS[name](client)
+        except Exception as e:
+            failures += 1
+            print(f"  ⚠️  {name} failed: {e}")
+        if iteration == 0:
+            continue  # warm-up
+        seconds.append(time.perf_counter() - start)
+        requests.append(sum(server.state.calls.values()) - served)
+    return {
+        "p50": percentile(seconds, 50),
+        "p95": percentile(seconds, 95),
+        "requests": percentile(requests, 50),
+        "failures": failures,
+    }
+
+
+def compare(results, baseline, tolerance, config):
+    """Regression messages for results against the recorded baseline."""
+    regressions = []
+    same_faults = baseline.get("config", {}).get("error_rate") == config.error_rate
+    for name, result in results.items():
+        recorded = baseline.get("flows", {}).get(name)
+        if not recorded:
+            continue
+        if result["p50"] > recorded["p50"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {result['p50']:.2f}s vs baseline {recorded['p50']:.2f}s")
+        # Injected errors add retries, so request counts only compare like with like
+        allowed = recorded["requests"] + max(1, recorded["requests"] * REQUEST_TOLERANCE)
+        if same_faults and result["requests"] > allowed:
+            regressions.append(f"{name}: {result['requests']:.0f} requests vs baseline {recorded['requests']:.0f}")
+        if result["failures"] > recorded.get("failures", 0):
+            regressions.append(f"{name}: {result['failures']} failed iterations")
+    return regressions
+
+
+def load_baseline():
+    if not BASELINE_FILE.exists():
+        return {}
+    return json.loads(BASELINE_FILE.read_text())
+
+
+def save_baseline(results, config):
+    """Record the results as the new baseline; exits non-zero instead if any flow failed."""
+    failed = [name for name, result in results.items() if result["failures"]]
+    if failed:
+        print(f"\n❌ Not recording baselines, failing flows: {', '.join(failed)}")
+        sys.exit(1)
+    BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    baseline = load_baseline()
+    baseline["config"] = asdict(config)
+    baseline.setdefault("flows", {}).update(results)
+    BASELINE_FILE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+def _arg(flag, default, cast=str):
+    return cast(sys.argv[sys.argv.index(flag) + 1]) if flag in sys.argv else default
+
+
+def main():
+    """Run the selected flows against the mock server and check them against baselines."""
+    flows = _arg("--flows", ",".join(FLOWS)).split(",")
+    iterations = _arg("--iterations", DEFAULT_ITERATIONS, int)
+    tolerance = _arg("--tolerance", DEFAULT_TOLERANCE, float)
+    config = MockConfig(**{**asdict(BENCH_CONFIG), "error_rate": _arg("--error-rate", 0.0, float)})
+    unknown = [name for name in flows if name not in FLOWS]
+    if unknown:
+        print(f"❌ Unknown flows: {', '.join(unknown)} (choose from {', '.join(FLOWS)})")
+        sys.exit(2)
+
+    print("🚀 Offline Benchmark Suite")
+    print("=" * 50)
+
+    server, base_url = start_mock_server(config)
+    # Set before any lab module builds its client
+    os.environ.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY="sk-mock")
+    os.environ.pop("OPENAI_ORG", None)
+    print(f"🧪 Mock server: {base_url} (error rate {config.error_rate:.0%})")
+
+    results = {}
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench_") as scratch:
+            os.chdir(scratch)
+            try:
+                for name in flows:
+                    results[name] = result = run_flow(name, server, iterations, "--verbose" in sys.argv)
+                    failed = f", {result['failures']} failed" if result["failures"] else ""
+                    print(f"  {name:>17}: p50 {result['p50']:.2f}s, p95 {result['p95']:.2f}s, "
+                          f"{result['requests']:.0f} requests/iteration{failed}")
+            finally:
+                os.chdir(cwd)
+    finally:
+        server.shutdown()
+
+    if "--record" in sys.argv:
+        save_baseline(results, config)
+        print(f"\n💾 Baselines recorded in {BASELINE_FILE}")
+        return
+
+    baseline = load_baseline()
+    if not baseline:
+        print("\n💡 No baselines yet; record them with --record")
+        return
+    regressions = compare(results, baseline, tolerance, config)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) against the baseline:")
+        for message in regressions:
+            print(f"   • {message}")
+        sys.exit(1)
+    print(f"\n✅ No regressions (tolerance {tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
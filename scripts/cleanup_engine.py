@@ -0,0 +1,200 @@
+"""
+Parallel Cleanup Engine
+
+Finds lab resources older than a cutoff and deletes them through a bounded
+worker pool:
+    - every list call is auto-paginated, so nothing past the first page is missed
+    - deletes run concurrently, at most `workers` in flight
+    - 429s and transient 5xx/connection errors are retried with exponential
+      backoff and jitter, honouring the server's Retry-After when present
+    - a resource that is already gone counts as deleted
+
+plan_from_ledger() builds the same plan from the local resource ledger
+without any list calls; plan_cleanup() scans the account instead, for
+resources created before the ledger existed. Threads cannot be listed
+through the public API, so they are only ever found through the ledger.
+describe_plan() reports what would be deleted and roughly how long it
+would take, which is all a dry run does.
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+import openai
+
+DEFAULT_WORKERS = 8
+MAX_RETRIES = 5
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 30.0
+ESTIMATED_DELETE_SECONDS = 0.4  # typical latency of one delete call
+
+
+@dataclass
+class ResourceType:
+    """How to list, filter, describe and delete one kind of resource."""
+    name: str
+    icon: str
+    list_all: callable  # None: no public list endpoint, so only the ledger knows them
+    delete: callable
+    describe: callable = lambda item: item.id
+    keep: callable = lambda item: True  # sees listed objects and ledger entries alike
+
+
+RESOURCE_TYPES = {
+    "threads": ResourceType(
+        name="threads", icon="🧵",
+        list_all=None,
+        delete=lambda client, item_id: client.beta.threads.delete(item_id),
+    ),
+    "files": ResourceType(
+        name="files", icon="📄",
+        list_all=lambda client: client.files.list(),
+        delete=lambda client, item_id: client.files.delete(item_id),
+        describe=lambda item: f"{item.id} ({item.filename})",
+        # Only files used for assistants (not fine-tuning, batches, etc.)
+        keep=lambda item: getattr(item, "purpose", "assistants") == "assistants",
+    ),
+    "vector_stores": ResourceType(
+        name="vector stores", icon="🗂️ ",
+        list_all=lambda client: client.vector_stores.list(limit=100),
+        delete=lambda client, item_id: client.vector_stores.delete(item_id),
+        describe=lambda item: f"{item.id} ({item.name})",
+    ),
+}
+
+
+@dataclass
+class PlannedDelete:
+    kind: str
+    id: str
+    label: str
+    age_hours: float
+
+
+@dataclass
+class CleanupReport:
+    """Outcome of executing a cleanup plan."""
+    deleted: list = field(default_factory=list)   # PlannedDelete
+    failures: dict = field(default_factory=dict)  # id -> error
+    retries: int = 0
+    seconds: float = 0.0
+
+    def deleted_ids(self, kind):
+        return [item.id for item in self.deleted if item.kind == kind]
+
+    def describe(self):
+        rate = len(self.deleted) / self.seconds if self.seconds else 0.0
+        return (f"{len(self.deleted)} deleted, {len(self.failures)} failed, {self.retries} retries "
+                f"in {self.seconds:.2f}s ({rate:.1f} deletes/s)")
+
+
+def plan_cleanup(client, kinds=RESOURCE_TYPES, max_age_hours=24, now=None):
+    """List every page of each listable resource type and return the ones to delete."""
+    now = now or time.time()
+    plan = []
+    for kind in kinds:
+        resource = RESOURCE_TYPES[kind]
+        if resource.list_all is None:
+            continue
+        # Iterating a list page follows `has_more` cursors to the end
+        for item in resource.list_all(client):
+            age_hours = (now - item.created_at) / 3600
+            if age_hours > max_age_hours and resource.keep(item):
+                plan.append(PlannedDelete(kind, item.id, resource.describe(item), age_hours))
+    return plan
+
+
+def plan_from_ledger(ledger, kinds=RESOURCE_TYPES, max_age_hours=24, now=None):
+    """Plan deletes for resources the labs recorded, without listing the account."""
+    now = now or time.time()
+    live = ledger.live(kinds, max_age_hours)
+    plan = []
+    for kind in kinds:
+        resource = RESOURCE_TYPES[kind]
+        for entry in live[kind]:
+            # The same protection as a scan, e.g. batch input files are kept
+            if not resource.keep(SimpleNamespace(**entry)):
+                continue
+            label = entry["id"] + (f" ({entry.get('filename') or entry.get('name')})"
+                                   if entry.get("filename") or entry.get("name") else "")
+            plan.append(PlannedDelete(kind, entry["id"], label, (now - entry["created_at"]) / 3600))
+    return plan
+
+
+def estimate_seconds(count, workers=DEFAULT_WORKERS):
+    return -(-count // max(1, workers)) * ESTIMATED_DELETE_SECONDS
+
+
+def describe_plan(plan, workers=DEFAULT_WORKERS, kinds=RESOURCE_TYPES):
+    """Print what a cleanup would delete and how long it should take."""
+    for kind in kinds:
+        resource = RESOURCE_TYPES[kind]
+        items = [item for item in plan if item.kind == kind]
+        print(f"{resource.icon} {len(items)} {resource.name} to delete")
+        for item in items[:10]:
+            print(f"   • {item.label} (age: {item.age_hours:.1f}h)")
+        if len(items) > 10:
+            print(f"   … and {len(items) - 10} more")
+    print(f"⏱️  Estimated duration: ~{estimate_seconds(len(plan), workers):.1f}s "
+          f"with {workers} workers")
+
+
+def _retry_delay(error, attempt):
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    delay = min(RETRY_BASE_SECONDS * 2 ** attempt, RETRY_MAX_SECONDS)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _is_retryable(error):
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def delete_with_retry(client, item, max_retries=MAX_RETRIES):
+    """Delete one resource; returns the number of retries it needed."""
+    delete = RESOURCE_TYPES[item.kind].delete
+    for attempt in range(max_retries + 1):
+        try:
+            delete(client, item.id)
+            return attempt
+        except openai.NotFoundError:
+            return attempt  # Already gone
+        except Exception as e:
+            if attempt == max_retries or not _is_retryable(e):
+                raise
+            time.sleep(_retry_delay(e, attempt))
+
+
+def execute_plan(client, plan, workers=DEFAULT_WORKERS, on_result=None):
+    """Delete everything in the plan concurrently; returns a CleanupReport.
+
+    on_result(item, error) is called as each delete finishes (error is None
+    on success).
+    """
+    report = CleanupReport()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(delete_with_retry, client, item): item for item in plan}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                report.retries += future.result()
+                report.deleted.append(item)
+                error = None
+            except Exception as e:
+                report.failures[item.id] = str(e)
+                error = e
+            if on_result:
+                on_result(item, error)
+    report.seconds = time.perf_counter() - start
+    return report
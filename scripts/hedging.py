@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Hedged Chat Completions
+
+One slow backend response sets the end-to-end latency of a blocking chat
+completion. With hedging on, a request that is still running once it is
+slower than a given percentile of the calls api_metrics has observed for
+its model gets one duplicate. The first one to complete is used, and the
+other is cancelled:
+    - a duplicate that has not started yet never runs
+    - one already in flight cannot be aborted by the sync client, so its
+      answer is dropped when it arrives (its latency still feeds the metrics)
+Hedges are capped at max_rate of all hedgeable requests, so a backend that
+slows down across the board does not get twice the traffic. No hedging
+happens until min_samples calls have been observed for the model.
+
+Only side-effect free calls (chat completions) are hedged; a duplicated
+run or upload would create a second resource.
+
+Hedging is opt-in:
+    OPENAI_HEDGE=1                  enable it
+    OPENAI_HEDGE_PERCENTILE=95      hedge after this percentile of observed latency
+    OPENAI_HEDGE_MAX_RATE=0.1       at most this fraction of requests hedged
+    OPENAI_HEDGE_MIN_SAMPLES=20     observed calls needed before hedging starts
+
+    response = create_completion(client, model=model, messages=messages)
+
+Run as a script to compare p99 with hedging off and on against the mock
+server, with a fraction of completions stalled:
+Usage: python scripts/hedging.py [--requests 300] [--slow-rate 0.03] [--percentile 95] [--max-rate 0.1]
+"""
+
+import contextvars
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
+
+from api_metrics import METRICS, percentile
+
+ENDPOINT = "/v1/chat/completions"
+
+
+@dataclass
+class HedgePolicy:
+    """When a request gets a duplicate."""
+    enabled: bool = False
+    percentile: float = 95.0   # of observed latency for the request's model
+    max_rate: float = 0.1      # hedges per hedgeable request
+    min_samples: int = 20      # observed calls before hedging starts
+    min_delay: float = 0.05    # seconds; never hedge sooner than this
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=os.getenv("OPENAI_HEDGE", "0") not in ("0", "false", "no"),
+            percentile=float(os.getenv("OPENAI_HEDGE_PERCENTILE", cls.percentile)),
+            max_rate=float(os.getenv("OPENAI_HEDGE_MAX_RATE", cls.max_rate)),
+            min_samples=int(os.getenv("OPENAI_HEDGE_MIN_SAMPLES", cls.min_samples)),
+        )
+
+
+@dataclass
+class HedgeStats:
+    requests: int = 0     # requests that could have been hedged
+    hedged: int = 0
+    hedge_wins: int = 0   # hedges that answered first
+    capped: int = 0       # slow requests not hedged because of max_rate
+
+    def describe(self):
+        rate = self.hedged / self.requests if self.requests else 0.0
+        return (f"{self.hedged}/{self.requests} requests hedged ({rate:.1%}), "
+                f"{self.hedge_wins} won by the hedge"
+                f"{f', {self.capped} capped by max_rate' if self.capped else ''}")
+
+
+class Hedger:
+    """Runs calls with at most one duplicate, sent after a latency percentile."""
+
+    def __init__(self, policy=None, metrics=METRICS, max_workers=32):
+        self._policy = policy
+        self.metrics = metrics
+        self.max_workers = max_workers
+        self.stats = HedgeStats()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def policy(self):
+        # Read lazily, so a .env loaded after import still applies
+        if self._policy is None:
+            self._policy = HedgePolicy.from_env()
+        return self._policy
+
+    def delay(self, model):
+        """Seconds before a request of this model is hedged; None while too few calls were observed."""
+        latencies = [c.latency_seconds for c in self.metrics.calls(endpoint=ENDPOINT, model=model)
+                     if c.status == 200]
+        if len(latencies) < self.policy.min_samples:
+            return None
+        return max(self.policy.min_delay, percentile(latencies, self.policy.percentile))
+
+    def _start(self):
+        with self._lock:
+            self.stats.requests += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hedge")
+            return self._executor
+
+    def _may_hedge(self):
+        with self._lock:
+            if self.stats.hedged + 1 > self.policy.max_rate * self.stats.requests:
+                self.stats.capped += 1
+                return False
+            self.stats.hedged += 1
+            return True
+
+    def call(self, fn, model=""):
+        """fn(), duplicated once if it runs past the hedge delay; the first success wins."""
+        delay = self.delay(model) if self.policy.enabled else None
+        if delay is None:
+            return fn()
+
+        executor = self._start()
+        # Each leg runs in a copy of the caller's context, so request_priority applies to both
+        primary = executor.submit(contextvars.copy_context().run, fn)
+        if wait([primary], timeout=delay).done or not self._may_hedge():
+            return primary.result()
+
+        hedge = executor.submit(contextvars.copy_context().run, fn)
+        pending, error = {primary, hedge}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    if future is hedge:
+                        with self._lock:
+                            self.stats.hedge_wins += 1
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+
+HEDGER = Hedger()
+
+
+def create_completion(client, hedger=None, **request):
+    """client.chat.completions.create(**request), hedged when the policy is enabled."""
+    return (hedger or HEDGER).call(lambda: client.chat.completions.create(**request), request.get("model", ""))
+
+
+def benchmark(requests=300, slow_rate=0.03, policy=None, workers=8):
+    """Latency percentiles of the same workload with hedging off and on, against the mock server."""
+    from lab_client import PoolConfig, create_client
+    from mock_openai_server import MockConfig, start_mock_server
+
+    policy = policy or HedgePolicy()
+    server, base_url = start_mock_server(MockConfig(latency_seconds=0.0, completion_seconds=0.05,
+                                                    slow_rate=slow_rate, slow_seconds=1.0))
+    os.environ.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY="sk-mock")
+    os.environ.pop("OPENAI_ORG", None)
+    # The mock has no rate limits; the client-side RPM budget would only add queueing to both modes
+    client = create_client(PoolConfig(rate_limit=False))
+    messages = [{"role": "user", "content": "What do strings mean?"}]
+    results = {}
+    try:
+        # Hedging off first: its calls are the observations the hedge delay comes from
+        for mode, enabled in (("off", False), ("on", True)):
+            hedger = Hedger(replace(policy, enabled=enabled))
+
+            def timed(_):
+                start = time.perf_counter()
+                create_completion(client, hedger=hedger, model="gpt-4o-mini", messages=messages)
+                return time.perf_counter() - start
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                latencies = list(pool.map(timed, range(requests)))
+            results[mode] = {q: percentile(latencies, q) for q in (50, 95, 99)}
+            results[mode]["stats"] = hedger.stats
+    finally:
+        server.shutdown()
+    return results
+
+
+def main():
+    """Compare p50/p95/p99 with hedging off and on."""
+    def option(flag, default, cast=float):
+        return cast(sys.argv[sys.argv.index(flag) + 1]) if flag in sys.argv else default
+
+    requests = option("--requests", 300, int)
+    slow_rate = option("--slow-rate", 0.03)
+    policy = HedgePolicy(percentile=option("--percentile", HedgePolicy.percentile),
+                         max_rate=option("--max-rate", HedgePolicy.max_rate))
+
+    print("🚀 Hedged Requests Benchmark")
+    print("=" * 50)
+    print(f"🧪 {requests} completions per mode, {slow_rate:.0%} stalled for 1s, "
+          f"hedge after p{policy.percentile:g}, max rate {policy.max_rate:.0%}")
+    results = benchmark(requests, slow_rate, policy)
+    for mode, result in results.items():
+        print(f"  hedging {mode:>3}: p50 {result[50]:.3f}s, p95 {result[95]:.3f}s, p99 {result[99]:.3f}s")
+        if mode == "on":
+            print(f"              {result['stats'].describe()}")
+    off, on = results["off"][99], results["on"][99]
+    print(f"\n⚡ p99 with hedging: {off:.3f}s -> {on:.3f}s ({(on - off) / off:+.0%})")
+
+
+if __name__ == "__main__":
+    main()
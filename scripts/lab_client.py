@@ -0,0 +1,158 @@
+"""
+Shared OpenAI Client Factory
+
+One place to build the OpenAI clients used by every lab script, backed by a
+pooled httpx transport (keep-alive, optional HTTP/2, connection limits and
+timeouts) so repeated calls reuse TCP/TLS sessions instead of handshaking
+again.
+
+get_client() / get_async_client() return process-wide shared clients;
+create_client() / create_async_client() build fresh ones.
+
+Pool settings come from the environment (all optional):
+    OPENAI_MAX_CONNECTIONS     (default 20)
+    OPENAI_MAX_KEEPALIVE       (default 10)
+    OPENAI_KEEPALIVE_EXPIRY    seconds (default 30)
+    OPENAI_HTTP2               1/0 (default 1, needs the `h2` package)
+    OPENAI_TIMEOUT             seconds (default 60)
+    OPENAI_CONNECT_TIMEOUT     seconds (default 5)
+    OPENAI_RATE_LIMIT          1/0 (default 1, schedule calls through rate_limiter)
+
+Every call is also recorded by api_metrics (see OPENAI_METRICS_FILE /
+OPENAI_METRICS_PORT there to export them).
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import weakref
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from api_metrics import AsyncMeteredTransport, MeteredTransport, export_from_env
+from rate_limiter import AsyncRateLimitedTransport, RateLimitedTransport
+from sdk_httpx import httpx
+
+# Load environment variables
+load_dotenv()
+
+
+def _h2_available():
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@dataclass
+class PoolConfig:
+    """Connection-pool and timeout settings for the shared transport."""
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+    timeout: float = 60.0
+    connect_timeout: float = 5.0
+    rate_limit: bool = True
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", cls.max_connections)),
+            max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE", cls.max_keepalive_connections)),
+            keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", cls.keepalive_expiry)),
+            http2=os.getenv("OPENAI_HTTP2", "1") not in ("0", "false", "no"),
+            timeout=float(os.getenv("OPENAI_TIMEOUT", cls.timeout)),
+            connect_timeout=float(os.getenv("OPENAI_CONNECT_TIMEOUT", cls.connect_timeout)),
+            rate_limit=os.getenv("OPENAI_RATE_LIMIT", "1") not in ("0", "false", "no"),
+        )
+
+    def transport_kwargs(self):
+        return {
+            "http2": self.http2 and _h2_available(),
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        }
+
+    def httpx_kwargs(self, asynchronous=False):
+        # The pool lives in the inner transport; the limiter wraps it and
+        # the metrics layer wraps both, so queue time is measured too
+        if asynchronous:
+            transport = httpx.AsyncHTTPTransport(**self.transport_kwargs())
+            if self.rate_limit:
+                transport = AsyncRateLimitedTransport(transport)
+            transport = AsyncMeteredTransport(transport)
+        else:
+            transport = httpx.HTTPTransport(**self.transport_kwargs())
+            if self.rate_limit:
+                transport = RateLimitedTransport(transport)
+            transport = MeteredTransport(transport)
+        return {"transport": transport, "timeout": httpx.Timeout(self.timeout, connect=self.connect_timeout)}
+
+
+def _client_kwargs():
+    """API key and org from the environment; exits with a hint if the key is missing."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        print("❌ Error: OPENAI_API_KEY not found in environment variables.")
+        print("   Please copy .env.example to .env and add your API key.")
+        sys.exit(1)
+
+    client_kwargs = {"api_key": api_key}
+    org_id = os.getenv("OPENAI_ORG")
+    if org_id:
+        client_kwargs["organization"] = org_id
+    return client_kwargs
+
+
+def create_client(config=None):
+    """Build a new OpenAI client with its own connection pool."""
+    config = config or PoolConfig.from_env()
+    export_from_env()
+    return OpenAI(
+        **_client_kwargs(),
+        http_client=DefaultHttpxClient(**config.httpx_kwargs()),
+    )
+
+
+def create_async_client(config=None):
+    """Build a new AsyncOpenAI client with its own connection pool."""
+    config = config or PoolConfig.from_env()
+    export_from_env()
+    return AsyncOpenAI(
+        **_client_kwargs(),
+        http_client=DefaultAsyncHttpxClient(**config.httpx_kwargs(asynchronous=True)),
+    )
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+# Async connections belong to the event loop that opened them, so share per loop
+_shared_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    """Return the process-wide OpenAI client, creating it on first use."""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = create_client()
+    return _shared_client
+
+
+def get_async_client():
+    """Return the AsyncOpenAI client shared by everything on the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _shared_async_clients.get(loop)
+    if client is None:
+        client = create_async_client()
+        _shared_async_clients[loop] = client
+    return client
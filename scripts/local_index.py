@@ -0,0 +1,191 @@
+"""
+Local Vector Index
+
+Offline retrieval backend for the RAG lab: chunks the lab documents by
+heading, embeds the chunks into a NumPy matrix and serves top-k chunks
+in-process, so a query pays no file_search round trip or run overhead.
+
+Search is exact (one matrix-vector product) by default; ann=True adds a
+random-hyperplane LSH index that narrows the candidates before re-ranking.
+
+Embedders are pluggable: anything with embed(list[str]) -> np.ndarray works.
+HashingEmbedder is deterministic and needs no network, which makes it the
+default for offline tests; OpenAIEmbedder uses the embeddings endpoint.
+
+Usage: python scripts/local_index.py "How should I handle rate limiting?" [--ann]
+"""
+
+import hashlib
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from token_chunker import HEADING_PATTERN
+
+DEFAULT_CHUNK_CHARS = 800
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class Chunk:
+    """A retrievable piece of a document."""
+    source: str
+    heading: str
+    text: str
+
+
+def chunk_text(text, source, max_chars=DEFAULT_CHUNK_CHARS):
+    """Split text at headings, then pack paragraphs into chunks of at most max_chars."""
+    sections = []
+    heading, lines, has_body = "", [], False
+    for line in text.splitlines():
+        if HEADING_PATTERN.match(line.strip()):
+            title = line.strip().lstrip("#").strip()
+            if has_body:
+                sections.append((heading, "\n".join(lines).strip()))
+                heading, lines = title, [line]
+            else:
+                # Nested headings with nothing between them stay together
+                heading, lines = f"{heading} > {title}" if heading else title, lines + [line]
+            has_body = False
+        else:
+            lines.append(line)
+            has_body = has_body or bool(line.strip())
+    if has_body:
+        sections.append((heading, "\n".join(lines).strip()))
+
+    chunks = []
+    for heading, body in sections:
+        current = ""
+        for paragraph in re.split(r"\n\s*\n", body):
+            if current and len(current) + len(paragraph) + 2 > max_chars:
+                chunks.append(Chunk(source, heading, current))
+                current = ""
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+        if current:
+            chunks.append(Chunk(source, heading, current))
+    return chunks
+
+
+def chunk_files(paths, max_chars=DEFAULT_CHUNK_CHARS):
+    chunks = []
+    for path in paths:
+        path = Path(path)
+        chunks.extend(chunk_text(path.read_text(encoding="utf-8"), path.name, max_chars))
+    return chunks
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedder using hashed unigrams and bigrams."""
+
+    def __init__(self, dim=512):
+        self.dim = dim
+
+    def _bucket(self, feature):
+        value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+        return value % self.dim, 1.0 if (value >> 63) & 1 else -1.0
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = TOKEN_PATTERN.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                bucket, sign = self._bucket(feature)
+                vectors[row, bucket] += sign
+        # Sublinear term frequency, then unit length so dot product = cosine
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI embeddings endpoint."""
+
+    def __init__(self, client, model="text-embedding-3-small", batch_size=128):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+
+    def embed(self, texts):
+        rows = []
+        for i in range(0, len(texts), self.batch_size):
+            response = self.client.embeddings.create(model=self.model, input=texts[i:i + self.batch_size])
+            rows.extend(item.embedding for item in response.data)
+        vectors = np.asarray(rows, dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class LSHIndex:
+    """Random-hyperplane LSH over unit vectors for approximate nearest neighbours."""
+
+    def __init__(self, matrix, tables=8, bits=8, seed=0):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((tables, matrix.shape[1], bits)).astype(np.float32)
+        self.powers = 1 << np.arange(bits)
+        self.buckets = []
+        for table in range(tables):
+            keys = self._keys(matrix, table)
+            buckets = {}
+            for row, key in enumerate(keys):
+                buckets.setdefault(int(key), []).append(row)
+            self.buckets.append(buckets)
+
+    def _keys(self, vectors, table):
+        return ((vectors @ self.planes[table]) > 0) @ self.powers
+
+    def candidates(self, vector):
+        rows = set()
+        for table, buckets in enumerate(self.buckets):
+            key = int(self._keys(vector[None, :], table)[0])
+            rows.update(buckets.get(key, ()))
+        return np.fromiter(rows, dtype=np.int64, count=len(rows))
+
+
+class LocalIndex:
+    """In-process top-k retrieval over embedded chunks."""
+
+    def __init__(self, chunks, embedder=None, ann=False):
+        self.chunks = list(chunks)
+        self.embedder = embedder or HashingEmbedder()
+        self.matrix = self.embedder.embed([f"{c.heading}\n{c.text}" for c in self.chunks])
+        self.lsh = LSHIndex(self.matrix) if ann else None
+
+    @classmethod
+    def from_files(cls, paths, embedder=None, ann=False, max_chars=DEFAULT_CHUNK_CHARS):
+        return cls(chunk_files(paths, max_chars), embedder, ann)
+
+    def search(self, query, k=4):
+        """Return [(score, Chunk)] for the k chunks most similar to `query`."""
+        vector = self.embedder.embed([query])[0]
+        rows = self.lsh.candidates(vector) if self.lsh else None
+        if rows is None or len(rows) < k:
+            rows = np.arange(len(self.chunks))
+        scores = self.matrix[rows] @ vector
+        top = np.argsort(-scores)[:k]
+        return [(float(scores[i]), self.chunks[rows[i]]) for i in top]
+
+
+def main():
+    """Query the sample documents offline."""
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    paths = [p for p in Path("data").glob("*") if p.suffix in (".md", ".txt")]
+    if not paths:
+        print("❌ No documents found in data/. Run: python scripts/03_rag_file_search.py")
+        sys.exit(1)
+
+    index = LocalIndex.from_files(paths, ann="--ann" in sys.argv)
+    print(f"📚 Indexed {len(index.chunks)} chunks from {len(paths)} documents")
+    for score, chunk in index.search(sys.argv[1]):
+        print(f"\n[{score:.3f}] {chunk.source} — {chunk.heading}")
+        print(chunk.text[:300])
+
+
+if __name__ == "__main__":
+    main()
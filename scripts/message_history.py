@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Thread History Reader
+
+Reads a thread's messages oldest first, one page at a time, following the
+list cursors to the end instead of stopping after the first page. While
+the caller works through one page, the next is already being fetched in
+the background, so a long thread streams out at the speed of the slower of
+the two instead of their sum. Only two pages are ever held, so threads with
+thousands of messages read in constant memory.
+
+Messages can be filtered by role and by created_at (epoch seconds); with
+ascending order the reader stops paging as soon as it passes `until`.
+
+Usage: python scripts/message_history.py <thread_id> [--role user|assistant] [--since <epoch>] [--until <epoch>]
+"""
+
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+DEFAULT_PAGE_SIZE = 100  # the API maximum
+OPTIONS = {"--role": str, "--since": int, "--until": int}
+
+
+def _fetch(client, thread_id, after, page_size):
+    kwargs = {"after": after} if after else {}
+    page = client.beta.threads.messages.list(thread_id=thread_id, order="asc", limit=page_size, **kwargs)
+    return page.data, page.has_more
+
+
+def _select(messages, roles, since, until):
+    """(matching messages, whether paging can stop because `until` was passed)."""
+    selected = []
+    for message in messages:
+        if until is not None and message.created_at > until:
+            return selected, True
+        if (since is None or message.created_at >= since) and (roles is None or message.role in roles):
+            selected.append(message)
+    return selected, False
+
+
+def iter_messages(client, thread_id, roles=None, since=None, until=None, page_size=DEFAULT_PAGE_SIZE,
+                  prefetch=True):
+    """Yield a thread's messages oldest first, prefetching the next page on a worker thread."""
+    roles = {roles} if isinstance(roles, str) else roles
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(_fetch, client, thread_id, None, page_size)
+        while pending is not None:
+            messages, has_more = pending.result()
+            pending = None
+            if has_more and messages and prefetch:
+                pending = executor.submit(_fetch, client, thread_id, messages[-1].id, page_size)
+            selected, done = _select(messages, roles, since, until)
+            yield from selected
+            if done:
+                if pending:
+                    pending.cancel()
+                return
+            if has_more and messages and not prefetch:
+                pending = executor.submit(_fetch, client, thread_id, messages[-1].id, page_size)
+
+
+async def aiter_messages(client, thread_id, roles=None, since=None, until=None, page_size=DEFAULT_PAGE_SIZE):
+    """iter_messages for an AsyncOpenAI client; the next page is fetched by a background task."""
+    roles = {roles} if isinstance(roles, str) else roles
+
+    async def fetch(after):
+        kwargs = {"after": after} if after else {}
+        page = await client.beta.threads.messages.list(thread_id=thread_id, order="asc", limit=page_size, **kwargs)
+        return page.data, page.has_more
+
+    pending = asyncio.create_task(fetch(None))
+    try:
+        while pending is not None:
+            messages, has_more = await pending
+            pending = asyncio.create_task(fetch(messages[-1].id)) if has_more and messages else None
+            selected, done = _select(messages, roles, since, until)
+            for message in selected:
+                yield message
+            if done:
+                return
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+def message_text(message):
+    """Text of a message's first text block ('' if it has none)."""
+    for block in message.content:
+        if block.type == "text":
+            return block.text.value
+    return ""
+
+
+def parse_args(argv):
+    """(positional arguments, {option: value}); an option's value is never taken as positional."""
+    positional, options = [], {}
+    args = iter(argv)
+    for arg in args:
+        if arg in OPTIONS:
+            value = next(args, None)
+            if value is None:
+                raise ValueError(f"{arg} needs a value")
+            options[arg] = OPTIONS[arg](value)
+        else:
+            positional.append(arg)
+    return positional, options
+
+
+def main():
+    """Print a thread's history, optionally filtered."""
+    try:
+        args, options = parse_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"❌ {e}")
+        args = []
+    if len(args) != 1:
+        print(__doc__)
+        return
+
+    from lab_client import get_client
+
+    load_dotenv()
+
+    roles, since, until = (options.get(flag) for flag in OPTIONS)
+    count = 0
+    for message in iter_messages(get_client(), args[0], roles, since, until):
+        count += 1
+        text = message_text(message)
+        print(f"\n{message.role.upper()} ({message.created_at}):")
+        print(text[:500] + ("..." if len(text) > 500 else ""))
+    print(f"\n📋 {count} messages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,734 @@
+#!/usr/bin/env python3
+"""
+Mock OpenAI Server
+
+Local stand-in for the endpoints used by the lab scripts, so every flow can
+be exercised and benchmarked offline without spending quota:
+    - chat completions, plain or streamed (SSE); json_schema response formats
+      and function tools are answered with arguments that fit the schema
+    - threads, messages and runs; runs stay "queued" and then "in_progress"
+      for configurable durations before completing with a canned
+      file_search answer, or stream the same lifecycle as SSE events
+    - files (multipart upload, list, content, delete)
+    - vector stores, their files and file batches
+    - assistants (create, retrieve, update)
+
+Every request can be delayed (latency_seconds + latency_jitter) and a
+fraction of them failed (error_rate, error_status) to exercise retry paths.
+A fraction of chat completions can stall (slow_rate, slow_seconds) to give
+the latency distribution a long tail.
+Request counts per route are kept in state.calls.
+
+Usage: python scripts/mock_openai_server.py [--port 8765] [--run-seconds 1.5] [--error-rate 0.05]
+                                           [--slow-rate 0.05]
+Then:  OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python scripts/03_rag_file_search.py
+"""
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class MockConfig:
+    """Timing and fault-injection knobs for the mock server."""
+    queued_seconds: float = 0.2
+    run_seconds: float = 1.0
+    run_jitter: float = 0.5
+    latency_seconds: float = 0.02
+    latency_jitter: float = 0.0
+    poll_after_ms: int = 50
+    completion_seconds: float = 0.3  # time to generate a chat completion
+    slow_rate: float = 0.0           # fraction of completions that stall (a slow backend)
+    slow_seconds: float = 3.0        # extra time a stalled completion takes
+    stream_chunks: int = 12          # deltas per streamed answer
+    error_rate: float = 0.0          # fraction of requests answered with error_status
+    error_status: int = 500
+
+
+def _new_id(prefix):
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+
+def _sample(schema, defs=None, name="value"):
+    """A value that satisfies a (strict) JSON schema."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return _sample(defs[schema["$ref"].rsplit("/", 1)[-1]], defs, name)
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"] or schema["anyOf"]
+        return _sample(options[0], defs, name)
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        return {key: _sample(sub, defs, key) for key, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_sample(schema.get("items", {}), defs, f"{name} {i + 1}") for i in range(3)]
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return True
+    if kind == "null":
+        return None
+    return f"mock {name}"[:schema.get("maxLength", 200)]
+
+
+def _split(text, parts):
+    size = max(1, -(-len(text) // max(1, parts)))
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _parse_multipart(body, content_type):
+    """{field: str or (filename, bytes)} from a multipart/form-data body."""
+    boundary = re.search(r'boundary="?([^";]+)"?', content_type).group(1).encode()
+    fields = {}
+    for part in body.split(b"--" + boundary)[1:-1]:
+        head, _, data = part.strip(b"\r\n").partition(b"\r\n\r\n")
+        disposition = head.decode(errors="replace")
+        name = re.search(r'name="([^"]*)"', disposition).group(1)
+        filename = re.search(r'filename="([^"]*)"', disposition)
+        fields[name] = (filename.group(1), data) if filename else data.decode()
+    return fields
+
+
+class MockState:
+    """In-memory store of threads, messages, runs, files and vector stores."""
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.threads = {}
+        self.messages = {}
+        self.runs = {}
+        self.files = {}
+        self.file_contents = {}
+        self.vector_stores = {}
+        self.vector_store_files = {}
+        self.file_batches = {}
+        self.assistants = {}
+        self.calls = Counter()  # handler name -> requests served
+
+    def create_thread(self, messages):
+        thread_id = _new_id("thread")
+        thread = {
+            "id": thread_id,
+            "object": "thread",
+            "created_at": int(time.time()),
+            "metadata": {},
+            "tool_resources": {},
+        }
+        with self.lock:
+            self.threads[thread_id] = thread
+            self.messages[thread_id] = []
+        for message in messages or []:
+            self.add_message(thread_id, message.get("role", "user"), message.get("content", ""))
+        return thread
+
+    def delete_thread(self, thread_id):
+        with self.lock:
+            del self.threads[thread_id]
+            self.messages.pop(thread_id, None)
+        return {"id": thread_id, "object": "thread.deleted", "deleted": True}
+
+    def add_message(self, thread_id, role, text, run_id=None, annotations=None, message_id=None):
+        message = {
+            "id": message_id or _new_id("msg"),
+            "object": "thread.message",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "role": role,
+            "run_id": run_id,
+            "assistant_id": None,
+            "attachments": [],
+            "metadata": {},
+            "status": "completed",
+            "content": [{
+                "type": "text",
+                "text": {"value": text, "annotations": annotations or []},
+            }],
+        }
+        with self.lock:
+            self.messages[thread_id].append(message)
+        return message
+
+    def delete_message(self, thread_id, message_id):
+        with self.lock:
+            messages = self.messages[thread_id]
+            messages.remove(next(m for m in messages if m["id"] == message_id))
+        return {"id": message_id, "object": "thread.message.deleted", "deleted": True}
+
+    def create_run(self, thread_id, body):
+        config = self.config
+        now = time.time()
+        run_seconds = max(0.0, config.run_seconds + random.uniform(-config.run_jitter, config.run_jitter))
+        run = {
+            "id": _new_id("run"),
+            "object": "thread.run",
+            "created_at": int(now),
+            "thread_id": thread_id,
+            "assistant_id": body.get("assistant_id"),
+            "instructions": body.get("instructions"),
+            "model": "gpt-4o-mini",
+            "tools": [{"type": "file_search"}],
+            "status": "queued",
+            "usage": None,
+            "_started": now + config.queued_seconds,
+            "_finishes": now + config.queued_seconds + run_seconds,
+            "_message_id": _new_id("msg"),
+        }
+        with self.lock:
+            self.runs[run["id"]] = run
+        return self.refresh_run(run["id"])
+
+    def refresh_run(self, run_id):
+        """Advance a run through queued -> in_progress -> completed based on wall time."""
+        with self.lock:
+            run = self.runs[run_id]
+            now = time.time()
+            if run["status"] == "queued" and now >= run["_started"]:
+                run["status"] = "in_progress"
+            if run["status"] == "in_progress" and now >= run["_finishes"]:
+                run["status"] = "completed"
+                run["completed_at"] = int(now)
+                run["usage"] = {"prompt_tokens": 420, "completion_tokens": 96, "total_tokens": 516}
+                completed = True
+            else:
+                completed = False
+        if completed:
+            self._write_answer(run)
+        return run
+
+    def answer_for(self, run):
+        """(text, annotations) of the canned answer to a run's first user message."""
+        with self.lock:
+            question = next(
+                (m["content"][0]["text"]["value"] for m in self.messages[run["thread_id"]] if m["role"] == "user"),
+                "",
+            )
+        answer = f"Mock answer for: {question.splitlines()[0] if question else 'your question'} 【4:0†source】"
+        annotation = {
+            "type": "file_citation",
+            "text": "【4:0†source】",
+            "start_index": len(answer) - 12,
+            "end_index": len(answer),
+            "file_citation": {"file_id": "file-mock0000000000000000"},
+        }
+        return answer, [annotation]
+
+    def _write_answer(self, run):
+        answer, annotations = self.answer_for(run)
+        return self.add_message(run["thread_id"], "assistant", answer, run_id=run["id"],
+                                annotations=annotations, message_id=run["_message_id"])
+
+    def run_steps(self, run_id):
+        run = self.runs[run_id]
+        step = {
+            "object": "thread.run.step",
+            "created_at": run["created_at"],
+            "run_id": run_id,
+            "thread_id": run["thread_id"],
+            "assistant_id": run["assistant_id"],
+            "status": "completed",
+        }
+        return [
+            {**step, "id": _new_id("step"), "type": "message_creation",
+             "step_details": {"type": "message_creation", "message_creation": {"message_id": run["_message_id"]}}},
+            {**step, "id": _new_id("step"), "type": "tool_calls",
+             "step_details": {"type": "tool_calls", "tool_calls": [
+                 {"id": _new_id("call"), "type": "file_search", "file_search": {}}]}},
+        ]
+
+    def stream_run(self, thread_id, body):
+        """Yield (event, data) for a streamed run, sleeping through its lifecycle."""
+        run = self.create_run(thread_id, body)
+        yield "thread.run.created", _public(run)
+        time.sleep(max(0.0, run["_started"] - time.time()))
+        run = self.refresh_run(run["id"])
+        yield "thread.run.in_progress", _public(run)
+
+        message_step, tool_step = self.run_steps(run["id"])
+        yield "thread.run.step.created", {**tool_step, "status": "in_progress"}
+        yield "thread.run.step.completed", tool_step
+
+        answer, annotations = self.answer_for(run)
+        message_id = run["_message_id"]
+        yield "thread.run.step.created", {**message_step, "status": "in_progress"}
+        yield "thread.message.created", {
+            "id": message_id, "object": "thread.message", "thread_id": thread_id, "run_id": run["id"],
+            "role": "assistant", "status": "in_progress", "content": [], "created_at": int(time.time()),
+        }
+        pieces = _split(answer, self.config.stream_chunks)
+        pause = max(0.0, run["_finishes"] - time.time()) / len(pieces)
+        for i, piece in enumerate(pieces):
+            time.sleep(pause)
+            text = {"value": piece, "annotations": []}
+            if i == len(pieces) - 1:
+                text["annotations"] = [{**a, "index": 0} for a in annotations]
+            yield "thread.message.delta", {
+                "id": message_id, "object": "thread.message.delta",
+                "delta": {"content": [{"index": 0, "type": "text", "text": text}]},
+            }
+
+        time.sleep(max(0.0, run["_finishes"] - time.time()))
+        run = self.refresh_run(run["id"])
+        message = next(m for m in self.messages[thread_id] if m["id"] == message_id)
+        yield "thread.message.completed", message
+        yield "thread.run.step.completed", message_step
+        yield "thread.run.completed", _public(run)
+        yield "done", "[DONE]"
+
+    def completion(self, body):
+        """A chat.completion answering the request in the shape it asked for."""
+        response_format = body.get("response_format") or {}
+        message = {"role": "assistant", "content": None}
+        finish_reason = "stop"
+        if response_format.get("type") == "json_schema":
+            message["content"] = json.dumps(_sample(response_format["json_schema"]["schema"]))
+        elif response_format.get("type") == "json_object":
+            message["content"] = json.dumps({"result": "mock"})
+        elif body.get("tools"):
+            function = body["tools"][0]["function"]
+            message["tool_calls"] = [{
+                "id": _new_id("call"), "type": "function",
+                "function": {"name": function["name"], "arguments": json.dumps(_sample(function.get("parameters", {})))},
+            }]
+            finish_reason = "tool_calls"
+        else:
+            question = next((m.get("content") for m in reversed(body.get("messages", [])) if m.get("role") == "user"), "")
+            question = question if isinstance(question, str) else "your question"
+            message["content"] = f"Mock completion for: {question.splitlines()[0] if question else 'your question'}"
+
+        prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+        completion_tokens = len(json.dumps(message)) // 4
+        return {
+            "id": _new_id("chatcmpl"),
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def completion_chunks(self, body):
+        """chat.completion.chunk payloads for a streamed completion."""
+        completion = self.completion(body)
+        message = completion["choices"][0]["message"]
+        chunk = {k: completion[k] for k in ("id", "created", "model")}
+        chunk["object"] = "chat.completion.chunk"
+
+        def delta(content, finish_reason=None):
+            return {**chunk, "choices": [{"index": 0, "delta": content, "finish_reason": finish_reason}]}
+
+        yield delta({"role": "assistant", "content": ""})
+        if message.get("tool_calls"):
+            call = message["tool_calls"][0]
+            pieces = _split(call["function"]["arguments"], self.config.stream_chunks)
+            yield delta({"tool_calls": [{"index": 0, "id": call["id"], "type": "function",
+                                         "function": {"name": call["function"]["name"], "arguments": ""}}]})
+            for piece in pieces:
+                time.sleep(self.config.completion_seconds / len(pieces))
+                yield delta({"tool_calls": [{"index": 0, "function": {"arguments": piece}}]})
+        else:
+            pieces = _split(message["content"], self.config.stream_chunks)
+            for piece in pieces:
+                time.sleep(self.config.completion_seconds / len(pieces))
+                yield delta({"content": piece})
+        yield delta({}, completion["choices"][0]["finish_reason"])
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield {**chunk, "choices": [], "usage": completion["usage"]}
+        yield "[DONE]"
+
+    def create_file(self, filename, data, purpose):
+        file = {
+            "id": f"file-{uuid.uuid4().hex[:24]}",
+            "object": "file",
+            "bytes": len(data),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        with self.lock:
+            self.files[file["id"]] = file
+            self.file_contents[file["id"]] = data
+        return file
+
+    def delete_file(self, file_id):
+        with self.lock:
+            del self.files[file_id]
+            self.file_contents.pop(file_id, None)
+        return {"id": file_id, "object": "file", "deleted": True}
+
+    def create_vector_store(self, body):
+        store = {
+            "id": _new_id("vs"),
+            "object": "vector_store",
+            "created_at": int(time.time()),
+            "name": body.get("name"),
+            "status": "completed",
+            "usage_bytes": 0,
+            "file_counts": {"in_progress": 0, "completed": 0, "failed": 0, "cancelled": 0, "total": 0},
+            "expires_after": body.get("expires_after"),
+            "metadata": body.get("metadata") or {},
+        }
+        with self.lock:
+            self.vector_stores[store["id"]] = store
+            self.vector_store_files[store["id"]] = {}
+        for file_id in body.get("file_ids") or []:
+            self.add_vector_store_file(store["id"], file_id)
+        return store
+
+    def delete_vector_store(self, store_id):
+        with self.lock:
+            del self.vector_stores[store_id]
+            self.vector_store_files.pop(store_id, None)
+        return {"id": store_id, "object": "vector_store.deleted", "deleted": True}
+
+    def add_vector_store_file(self, store_id, file_id):
+        entry = {
+            "id": file_id,
+            "object": "vector_store.file",
+            "created_at": int(time.time()),
+            "vector_store_id": store_id,
+            "status": "completed",
+            "usage_bytes": len(self.file_contents.get(file_id, b"")),
+            "last_error": None,
+        }
+        with self.lock:
+            self.vector_store_files[store_id][file_id] = entry
+            counts = self.vector_stores[store_id]["file_counts"]
+            counts["completed"] = counts["total"] = len(self.vector_store_files[store_id])
+        return entry
+
+    def remove_vector_store_file(self, store_id, file_id):
+        with self.lock:
+            del self.vector_store_files[store_id][file_id]
+            counts = self.vector_stores[store_id]["file_counts"]
+            counts["completed"] = counts["total"] = len(self.vector_store_files[store_id])
+        return {"id": file_id, "object": "vector_store.file.deleted", "deleted": True}
+
+    def create_file_batch(self, store_id, file_ids):
+        for file_id in file_ids:
+            self.add_vector_store_file(store_id, file_id)
+        batch = {
+            "id": _new_id("vsfb"),
+            "object": "vector_store.files_batch",
+            "created_at": int(time.time()),
+            "vector_store_id": store_id,
+            "status": "completed",
+            "file_counts": {"in_progress": 0, "completed": len(file_ids), "failed": 0, "cancelled": 0,
+                            "total": len(file_ids)},
+        }
+        with self.lock:
+            self.file_batches[batch["id"]] = batch
+        return batch
+
+    def upsert_assistant(self, body, assistant_id=None):
+        with self.lock:
+            assistant = self.assistants.get(assistant_id) or {
+                "id": assistant_id or _new_id("asst"),
+                "object": "assistant",
+                "created_at": int(time.time()),
+                "model": "gpt-4o-mini",
+                "name": None,
+                "instructions": None,
+                "tools": [],
+                "tool_resources": {},
+                "metadata": {},
+            }
+            assistant.update({k: v for k, v in body.items() if k in assistant})
+            self.assistants[assistant["id"]] = assistant
+        return assistant
+
+
+def _page(items, params=None, default_order="desc"):
+    """One cursor page (order, after, limit) of a list of objects oldest first."""
+    params = params or {}
+    items = list(items)
+    if params.get("order", default_order) == "desc":
+        items.reverse()
+    if params.get("after"):
+        ids = [item["id"] for item in items]
+        items = items[ids.index(params["after"]) + 1:] if params["after"] in ids else []
+    limit = int(params.get("limit", 20))
+    page = items[:limit]
+    return {
+        "object": "list",
+        "data": page,
+        "first_id": page[0]["id"] if page else None,
+        "last_id": page[-1]["id"] if page else None,
+        "has_more": len(items) > limit,
+    }
+
+
+def _public(obj):
+    return {k: v for k, v in obj.items() if not k.startswith("_")}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Routes the subset of /v1 endpoints the labs call."""
+
+    server_version = "MockOpenAI/0.2"
+    protocol_version = "HTTP/1.1"
+
+    routes = [
+        ("POST", r"/v1/chat/completions", "create_completion"),
+        ("POST", r"/v1/threads", "create_thread"),
+        ("GET", r"/v1/threads", "list_threads"),
+        ("GET", r"/v1/threads/(?P<thread_id>[^/]+)", "retrieve_thread"),
+        ("DELETE", r"/v1/threads/(?P<thread_id>[^/]+)", "delete_thread"),
+        ("POST", r"/v1/threads/(?P<thread_id>[^/]+)/messages", "create_message"),
+        ("GET", r"/v1/threads/(?P<thread_id>[^/]+)/messages", "list_messages"),
+        ("DELETE", r"/v1/threads/(?P<thread_id>[^/]+)/messages/(?P<message_id>[^/]+)", "delete_message"),
+        ("POST", r"/v1/threads/(?P<thread_id>[^/]+)/runs", "create_run"),
+        ("GET", r"/v1/threads/(?P<thread_id>[^/]+)/runs/(?P<run_id>[^/]+)/steps", "list_run_steps"),
+        ("GET", r"/v1/threads/(?P<thread_id>[^/]+)/runs/(?P<run_id>[^/]+)", "retrieve_run"),
+        ("POST", r"/v1/files", "create_file"),
+        ("GET", r"/v1/files", "list_files"),
+        ("GET", r"/v1/files/(?P<file_id>[^/]+)/content", "file_content"),
+        ("GET", r"/v1/files/(?P<file_id>[^/]+)", "retrieve_file"),
+        ("DELETE", r"/v1/files/(?P<file_id>[^/]+)", "delete_file"),
+        ("POST", r"/v1/vector_stores", "create_vector_store"),
+        ("GET", r"/v1/vector_stores", "list_vector_stores"),
+        ("GET", r"/v1/vector_stores/(?P<store_id>[^/]+)", "retrieve_vector_store"),
+        ("DELETE", r"/v1/vector_stores/(?P<store_id>[^/]+)", "delete_vector_store"),
+        ("POST", r"/v1/vector_stores/(?P<store_id>[^/]+)/files", "create_vector_store_file"),
+        ("GET", r"/v1/vector_stores/(?P<store_id>[^/]+)/files", "list_vector_store_files"),
+        ("DELETE", r"/v1/vector_stores/(?P<store_id>[^/]+)/files/(?P<file_id>[^/]+)", "delete_vector_store_file"),
+        ("POST", r"/v1/vector_stores/(?P<store_id>[^/]+)/file_batches", "create_file_batch"),
+        ("GET", r"/v1/vector_stores/(?P<store_id>[^/]+)/file_batches/(?P<batch_id>[^/]+)", "retrieve_file_batch"),
+        ("POST", r"/v1/assistants", "create_assistant"),
+        ("GET", r"/v1/assistants/(?P<assistant_id>[^/]+)", "retrieve_assistant"),
+        ("POST", r"/v1/assistants/(?P<assistant_id>[^/]+)", "update_assistant"),
+    ]
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _dispatch(self, method):
+        path, _, query = self.path.partition("?")
+        for route_method, pattern, handler_name in self.routes:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                config = self.state.config
+                time.sleep(config.latency_seconds + random.uniform(0, config.latency_jitter))
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                content_type = self.headers.get("Content-Type", "")
+                if content_type.startswith("multipart/form-data"):
+                    body = _parse_multipart(raw, content_type)
+                else:
+                    body = json.loads(raw or b"{}")
+                params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+                with self.state.lock:
+                    self.state.calls[handler_name] += 1
+                if random.random() < config.error_rate:
+                    return self._send(config.error_status, {"error": {
+                        "message": "Injected failure", "type": "server_error" if config.error_status >= 500
+                        else "rate_limit_exceeded"}}, {"retry-after": "0.1"})
+                try:
+                    status, payload = getattr(self, handler_name)(body=body, params=params, **match.groupdict())
+                except KeyError:
+                    status, payload = 404, {"error": {"message": "No such object", "type": "invalid_request_error"}}
+                if hasattr(payload, "__next__"):
+                    return self._send_events(payload)
+                return self._send(status, payload)
+        self._send(404, {"error": {"message": f"Unknown route {method} {path}", "type": "invalid_request_error"}})
+
+    def _send(self, status, payload, headers=None):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream" if isinstance(payload, bytes)
+                         else "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("openai-poll-after-ms", str(self.state.config.poll_after_ms))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_events(self, events):
+        """Write (event, data) pairs as a chunked text/event-stream (str data is sent as is)."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write(text):
+            data = text.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        for event, data in events:
+            prefix = f"event: {event}\n" if event else ""
+            write(f"{prefix}data: {data if isinstance(data, str) else json.dumps(data)}\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def create_completion(self, body, params):
+        if body.get("stream"):
+            return 200, ((None, chunk) for chunk in self.state.completion_chunks(body))
+        config = self.state.config
+        stalled = random.random() < config.slow_rate
+        time.sleep(config.completion_seconds + (config.slow_seconds if stalled else 0.0))
+        return 200, self.state.completion(body)
+
+    def create_thread(self, body, params):
+        return 200, self.state.create_thread(body.get("messages"))
+
+    def list_threads(self, body, params):
+        return 200, _page(self.state.threads.values(), params)
+
+    def retrieve_thread(self, body, params, thread_id):
+        return 200, self.state.threads[thread_id]
+
+    def delete_thread(self, body, params, thread_id):
+        return 200, self.state.delete_thread(thread_id)
+
+    def create_message(self, body, params, thread_id):
+        return 200, self.state.add_message(thread_id, body.get("role", "user"), body.get("content", ""))
+
+    def delete_message(self, body, params, thread_id, message_id):
+        return 200, self.state.delete_message(thread_id, message_id)
+
+    def list_messages(self, body, params, thread_id):
+        return 200, _page(self.state.messages[thread_id], params)
+
+    def create_run(self, body, params, thread_id):
+        if thread_id not in self.state.threads:
+            raise KeyError(thread_id)
+        for message in body.get("additional_messages") or []:
+            self.state.add_message(thread_id, message.get("role", "user"), message.get("content", ""))
+        if body.get("stream"):
+            return 200, self.state.stream_run(thread_id, body)
+        return 200, _public(self.state.create_run(thread_id, body))
+
+    def retrieve_run(self, body, params, thread_id, run_id):
+        return 200, _public(self.state.refresh_run(run_id))
+
+    def list_run_steps(self, body, params, thread_id, run_id):
+        return 200, _page(self.state.run_steps(run_id), params)
+
+    def create_file(self, body, params):
+        filename, data = body["file"]
+        return 200, self.state.create_file(filename, data, body.get("purpose", "assistants"))
+
+    def list_files(self, body, params):
+        files = [f for f in self.state.files.values() if params.get("purpose") in (None, f["purpose"])]
+        return 200, _page(files, params)
+
+    def retrieve_file(self, body, params, file_id):
+        return 200, self.state.files[file_id]
+
+    def file_content(self, body, params, file_id):
+        return 200, self.state.file_contents[file_id]
+
+    def delete_file(self, body, params, file_id):
+        return 200, self.state.delete_file(file_id)
+
+    def create_vector_store(self, body, params):
+        return 200, self.state.create_vector_store(body)
+
+    def list_vector_stores(self, body, params):
+        return 200, _page(self.state.vector_stores.values(), params)
+
+    def retrieve_vector_store(self, body, params, store_id):
+        return 200, self.state.vector_stores[store_id]
+
+    def delete_vector_store(self, body, params, store_id):
+        return 200, self.state.delete_vector_store(store_id)
+
+    def create_vector_store_file(self, body, params, store_id):
+        return 200, self.state.add_vector_store_file(store_id, body["file_id"])
+
+    def list_vector_store_files(self, body, params, store_id):
+        return 200, _page(self.state.vector_store_files[store_id].values(), params)
+
+    def delete_vector_store_file(self, body, params, store_id, file_id):
+        return 200, self.state.remove_vector_store_file(store_id, file_id)
+
+    def create_file_batch(self, body, params, store_id):
+        return 200, self.state.create_file_batch(store_id, body.get("file_ids", []))
+
+    def retrieve_file_batch(self, body, params, store_id, batch_id):
+        return 200, self.state.file_batches[batch_id]
+
+    def create_assistant(self, body, params):
+        return 200, self.state.upsert_assistant(body)
+
+    def retrieve_assistant(self, body, params, assistant_id):
+        return 200, self.state.upsert_assistant({}, assistant_id)
+
+    def update_assistant(self, body, params, assistant_id):
+        return 200, self.state.upsert_assistant(body, assistant_id)
+
+
+class MockServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients routinely hang up on a stream they have read enough of
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_mock_server(config=None, host="127.0.0.1", port=0):
+    """Start the mock server on a daemon thread and return (server, base_url)."""
+    server = MockServer((host, port), MockHandler)
+    server.daemon_threads = True
+    server.state = MockState(config or MockConfig())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    """Run the mock server in the foreground."""
+    config = MockConfig()
+    port = 8765
+
+    if "--port" in sys.argv:
+        port = int(sys.argv[sys.argv.index("--port") + 1])
+    if "--run-seconds" in sys.argv:
+        config.run_seconds = float(sys.argv[sys.argv.index("--run-seconds") + 1])
+    if "--error-rate" in sys.argv:
+        config.error_rate = float(sys.argv[sys.argv.index("--error-rate") + 1])
+    if "--slow-rate" in sys.argv:
+        config.slow_rate = float(sys.argv[sys.argv.index("--slow-rate") + 1])
+
+    server, base_url = start_mock_server(config, port=port)
+    print(f"🧪 Mock OpenAI server listening on {base_url}")
+    print(f"   export OPENAI_BASE_URL={base_url} OPENAI_API_KEY=sk-mock")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print("\n👋 Mock server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Model Router
+
+Picks the model for each request instead of every script hard-coding one.
+Each call site names its task ("qna", "structured_output", "notes_map", ...)
+and the router chooses from:
+    - what the task needs: a minimum quality tier, strict structured outputs
+    - the estimated prompt tokens (the model's context window must fit them)
+    - a latency budget: the task default, or tighter when the caller passes
+      latency_budget / deadline
+    - p95 latency per model, as observed by api_metrics once a model has
+      enough calls (a conservative prior until then)
+Among the models expected to finish within the budget the cheapest one for
+the estimated tokens wins. When none is, the request goes to the fastest
+model that still meets the task's quality bar. A prompt too large for every
+context window goes to the largest one, and the API reports the overflow.
+
+Traffic moves between models without touching the scripts:
+    OPENAI_MODEL_<TASK>=gpt-4o      pin a task, e.g. OPENAI_MODEL_QNA
+    OPENAI_MODEL=gpt-4o-mini        pin every task
+
+    model = route("qna", messages)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from api_metrics import METRICS
+from token_chunker import count_tokens
+
+AUTO = "auto"  # pass as a model name to have it routed
+MIN_SAMPLES = 20  # observed calls before measured p95 replaces the prior
+DEFAULT_OUTPUT_TOKENS = 512
+
+
+@dataclass
+class ModelProfile:
+    name: str
+    quality: int              # 1 = basic, 3 = strongest
+    input_cost: float         # USD per 1M tokens
+    output_cost: float
+    context_window: int
+    structured_outputs: bool  # supports strict json_schema
+    prior_p95: float          # seconds, until observations take over
+
+
+@dataclass
+class TaskPolicy:
+    min_quality: int = 1
+    structured: bool = False
+    latency_budget: float = None  # seconds; None = no latency constraint
+    output_tokens: int = DEFAULT_OUTPUT_TOKENS
+
+
+MODELS = {
+    "gpt-4o-mini": ModelProfile("gpt-4o-mini", quality=2, input_cost=0.15, output_cost=0.60,
+                                context_window=128_000, structured_outputs=True, prior_p95=6.0),
+    "gpt-4o": ModelProfile("gpt-4o", quality=3, input_cost=2.50, output_cost=10.00,
+                           context_window=128_000, structured_outputs=True, prior_p95=10.0),
+    "gpt-4-turbo": ModelProfile("gpt-4-turbo", quality=3, input_cost=10.00, output_cost=30.00,
+                                context_window=128_000, structured_outputs=False, prior_p95=20.0),
+    "gpt-3.5-turbo": ModelProfile("gpt-3.5-turbo", quality=1, input_cost=0.50, output_cost=1.50,
+                                  context_window=16_385, structured_outputs=False, prior_p95=4.0),
+}
+
+TASKS = {
+    "assistant": TaskPolicy(min_quality=2),
+    "structured_output": TaskPolicy(min_quality=2, structured=True, latency_budget=15.0),
+    "json_mode": TaskPolicy(min_quality=2, latency_budget=15.0),
+    "repair": TaskPolicy(min_quality=1, latency_budget=8.0, output_tokens=200),
+    "notes_map": TaskPolicy(min_quality=2, structured=True, latency_budget=20.0, output_tokens=600),
+    "notes_reduce": TaskPolicy(min_quality=2, structured=True, latency_budget=30.0, output_tokens=1200),
+    "notes_batch": TaskPolicy(min_quality=2, structured=True, output_tokens=1200),
+    "qna": TaskPolicy(min_quality=3, latency_budget=20.0),
+    "rag_answer": TaskPolicy(min_quality=2, latency_budget=10.0),
+}
+
+
+@dataclass
+class Route:
+    model: str
+    reason: str
+
+
+class ModelRouter:
+    """Chooses a model per request from task needs, prompt size, latency budget and cost."""
+
+    def __init__(self, models=MODELS, tasks=TASKS, metrics=METRICS, min_samples=MIN_SAMPLES):
+        self.models = models
+        self.tasks = tasks
+        self.metrics = metrics
+        self.min_samples = min_samples
+        self.decisions = Counter()  # (task, model, reason) -> count
+        self._lock = threading.Lock()
+
+    def p95(self, model):
+        """Observed p95 completion latency, or the profile's prior with too few calls."""
+        summary = self.metrics.summary(endpoint="/v1/chat/completions", model=model)
+        if summary["calls"] >= self.min_samples:
+            return summary["p95"]
+        return self.models[model].prior_p95
+
+    def cost(self, model, prompt_tokens, output_tokens):
+        profile = self.models[model]
+        return (prompt_tokens * profile.input_cost + output_tokens * profile.output_cost) / 1_000_000
+
+    def choose(self, task, prompt_tokens=0, latency_budget=None, deadline=None):
+        """Route for one request; deadline is a time.monotonic() value."""
+        policy = self.tasks[task]
+        pinned = os.getenv(f"OPENAI_MODEL_{task.upper()}") or os.getenv("OPENAI_MODEL")
+        if pinned:
+            return self._decide(task, Route(pinned, "pinned by environment"))
+
+        budgets = [b for b in (policy.latency_budget, latency_budget) if b is not None]
+        if deadline is not None:
+            budgets.append(deadline - time.monotonic())
+        budget = min(budgets) if budgets else None
+
+        able = [m for m in self.models.values() if m.structured_outputs or not policy.structured]
+        capable = [m for m in able if prompt_tokens + policy.output_tokens <= m.context_window]
+        if not capable:
+            # Too large for every model: the API's own context-length error beats a traceback here
+            largest = max(m.context_window for m in able)
+            widest = [m for m in able if m.context_window == largest]
+            widest = [m for m in widest if m.quality >= policy.min_quality] or widest
+            best = min(widest, key=lambda m: self.cost(m.name, prompt_tokens, policy.output_tokens))
+            return self._decide(task, Route(best.name, "fallback, prompt exceeds every context window"))
+        suitable = [m for m in capable if m.quality >= policy.min_quality] or capable
+
+        in_budget = [m for m in suitable if budget is None or self.p95(m.name) <= budget]
+        if in_budget:
+            best = min(in_budget, key=lambda m: self.cost(m.name, prompt_tokens, policy.output_tokens))
+            return self._decide(task, Route(best.name, "cheapest within budget"))
+
+        # Deadline at risk: the fastest model that still meets the quality bar
+        fastest = min(suitable, key=lambda m: self.p95(m.name))
+        return self._decide(task, Route(fastest.name, "fallback, deadline at risk"))
+
+    def _decide(self, task, route):
+        with self._lock:
+            self.decisions[(task, route.model, route.reason)] += 1
+        return route
+
+    def describe(self):
+        return "\n".join(f"{task}: {model} x{count} ({reason})"
+                         for (task, model, reason), count in sorted(self.decisions.items()))
+
+
+ROUTER = ModelRouter()
+
+
+def estimate_tokens(messages):
+    """Prompt tokens of a chat messages list."""
+    return sum(count_tokens(m["content"] if isinstance(m.get("content"), str) else json.dumps(m.get("content")))
+               for m in messages or [])
+
+
+def route(task, messages=None, latency_budget=None, deadline=None, router=ROUTER):
+    """Model name for a request of this task."""
+    return router.choose(task, estimate_tokens(messages), latency_budget, deadline).model
+
+
+def resolve(model, task, messages=None, **kwargs):
+    """An explicit model name as is; AUTO routed for the task."""
+    return route(task, messages, **kwargs) if model == AUTO else model
@@ -0,0 +1,168 @@
+"""
+Parallel Streaming Uploader
+
+Uploads many documents at once through a bounded worker pool and attaches
+them to a vector store in parallel file batches, overlapping attachment with
+the uploads still in flight.
+
+Files are never read whole: small files are streamed to files.create from an
+open handle, and files above MULTIPART_THRESHOLD go through the multipart
+Uploads API one part-sized read at a time (at most `part_workers` parts in
+memory per file). Everything goes through the upload cache, so unchanged
+files are not re-sent, and identical files in one run (same sha256) are
+uploaded once and share the file.
+"""
+
+import mimetypes
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from upload_cache import UploadCache, sha256_file, upload_cached
+
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+PART_SIZE = 8 * 1024 * 1024  # Uploads API allows up to 64 MB per part
+DEFAULT_WORKERS = 4
+DEFAULT_PART_WORKERS = 4
+DEFAULT_BATCH_SIZE = 100
+
+
+@dataclass
+class UploadReport:
+    """Throughput of one upload pipeline run."""
+    files: int = 0
+    uploaded: int = 0
+    reused: int = 0
+    bytes_sent: int = 0
+    seconds: float = 0.0
+    failures: dict = field(default_factory=dict)  # path -> error
+
+    @property
+    def mb_per_second(self):
+        return self.bytes_sent / (1024 * 1024) / self.seconds if self.seconds else 0.0
+
+    @property
+    def files_per_second(self):
+        return self.files / self.seconds if self.seconds else 0.0
+
+    def describe(self):
+        return (f"{self.files} files ({self.uploaded} uploaded, {self.reused} reused) in {self.seconds:.2f}s — "
+                f"{self.mb_per_second:.2f} MB/s, {self.files_per_second:.1f} files/s")
+
+
+def _read_part(path, index, part_size):
+    with open(path, "rb") as f:
+        f.seek(index * part_size)
+        return f.read(part_size)
+
+
+def multipart_upload(client, path, purpose, part_size=PART_SIZE, part_workers=DEFAULT_PART_WORKERS):
+    """Upload a large file via the Uploads API, reading one part at a time."""
+    path = Path(path)
+    size = path.stat().st_size
+    upload = client.uploads.create(
+        bytes=size,
+        filename=path.name,
+        mime_type=mimetypes.guess_type(path.name)[0] or "application/octet-stream",
+        purpose=purpose,
+    )
+
+    def send_part(index):
+        part = client.uploads.parts.create(upload_id=upload.id, data=_read_part(path, index, part_size))
+        return index, part.id
+
+    num_parts = max(1, -(-size // part_size))
+    part_ids = [None] * num_parts
+    with ThreadPoolExecutor(max_workers=part_workers) as pool:
+        for index, part_id in pool.map(send_part, range(num_parts)):
+            part_ids[index] = part_id
+
+    completed = client.uploads.complete(upload_id=upload.id, part_ids=part_ids)
+    return completed.file
+
+
+def stream_upload(client, path, purpose, threshold=MULTIPART_THRESHOLD):
+    """Upload one file, switching to multipart above `threshold` bytes."""
+    if os.path.getsize(path) > threshold:
+        return multipart_upload(client, path, purpose)
+    with open(path, "rb") as file:
+        return client.files.create(file=file, purpose=purpose)
+
+
+def attach_in_batches(client, vector_store_id, file_ids, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS):
+    """Attach file ids to a vector store as several file batches polled in parallel."""
+    batches = [file_ids[i:i + batch_size] for i in range(0, len(file_ids), batch_size)]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as pool:
+        return list(pool.map(
+            lambda ids: client.vector_stores.file_batches.create_and_poll(
+                vector_store_id=vector_store_id, file_ids=ids
+            ),
+            batches,
+        ))
+
+
+def upload_files_parallel(client, file_paths, purpose="assistants", workers=DEFAULT_WORKERS,
+                          vector_store_id=None, batch_size=DEFAULT_BATCH_SIZE, on_file=None):
+    """Upload files concurrently; optionally attach them to a vector store as they finish.
+
+    Returns (files in input order, UploadReport, file batches).
+    """
+    cache = UploadCache()
+    report = UploadReport()
+    results = {}
+    batch_futures = []
+    pending_ids = []
+    seen_ids = set()  # identical documents share one file id
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Hash first: concurrent copies of one document would all miss the cache
+        digests = {Path(path): pool.submit(sha256_file, path) for path in file_paths}
+        copies = {}  # digest -> paths with those bytes
+        for path, future in digests.items():
+            try:
+                copies.setdefault(future.result(), []).append(path)
+            except OSError as e:
+                report.failures[str(path)] = str(e)
+
+        futures = {
+            pool.submit(upload_cached, client, paths[0], purpose, cache, stream_upload, digest): paths
+            for digest, paths in copies.items()
+        }
+        for future in as_completed(futures):
+            paths = futures[future]
+            try:
+                uploaded_file, uploaded = future.result()
+            except Exception as e:
+                for path in paths:
+                    report.failures[str(path)] = str(e)
+                continue
+
+            for index, path in enumerate(paths):
+                sent = uploaded and index == 0
+                results[path] = uploaded_file
+                report.files += 1
+                if sent:
+                    report.uploaded += 1
+                    report.bytes_sent += path.stat().st_size
+                else:
+                    report.reused += 1
+                if on_file:
+                    on_file(path, uploaded_file, sent)
+
+            if vector_store_id and uploaded_file.id not in seen_ids:
+                seen_ids.add(uploaded_file.id)
+                pending_ids.append(uploaded_file.id)
+                if len(pending_ids) >= batch_size:
+                    batch_futures.append(pool.submit(attach_in_batches, client, vector_store_id, pending_ids, batch_size, 1))
+                    pending_ids = []
+
+        if vector_store_id and pending_ids:
+            batch_futures.append(pool.submit(attach_in_batches, client, vector_store_id, pending_ids, batch_size, 1))
+        file_batches = [batch for future in batch_futures for batch in future.result()]
+
+    report.seconds = time.perf_counter() - start
+    files = [results[Path(p)] for p in file_paths if Path(p) in results]
+    return files, report, file_batches
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Concurrent RAG Query Engine
+
+Fans out file_search queries over AsyncOpenAI with a bounded number of
+in-flight runs and yields each result as soon as its run finishes, so a
+batch takes roughly as long as its slowest query instead of the sum of all.
+Each run is streamed, so its answer, citations and tool calls arrive with
+it instead of needing messages.list / runs.steps.list afterwards.
+
+With a ThreadPool (thread_pool.py) each query runs on a pre-created thread
+and sends its question with the run, so threads.create is off the critical
+path and used threads are deleted in bulk afterwards.
+
+Retrieval is pluggable: the default backend runs each query through the
+assistant's hosted file_search; local_backend() answers from an in-process
+LocalIndex instead (optionally without any model call at all).
+
+Usage: python scripts/rag_engine.py --bench [--queries 40] [--concurrency 10]
+       (benchmarks sequential vs concurrent, and with a thread pool, against the local mock server)
+"""
+
+import asyncio
+import sys
+import time
+
+from resource_ledger import LEDGER, record
+from model_router import AUTO, resolve
+from run_telemetry import execute_run_async
+
+RAG_PROMPT_SUFFIX = (
+    "\n\nPlease provide a comprehensive answer based on the uploaded documents "
+    "and include specific citations."
+)
+RAG_INSTRUCTIONS = (
+    "Use the file_search tool to find relevant information from the uploaded documents. "
+    "Always cite your sources and provide specific references."
+)
+LOCAL_ANSWER_INSTRUCTIONS = (
+    "Answer using only the numbered context passages below. "
+    "Cite passages as [n] and say so if the context does not contain the answer."
+)
+DEFAULT_CONCURRENCY = 5
+DEFAULT_TOP_K = 4
+
+
+async def run_rag_query(client, assistant_id, query, index=0, thread_pool=None):
+    """Run one query on its own thread (leased from thread_pool if given) and return the result record."""
+    if thread_pool is not None:
+        start = time.perf_counter()
+        async with thread_pool.lease() as thread_id:
+            return await _run_on_thread(client, assistant_id, query, index, thread_id, start)
+
+    start = time.perf_counter()
+    thread = await client.beta.threads.create()
+    record("threads", thread.id)
+    return await _run_on_thread(client, assistant_id, query, index, thread.id, start)
+
+
+async def _run_on_thread(client, assistant_id, query, index, thread_id, start):
+    # The question travels with the run, so an empty (pooled) thread needs no extra call;
+    # answer, citations and tool use all come from the run's event stream
+    run = await execute_run_async(
+        client, thread_id, assistant_id,
+        instructions=RAG_INSTRUCTIONS,
+        additional_messages=[{"role": "user", "content": f"{query}{RAG_PROMPT_SUFFIX}"}],
+    )
+
+    result = {"index": index, "query": query, "thread_id": thread_id}
+
+    if run.status != "completed":
+        result["status"] = run.status
+        result["latency"] = time.perf_counter() - start
+        return result
+
+    result.update({
+        "response": run.text,
+        "response_length": len(run.text),
+        "citations": run.citations,
+        "file_search_used": run.file_search_used,
+        "ttft": run.timing.ttft,
+        "latency": time.perf_counter() - start,
+    })
+    return result
+
+
+async def run_local_query(client, local_index, query, index=0, model=AUTO, k=DEFAULT_TOP_K):
+    """Answer one query from the in-process index; model=None returns the passages themselves."""
+    start = time.perf_counter()
+    hits = local_index.search(query, k)
+    retrieval_latency = time.perf_counter() - start
+    context = "\n\n".join(f"[{n}] ({chunk.source}) {chunk.text}" for n, (_, chunk) in enumerate(hits, 1))
+
+    if model is None:
+        answer = context
+    else:
+        messages = [
+            {"role": "system", "content": f"{LOCAL_ANSWER_INSTRUCTIONS}\n\n{context}"},
+            {"role": "user", "content": query},
+        ]
+        response = await client.chat.completions.create(model=resolve(model, "rag_answer", messages),
+                                                        messages=messages)
+        answer = response.choices[0].message.content
+
+    return {
+        "index": index,
+        "query": query,
+        "backend": "local",
+        "response": answer,
+        "response_length": len(answer),
+        "citations": list(dict.fromkeys(chunk.source for _, chunk in hits)),
+        "file_search_used": False,
+        "retrieval_latency": retrieval_latency,
+        "latency": time.perf_counter() - start,
+    }
+
+
+def local_backend(client, local_index, model=AUTO, k=DEFAULT_TOP_K):
+    """Query function for iter_rag_queries that retrieves from a LocalIndex."""
+    async def query_fn(query, index):
+        return await run_local_query(client, local_index, query, index, model, k)
+    return query_fn
+
+
+async def iter_rag_queries(client, assistant_id, queries, concurrency=DEFAULT_CONCURRENCY, backend=None,
+                           thread_pool=None):
+    """Yield query results in completion order with at most `concurrency` queries in flight.
+
+    backend is an async (query, index) -> result callable; by default each
+    query is an assistant run with hosted file_search.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    query_fn = backend or (lambda query, index: run_rag_query(client, assistant_id, query, index, thread_pool))
+
+    async def bounded(index, query):
+        async with semaphore:
+            try:
+                return await query_fn(query, index)
+            except Exception as e:
+                return {"index": index, "query": query, "status": "error", "error": str(e)}
+
+    tasks = [asyncio.create_task(bounded(i, q)) for i, q in enumerate(queries, 1)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def run_rag_queries(client, assistant_id, queries, concurrency=DEFAULT_CONCURRENCY, on_result=None,
+                          backend=None, thread_pool=None):
+    """Run all queries concurrently; return (results in query order, wall-clock seconds)."""
+    start = time.perf_counter()
+    results = []
+    async for result in iter_rag_queries(client, assistant_id, queries, concurrency, backend, thread_pool):
+        if on_result:
+            on_result(result)
+        results.append(result)
+    wall_time = time.perf_counter() - start
+    return sorted(results, key=lambda r: r["index"]), wall_time
+
+
+def summarize_batch(results, wall_time):
+    """Return wall time next to the serial cost the same batch would have had."""
+    latencies = [r["latency"] for r in results if "latency" in r]
+    return {
+        "queries": len(results),
+        "wall_time": wall_time,
+        "sum_latency": sum(latencies),
+        "max_latency": max(latencies, default=0.0),
+        "speedup": (sum(latencies) / wall_time) if wall_time else 0.0,
+    }
+
+
+async def _benchmark(base_url, num_queries, concurrency):
+    from openai import AsyncOpenAI
+    from thread_pool import ThreadPolicy, ThreadPool
+
+    client = AsyncOpenAI(api_key="sk-mock", base_url=base_url)
+    queries = [f"Mock question #{i}" for i in range(1, num_queries + 1)]
+
+    for label, limit, pooled in [("sequential", 1, False), ("concurrent", concurrency, False),
+                                 ("pooled", concurrency, True)]:
+        pool = ThreadPool(client, ThreadPolicy(warm_size=concurrency, expected_leases=num_queries)) if pooled else None
+        if pool:
+            pool.start()
+            await asyncio.sleep(0.5)  # let the warm set fill, as it would between user queries
+        results, wall_time = await run_rag_queries(client, "asst_mock", queries, limit, thread_pool=pool)
+        summary = summarize_batch(results, wall_time)
+        print(f"{label:>10} (limit={limit:>3}): {summary['wall_time']:6.2f}s wall, "
+              f"slowest query {summary['max_latency']:.2f}s, "
+              f"serial cost {summary['sum_latency']:.2f}s, speedup {summary['speedup']:.1f}x")
+        if pool:
+            await pool.close()
+            print(f"{'':>10}  🧵 {pool.stats.describe()}")
+
+    await client.close()
+
+
+def main():
+    """Benchmark the engine offline against the mock server."""
+    if "--bench" not in sys.argv:
+        print(__doc__)
+        return
+
+    from mock_openai_server import MockConfig, start_mock_server
+
+    num_queries = 40
+    concurrency = 10
+    if "--queries" in sys.argv:
+        num_queries = int(sys.argv[sys.argv.index("--queries") + 1])
+    if "--concurrency" in sys.argv:
+        concurrency = int(sys.argv[sys.argv.index("--concurrency") + 1])
+
+    print("🚀 RAG Query Engine - Offline Benchmark")
+    print("=" * 50)
+
+    LEDGER.enabled = False  # mock ids must not end up in the cleanup ledger
+    server, base_url = start_mock_server(MockConfig(run_seconds=0.5, run_jitter=0.2))
+    print(f"🧪 Mock server: {base_url}")
+    print(f"📝 {num_queries} queries\n")
+    try:
+        asyncio.run(_benchmark(base_url, num_queries, concurrency))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+"""
+Client-Side Rate Limiter
+
+Keeps every script under its per-model requests-per-minute (RPM) and
+tokens-per-minute (TPM) budgets instead of running into 429s:
+    - one token bucket for requests and one for tokens per model, shared by
+      every client in the process
+    - waiting requests are served by priority (interactive before normal
+      before batch), first come first served within a priority
+    - the x-ratelimit-* response headers re-tune the buckets to what the
+      server actually allows and has left
+    - 429s are retried with jittered exponential backoff, honouring
+      Retry-After; a rejected request was never processed, so this is safe
+      for any method. 5xx errors are left to the SDK's own max_retries, so
+      the two retry loops do not multiply
+Request bodies are never buffered here: uploads stream straight through,
+and a streaming upload that gets a 429 is handed back to the SDK to retry.
+The token estimate taken before sending is corrected from the usage the
+response reports, once its body has been read.
+
+Async clients wait on the event loop (no worker thread per waiting
+request), and a cancelled request gives up its place without spending
+any budget.
+
+It is installed as an httpx transport by lab_client, so every call made
+through get_client()/get_async_client() is scheduled without code changes.
+Use `with request_priority(PRIORITY_BATCH):` around bulk work.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from sdk_httpx import httpx
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BATCH = 2
+
+MAX_RETRIES = 6
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 60.0
+RETRY_STATUSES = {429}
+DEFAULT_COMPLETION_TOKENS = 512  # assumed output when max_tokens is not set
+CHARS_PER_TOKEN = 4
+ASYNC_POLL_SECONDS = 0.05  # how often async waiters re-check a queue they are not at the head of
+
+
+@dataclass
+class ModelLimits:
+    rpm: int
+    tpm: int
+
+
+# Conservative starting points; response headers replace them after the first call
+DEFAULT_LIMITS = {
+    "gpt-4-turbo": ModelLimits(rpm=500, tpm=30_000),
+    "gpt-4o-mini": ModelLimits(rpm=500, tpm=200_000),
+    "gpt-3.5-turbo": ModelLimits(rpm=500, tpm=200_000),
+}
+FALLBACK_LIMITS = ModelLimits(rpm=500, tpm=30_000)
+DEFAULT_BUDGET = "default"  # threads, runs, files, ... (no model in the body)
+
+_priority = contextvars.ContextVar("request_priority", default=PRIORITY_NORMAL)
+
+
+@contextmanager
+def request_priority(priority):
+    """Schedule requests made inside this block at the given priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def parse_reset(value):
+    """Seconds from a reset header such as '1s', '6m0s', '20ms' or '0.5'."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+    return sum(float(n) * units[u] for n, u in parts) if parts else None
+
+
+class TokenBucket:
+    """Capacity refilled continuously over one minute."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` is available (0 if it is now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # a request larger than the budget waits for a full bucket
+        return 0.0 if self.available >= amount else (amount - self.available) * 60 / self.capacity
+
+    def take(self, amount):
+        self.available -= amount
+
+    def sync(self, limit, remaining, now):
+        """Adopt the server's view of the budget."""
+        self._refill(now)
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self.available = min(self.available, float(remaining))
+
+
+class ModelBudget:
+    def __init__(self, limits):
+        self.requests = TokenBucket(limits.rpm)
+        self.tokens = TokenBucket(limits.tpm)
+        self.paused_until = 0.0
+
+    def wait_time(self, tokens, now):
+        return max(self.paused_until - now, self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+
+
+class RateLimiter:
+    """Per-model RPM/TPM budgets with a priority queue of waiting requests."""
+
+    def __init__(self, limits=None):
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.budgets = {}
+        self.waiting = {}  # model -> heap of (priority, seq)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.stats = {"requests": 0, "waited_seconds": 0.0, "retries": 0, "rate_limited": 0}
+
+    def _budget(self, model):
+        if model not in self.budgets:
+            self.budgets[model] = ModelBudget(self.limits.get(model, FALLBACK_LIMITS))
+        return self.budgets[model]
+
+    def acquire(self, model, tokens, priority=None):
+        """Block until this request may be sent; returns seconds spent waiting."""
+        priority = _priority.get() if priority is None else priority
+        start = time.monotonic()
+        with self._cond:
+            budget = self._budget(model)
+            ticket = (priority, next(self._seq))
+            heap = self.waiting.setdefault(model, [])
+            heapq.heappush(heap, ticket)
+            try:
+                while True:
+                    wait = budget.wait_time(tokens, time.monotonic())
+                    if heap[0] == ticket and wait <= 0:
+                        break
+                    # Only the head of the queue needs to wake up on a timer
+                    self._cond.wait(timeout=wait if heap[0] == ticket else None)
+                heapq.heappop(heap)
+                budget.requests.take(1)
+                budget.tokens.take(tokens)
+                self.stats["requests"] += 1
+                self.stats["waited_seconds"] += time.monotonic() - start
+            finally:
+                if ticket in heap:
+                    heap.remove(ticket)
+                    heapq.heapify(heap)
+                self._cond.notify_all()
+        return time.monotonic() - start
+
+    async def acquire_async(self, model, tokens, priority=None):
+        """acquire() for coroutines: sleeps on the event loop, and leaves the queue if cancelled."""
+        priority = _priority.get() if priority is None else priority
+        start = time.monotonic()
+        with self._cond:
+            budget = self._budget(model)
+            ticket = (priority, next(self._seq))
+            heap = self.waiting.setdefault(model, [])
+            heapq.heappush(heap, ticket)
+        try:
+            while True:
+                with self._cond:
+                    wait = budget.wait_time(tokens, time.monotonic())
+                    if heap[0] == ticket and wait <= 0:
+                        heapq.heappop(heap)
+                        budget.requests.take(1)
+                        budget.tokens.take(tokens)
+                        self.stats["requests"] += 1
+                        self.stats["waited_seconds"] += time.monotonic() - start
+                        break
+                # Threads waiting on the condition wake this loop only through the poll
+                await asyncio.sleep(min(wait, ASYNC_POLL_SECONDS) if heap[0] == ticket else ASYNC_POLL_SECONDS)
+        finally:
+            with self._cond:
+                if ticket in heap:
+                    heap.remove(ticket)
+                    heapq.heapify(heap)
+                self._cond.notify_all()
+        return time.monotonic() - start
+
+    def settle(self, model, estimated, used):
+        """Correct a request's token estimate to what its response reports it used."""
+        with self._cond:
+            bucket = self._budget(model).tokens
+            bucket.sync(None, None, time.monotonic())
+            bucket.available = min(bucket.capacity, bucket.available + estimated - used)
+            self._cond.notify_all()
+
+    def observe(self, model, response, attempt=0):
+        """Re-tune the model's budget from the rate-limit response headers."""
+        headers = response.headers
+        now = time.monotonic()
+
+        def number(name):
+            value = headers.get(name)
+            try:
+                return float(value) if value is not None else None
+            except ValueError:
+                return None
+
+        with self._cond:
+            budget = self._budget(model)
+            budget.requests.sync(number("x-ratelimit-limit-requests"), number("x-ratelimit-remaining-requests"), now)
+            budget.tokens.sync(number("x-ratelimit-limit-tokens"), number("x-ratelimit-remaining-tokens"), now)
+            if response.status_code == 429:
+                self.stats["rate_limited"] += 1
+                # Everyone waiting on this model backs off, not just this request
+                budget.paused_until = max(budget.paused_until, now + retry_delay(response, attempt))
+            self._cond.notify_all()
+
+
+def retry_delay(response, attempt):
+    """Retry-After / reset headers if present, otherwise jittered exponential backoff."""
+    for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        seconds = parse_reset(response.headers.get(name))
+        if seconds:
+            return min(seconds, RETRY_MAX_SECONDS)
+    delay = min(RETRY_BASE_SECONDS * 2 ** attempt, RETRY_MAX_SECONDS)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def estimate_request(request):
+    """(model, estimated tokens) for an API request; requests without a model share one budget."""
+    # Uploads are multipart and may still be streaming: never read them here
+    if not request.headers.get("content-type", "").startswith("application/json"):
+        return DEFAULT_BUDGET, 0
+    try:
+        body = json.loads(request.content) if request.content else {}
+    except (httpx.RequestNotRead, ValueError, UnicodeDecodeError):
+        body = {}
+    if not isinstance(body, dict) or not body.get("model"):
+        return DEFAULT_BUDGET, 0
+    model = body["model"]
+    prompt_chars = len(json.dumps(body.get("messages") or body.get("input") or ""))
+    completion = body.get("max_completion_tokens") or body.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    return model, prompt_chars // CHARS_PER_TOKEN + completion
+
+
+def parse_usage(body):
+    """(prompt, completion) tokens from the usage of a JSON response body; (0, 0) without one."""
+    try:
+        usage = json.loads(body).get("usage") or {}
+    except (ValueError, AttributeError):
+        return 0, 0
+    prompt = usage.get("prompt_tokens", usage.get("input_tokens", 0)) or 0
+    completion = usage.get("completion_tokens", usage.get("output_tokens", 0)) or 0
+    return prompt, completion
+
+
+def _replayable(request):
+    """Whether the body is in memory, so the request can be sent again."""
+    try:
+        request.content
+    except httpx.RequestNotRead:
+        return False
+    return True
+
+
+LIMITER = RateLimiter()
+
+
+class _Settlement:
+    """Hands a response's reported usage back to the limiter once its body is read."""
+
+    def __init__(self, limiter, model, tokens):
+        self.limiter = limiter
+        self.model = model
+        self.tokens = tokens
+        self.chunks = []
+        self.done = False
+
+    def finish(self):
+        if self.done:
+            return
+        self.done = True
+        prompt, completion = parse_usage(b"".join(self.chunks))
+        if prompt or completion:
+            self.limiter.settle(self.model, self.tokens, prompt + completion)
+
+
+class _SettlingStream(httpx.SyncByteStream):
+    def __init__(self, stream, settlement):
+        self.stream = stream
+        self.settlement = settlement
+
+    def __iter__(self):
+        for data in self.stream:
+            self.settlement.chunks.append(data)
+            yield data
+
+    def close(self):
+        try:
+            self.stream.close()
+        finally:
+            self.settlement.finish()
+
+
+class _AsyncSettlingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, settlement):
+        self.stream = stream
+        self.settlement = settlement
+
+    async def __aiter__(self):
+        async for data in self.stream:
+            self.settlement.chunks.append(data)
+            yield data
+
+    async def aclose(self):
+        try:
+            await self.stream.aclose()
+        finally:
+            self.settlement.finish()
+
+
+def _settled(response, limiter, model, tokens, stream_class):
+    """The response, with a JSON body's usage settled against the estimate once it is read."""
+    if model == DEFAULT_BUDGET or not response.headers.get("content-type", "").startswith("application/json"):
+        return response
+    return httpx.Response(
+        status_code=response.status_code,
+        headers=response.headers,
+        stream=stream_class(response.stream, _Settlement(limiter, model, tokens)),
+        extensions=response.extensions,
+    )
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """httpx transport that schedules requests through a RateLimiter and retries 429s."""
+
+    def __init__(self, transport, limiter=LIMITER, max_retries=MAX_RETRIES):
+        self.transport = transport
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    def handle_request(self, request):
+        model, tokens = estimate_request(request)
+        replayable = _replayable(request)
+        queued = 0.0
+        for attempt in range(self.max_retries + 1):
+            queued += self.limiter.acquire(model, tokens)
+            response = self.transport.handle_request(request)
+            self.limiter.observe(model, response, attempt)
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries or not replayable:
+                # Picked up by api_metrics
+                response.extensions.update(queue_seconds=queued, retries=attempt)
+                return _settled(response, self.limiter, model, tokens, _SettlingStream)
+            response.close()
+            self.limiter.stats["retries"] += 1
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Async variant; waits for the shared limiter on the event loop."""
+
+    def __init__(self, transport, limiter=LIMITER, max_retries=MAX_RETRIES):
+        self.transport = transport
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    async def handle_async_request(self, request):
+        model, tokens = estimate_request(request)
+        replayable = _replayable(request)
+        queued = 0.0
+        for attempt in range(self.max_retries + 1):
+            queued += await self.limiter.acquire_async(model, tokens)
+            response = await self.transport.handle_async_request(request)
+            self.limiter.observe(model, response, attempt)
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries or not replayable:
+                response.extensions.update(queue_seconds=queued, retries=attempt)
+                return _settled(response, self.limiter, model, tokens, _AsyncSettlingStream)
+            await response.aclose()
+            self.limiter.stats["retries"] += 1
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
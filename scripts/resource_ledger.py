@@ -0,0 +1,110 @@
+"""
+Local Resource Ledger
+
+Every lab script appends the remote resources it creates (threads, files,
+vector stores, runs) to .resource_ledger.jsonl, one JSON line per event.
+Deletions are appended as tombstones, so the file is only ever appended to
+and a crash mid-write loses at most one line.
+
+99_cleanup.py replays the ledger to find exactly what the labs created and
+deletes that, instead of listing the whole account: cleanup cost grows with
+what was created, not with the size of the account.
+
+Runs cannot be deleted on their own; they are tracked for usage reporting
+and disappear from the ledger together with their thread.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+LEDGER_FILE = ".resource_ledger.jsonl"
+RESOURCE_KINDS = ("threads", "files", "vector_stores", "runs")
+
+
+class ResourceLedger:
+    """Append-only JSONL log of created and deleted resources."""
+
+    def __init__(self, path=LEDGER_FILE):
+        self.path = Path(path)
+        self.enabled = True  # offline benchmarks against the mock server turn this off
+        self._lock = threading.Lock()  # shared by parallel upload/query workers
+
+    def _append(self, entries):
+        if not self.enabled or not entries:
+            return
+        lines = "".join(json.dumps(entry) + "\n" for entry in entries)
+        # No fsync: records are written from inside the async labs, and a
+        # best-effort ledger is not worth blocking the event loop on a disk flush
+        with self._lock, open(self.path, "a") as f:
+            f.write(lines)
+
+    def record(self, kind, resource_id, **extra):
+        """Remember a resource this lab created."""
+        self._append([{"op": "create", "kind": kind, "id": resource_id, "created_at": time.time(), **extra}])
+
+    def record_deleted(self, kind, resource_ids):
+        """Tombstone resources that have been deleted."""
+        now = time.time()
+        self._append([{"op": "delete", "kind": kind, "id": rid, "deleted_at": now} for rid in resource_ids])
+
+    def entries(self):
+        if not self.path.exists():
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from an interrupted write
+
+    def live(self, kinds=RESOURCE_KINDS, max_age_hours=None):
+        """Replay the ledger: {kind: [entry]} for resources not yet deleted."""
+        created, deleted = {}, set()
+        for entry in self.entries():
+            key = (entry["kind"], entry["id"])
+            if entry["op"] == "create":
+                created[key] = entry
+            else:
+                deleted.add(key)
+
+        cutoff = time.time() - max_age_hours * 3600 if max_age_hours is not None else None
+        live = {kind: [] for kind in kinds}
+        for key, entry in created.items():
+            if key in deleted or entry["kind"] not in live:
+                continue
+            # A run goes away with its thread
+            if entry["kind"] == "runs" and ("threads", entry.get("thread_id")) in deleted:
+                continue
+            if cutoff is not None and entry["created_at"] > cutoff:
+                continue
+            live[entry["kind"]].append(entry)
+        return live
+
+    def counts(self):
+        return {kind: len(entries) for kind, entries in self.live().items()}
+
+    def compact(self):
+        """Rewrite the ledger with only live resources (drops tombstones)."""
+        # One lock for snapshot and rewrite, so a concurrent record is not lost
+        with self._lock:
+            live = self.live()
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                for entries in live.values():
+                    for entry in entries:
+                        f.write(json.dumps(entry) + "\n")
+            tmp.replace(self.path)
+
+
+LEDGER = ResourceLedger()
+
+
+def record(kind, resource_id, **extra):
+    """Append a created resource to the default ledger."""
+    LEDGER.record(kind, resource_id, **extra)
+
+
+def record_deleted(kind, resource_ids):
+    LEDGER.record_deleted(kind, resource_ids)
@@ -0,0 +1,182 @@
+"""
+Semantic Response Cache
+
+Caches model answers so repeated questions in the QnA and RAG labs are not
+sent to the model again. Entries are keyed on the normalised prompt, the
+model and a fingerprint of the retrieval context (vector store, local index
+contents, ...), so the same question against different documents never
+shares an answer.
+
+Lookups go through two layers:
+    1. exact match on the normalised key
+    2. optional embedding similarity within the same model/context, for
+       near-identical phrasings (pass an embedder to enable)
+
+Entries expire after `ttl_seconds`, the least recently used ones are evicted
+above `max_entries`, and everything is persisted in .response_cache.sqlite.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+CACHE_FILE = ".response_cache.sqlite"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_SIMILARITY = 0.85  # near-identical phrasings under HashingEmbedder
+
+
+def normalize_prompt(prompt):
+    """Case-fold, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", prompt.strip().lower()).rstrip("?!. ")
+
+
+def context_fingerprint(*parts):
+    """Stable short hash of whatever identifies the retrieval context."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters and the model latency the hits avoided."""
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    latency_saved: float = 0.0
+
+    @property
+    def lookups(self):
+        return self.exact_hits + self.semantic_hits + self.misses
+
+    @property
+    def hit_rate(self):
+        return (self.exact_hits + self.semantic_hits) / self.lookups if self.lookups else 0.0
+
+    def describe(self):
+        return (f"{self.hit_rate:.0%} hit rate ({self.exact_hits} exact, {self.semantic_hits} semantic, "
+                f"{self.misses} misses), {self.latency_saved:.2f}s of model latency saved")
+
+
+class ResponseCache:
+    """SQLite-backed response cache with exact and similarity lookup."""
+
+    def __init__(self, path=CACHE_FILE, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES,
+                 embedder=None, similarity=DEFAULT_SIMILARITY):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.embedder = embedder
+        self.similarity = similarity
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                response TEXT NOT NULL,
+                embedding BLOB,
+                latency REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_namespace ON responses (namespace)")
+        self._db.commit()
+
+    @staticmethod
+    def _namespace(model, context):
+        return f"{model}|{context or ''}"
+
+    def _key(self, prompt, model, context):
+        return hashlib.sha256(f"{self._namespace(model, context)}|{normalize_prompt(prompt)}".encode()).hexdigest()
+
+    def get(self, prompt, model, context=None):
+        """Return the cached response or None, updating hit statistics."""
+        now = time.time()
+        oldest = now - self.ttl_seconds
+        key = self._key(prompt, model, context)
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT key, response, latency FROM responses WHERE key = ? AND created_at >= ?",
+                (key, oldest),
+            ).fetchone()
+            if row:
+                self.stats.exact_hits += 1
+            elif self.embedder is not None:
+                row = self._nearest(prompt, self._namespace(model, context), oldest)
+                if row:
+                    self.stats.semantic_hits += 1
+
+            if not row:
+                self.stats.misses += 1
+                return None
+
+            self.stats.latency_saved += row[2]
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, row[0]))
+            self._db.commit()
+        return json.loads(row[1])
+
+    def _nearest(self, prompt, namespace, oldest):
+        rows = self._db.execute(
+            "SELECT key, response, latency, embedding FROM responses "
+            "WHERE namespace = ? AND created_at >= ? AND embedding IS NOT NULL",
+            (namespace, oldest),
+        ).fetchall()
+        if not rows:
+            return None
+        query = self.embedder.embed([normalize_prompt(prompt)])[0].astype(np.float32)
+        matrix = np.stack([np.frombuffer(r[3], dtype=np.float32) for r in rows])
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        return rows[best][:3] if scores[best] >= self.similarity else None
+
+    def put(self, prompt, model, response, latency, context=None):
+        """Store a JSON-serialisable response and the latency it took to produce."""
+        now = time.time()
+        embedding = None
+        if self.embedder is not None:
+            embedding = self.embedder.embed([normalize_prompt(prompt)])[0].astype(np.float32).tobytes()
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(prompt, model, context), self._namespace(model, context), prompt,
+                 json.dumps(response), embedding, latency, now, now),
+            )
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now):
+        self._db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._db.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def close(self):
+        self._db.close()
+
+
+def cached_backend(query_fn, cache, model, context=None):
+    """Wrap an async (query, index) -> result backend so repeated queries skip the model."""
+    async def query_with_cache(query, index):
+        start = time.perf_counter()
+        cached = cache.get(query, model, context)
+        if cached is not None:
+            return {**cached, "index": index, "query": query, "cached": True,
+                    "latency": time.perf_counter() - start}
+
+        result = await query_fn(query, index)
+        if "response" in result:
+            cache.put(query, model, result, result["latency"], context)
+        return result
+    return query_with_cache
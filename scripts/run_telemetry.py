@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Single-Pass Run Telemetry
+
+Runs an assistant in streaming mode and assembles everything the labs used
+to fetch afterwards from the one event stream as it arrives:
+    - the final assistant message: text, annotations and citations
+      (instead of messages.list)
+    - the completed run steps and their tool calls, e.g. whether
+      file_search ran (instead of runs.steps.list)
+    - the terminal run with its status and usage
+    - stream timing (time to first token, gaps, tokens/s)
+
+That saves two or more round trips per query compared with create_and_poll
+followed by the list calls.
+
+    result = execute_run(client, thread_id, assistant_id)
+    print(result.text, result.citations, result.file_search_used, result.usage)
+"""
+
+import time
+from dataclasses import dataclass, field
+
+from resource_ledger import record
+from run_waiter import TERMINAL_EVENTS, PollStats, StreamTiming
+
+
+@dataclass
+class RunResult:
+    """What one streamed run produced."""
+    run: object = None              # terminal run (status, usage, ...)
+    message_id: str = None
+    text: str = ""
+    annotations: list = field(default_factory=list)
+    steps: list = field(default_factory=list)       # completed run steps
+    timing: StreamTiming = None
+    elapsed: float = 0.0
+
+    @property
+    def status(self):
+        return self.run.status if self.run is not None else "unknown"
+
+    @property
+    def usage(self):
+        return getattr(self.run, "usage", None)
+
+    @property
+    def tool_calls(self):
+        return [call for step in self.steps if step.type == "tool_calls"
+                for call in step.step_details.tool_calls]
+
+    @property
+    def file_search_used(self):
+        return any(call.type == "file_search" for call in self.tool_calls)
+
+    @property
+    def citations(self):
+        return [a.file_citation.file_id for a in self.annotations if getattr(a, "file_citation", None)]
+
+    @property
+    def stats(self):
+        """PollStats for code that reports waits uniformly."""
+        return PollStats(mode="stream", elapsed=self.elapsed, timing=self.timing)
+
+
+class RunCollector:
+    """Builds a RunResult from run stream events, one event at a time."""
+
+    def __init__(self, thread_id, start=None):
+        self.thread_id = thread_id
+        self.start = start if start is not None else time.perf_counter()
+        self.result = RunResult(timing=StreamTiming(self.start))
+        self._deltas = {}  # message id -> text received so far
+
+    def feed(self, event):
+        result = self.result
+        result.timing.delta(event)
+        kind, data = event.event, event.data
+        if kind == "thread.run.created":
+            record("runs", data.id, thread_id=self.thread_id)
+        elif kind == "thread.message.delta":
+            for block in data.delta.content or []:
+                if getattr(block, "text", None) and block.text.value:
+                    self._deltas[data.id] = self._deltas.get(data.id, "") + block.text.value
+        elif kind == "thread.message.completed":
+            # The completed message is authoritative: full text and final annotations
+            for block in data.content:
+                if block.type == "text":
+                    result.message_id = data.id
+                    result.text = block.text.value
+                    result.annotations = list(block.text.annotations or [])
+        elif kind == "thread.run.step.completed":
+            result.steps.append(data)
+        elif kind in TERMINAL_EVENTS:
+            result.run = data
+            result.elapsed = time.perf_counter() - self.start
+            if not result.message_id and self._deltas:
+                # Stream ended without message.completed (e.g. incomplete run)
+                result.message_id, result.text = list(self._deltas.items())[-1]
+
+
+def execute_run(client, thread_id, assistant_id, on_event=None, **run_kwargs):
+    """Stream a run to completion and return its RunResult."""
+    collector = RunCollector(thread_id)
+    stream = client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id, stream=True,
+                                             **run_kwargs)
+    for event in stream:
+        collector.feed(event)
+        if on_event:
+            on_event(event)
+    return collector.result
+
+
+async def execute_run_async(client, thread_id, assistant_id, on_event=None, **run_kwargs):
+    """execute_run for an AsyncOpenAI client."""
+    collector = RunCollector(thread_id)
+    stream = await client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id, stream=True,
+                                                   **run_kwargs)
+    async for event in stream:
+        collector.feed(event)
+        if on_event:
+            on_event(event)
+    return collector.result
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Adaptive Run Waiter
+
+Waits for an Assistants run to finish using exponential backoff with jitter
+and a deadline, instead of a fixed one-second sleep loop. The first poll is
+pushed out to the shortest recently observed run duration (nothing to see
+before then), after which polls start at 250ms and back off, so short runs
+are noticed sooner and long runs are polled less and less often.
+Optionally the run can be created in streaming mode so completion arrives as
+an event and no polling is needed at all.
+
+Every wait returns PollStats: how many retrieve calls were made and how much
+latency polling added on top of the run itself. Streamed runs also carry a
+StreamTiming: time to first token, the gaps between text deltas, tokens per
+second and the total stream duration.
+
+Usage: python scripts/run_waiter.py --bench [--runs 6]
+       (compares the fixed 1s loop with backoff against the local mock server)
+"""
+
+import random
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from api_metrics import percentile
+from resource_ledger import LEDGER, record
+
+ACTIVE_STATUSES = ("queued", "in_progress", "cancelling")
+TERMINAL_EVENTS = {
+    "thread.run.completed",
+    "thread.run.failed",
+    "thread.run.cancelled",
+    "thread.run.expired",
+    "thread.run.incomplete",
+    "thread.run.requires_action",
+}
+
+
+@dataclass
+class BackoffPolicy:
+    """Exponential backoff with equal jitter, capped at max_interval."""
+    initial_interval: float = 0.25
+    multiplier: float = 1.4
+    max_interval: float = 2.0
+    jitter: float = 0.5  # fraction of each interval that is randomised
+    deadline: float = 600.0  # seconds before giving up on the run
+
+    def intervals(self):
+        """Yield successive sleep durations."""
+        interval = self.initial_interval
+        while True:
+            yield interval * (1 - self.jitter) + random.uniform(0, interval * self.jitter)
+            interval = min(interval * self.multiplier, self.max_interval)
+
+
+FIXED_ONE_SECOND = BackoffPolicy(initial_interval=1.0, multiplier=1.0, max_interval=1.0, jitter=0.0)
+
+
+class DurationHistory:
+    """Recent run durations; a low quantile of them is a safe first sleep."""
+
+    def __init__(self, size=50, quantile=0.1, min_samples=3):
+        self.samples = deque(maxlen=size)
+        self.quantile = quantile
+        self.min_samples = min_samples
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    def warm_start(self):
+        """Seconds a new run is almost certainly still busy for (0 until enough samples)."""
+        if len(self.samples) < self.min_samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[int(self.quantile * (len(ordered) - 1))]
+
+
+RUN_DURATIONS = DurationHistory()
+
+
+class StreamTiming:
+    """Arrival times of the text deltas of one streamed run."""
+
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.delta_times = []
+        self.completion_tokens = None  # from the run's usage, when reported
+        self.end = None
+
+    def delta(self, event):
+        """Feed every stream event; only text deltas are timed."""
+        if event.event == "thread.message.delta" and _delta_text(event):
+            self.delta_times.append(time.perf_counter())
+        elif event.event in TERMINAL_EVENTS:
+            self.end = time.perf_counter()
+            usage = getattr(event.data, "usage", None)
+            if usage:
+                self.completion_tokens = usage.completion_tokens
+
+    @property
+    def ttft(self):
+        """Seconds from creating the run to the first text delta (None if no text)."""
+        return self.delta_times[0] - self.start if self.delta_times else None
+
+    @property
+    def gaps(self):
+        return [b - a for a, b in zip(self.delta_times, self.delta_times[1:])]
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    @property
+    def tokens_per_second(self):
+        """Output rate once text started flowing; deltas stand in for tokens without usage."""
+        if len(self.delta_times) < 2:
+            return 0.0
+        tokens = self.completion_tokens or len(self.delta_times)
+        return tokens / ((self.end or self.delta_times[-1]) - self.delta_times[0])
+
+    def describe(self):
+        if self.ttft is None:
+            return f"no text streamed, {self.duration:.2f}s total"
+        gaps = self.gaps
+        return (f"first token {self.ttft:.2f}s, gaps p50 {percentile(gaps, 50) * 1000:.0f}ms / "
+                f"p95 {percentile(gaps, 95) * 1000:.0f}ms, {self.tokens_per_second:.1f} tokens/s, "
+                f"{self.duration:.2f}s total")
+
+
+def _delta_text(event):
+    """Text carried by a thread.message.delta event."""
+    return "".join(block.text.value for block in (event.data.delta.content or [])
+                   if getattr(block, "text", None) and block.text.value)
+
+
+@dataclass
+class PollStats:
+    """What it cost to find out a run had finished."""
+    mode: str = "poll"
+    polls: int = 0
+    elapsed: float = 0.0
+    added_latency: float = 0.0  # expected: half the gap between last active and first finished observation
+    timed_out: bool = False
+    timing: StreamTiming = None  # streamed runs only
+
+    def describe(self):
+        if self.mode == "stream":
+            return f"streamed in {self.elapsed:.2f}s (0 polls)"
+        suffix = " ⏰ deadline hit" if self.timed_out else ""
+        return (f"{self.polls} polls over {self.elapsed:.2f}s, "
+                f"~{self.added_latency:.2f}s added by polling{suffix}")
+
+
+def wait_for_run(client, thread_id, run, policy=None, on_status=None, history=RUN_DURATIONS):
+    """Poll a just-created run with backoff until it leaves the active states.
+
+    Returns (run, PollStats). Stops on requires_action like the original loop,
+    and on the policy deadline with stats.timed_out set. Pass history=None to
+    disable the warm start.
+    """
+    policy = policy or BackoffPolicy()
+    stats = PollStats()
+    start = time.perf_counter()
+    last_active_seen = start
+
+    intervals = policy.intervals()
+    warm_start = history.warm_start() if history else 0.0
+    if warm_start:
+        intervals = _prepend(warm_start, intervals)
+
+    for interval in intervals:
+        if run.status not in ACTIVE_STATUSES:
+            break
+        if time.perf_counter() - start + interval > policy.deadline:
+            stats.timed_out = True
+            break
+
+        time.sleep(interval)
+        run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
+        stats.polls += 1
+        if on_status:
+            on_status(run)
+
+        if run.status in ACTIVE_STATUSES:
+            last_active_seen = time.perf_counter()
+        else:
+            # The run finished somewhere inside this window; on average halfway
+            stats.added_latency = (time.perf_counter() - last_active_seen) / 2
+
+    stats.elapsed = time.perf_counter() - start
+    if history and not stats.timed_out:
+        history.record(last_active_seen - start)
+    return run, stats
+
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+
+def stream_run(client, thread_id, assistant_id, on_event=None, on_status=None, **run_kwargs):
+    """Create a run in streaming mode and return (run, PollStats) from its terminal event.
+
+    on_status gets the run from every run status event, as it does between polls.
+    """
+    stats = PollStats(mode="stream")
+    start = time.perf_counter()
+    stats.timing = StreamTiming(start)
+    run = None
+
+    stream = client.beta.threads.runs.create(
+        thread_id=thread_id,
+        assistant_id=assistant_id,
+        stream=True,
+        **run_kwargs,
+    )
+    for event in stream:
+        stats.timing.delta(event)
+        if on_event:
+            on_event(event)
+        if event.event == "thread.run.created":
+            record("runs", event.data.id, thread_id=thread_id)
+        if on_status and _is_run_status(event):
+            on_status(event.data)
+        if event.event in TERMINAL_EVENTS:
+            run = event.data
+
+    stats.elapsed = time.perf_counter() - start
+    return run, stats
+
+
+def _is_run_status(event):
+    """thread.run.* events carry the run; thread.run.step.* carry a step."""
+    return event.event.startswith("thread.run.") and not event.event.startswith("thread.run.step.")
+
+
+def create_and_wait(client, thread_id, assistant_id, stream=False, policy=None, on_status=None,
+                    history=RUN_DURATIONS, **run_kwargs):
+    """Create a run and wait for it, by streaming events or by backoff polling."""
+    if stream:
+        return stream_run(client, thread_id, assistant_id, on_status=on_status, **run_kwargs)
+
+    start = time.perf_counter()
+    run = client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id, **run_kwargs)
+    record("runs", run.id, thread_id=thread_id)
+    if on_status:
+        on_status(run)
+    run, stats = wait_for_run(client, thread_id, run, policy, on_status, history)
+    stats.elapsed = time.perf_counter() - start
+    return run, stats
+
+
+BENCH_WORKLOADS = [
+    ("short runs (0.3-1.1s)", 0.7, 0.4),
+    ("long runs (8-12s)", 10.0, 2.0),
+]
+
+
+def _benchmark(server, client, num_runs):
+    from mock_openai_server import MockConfig
+
+    thread = client.beta.threads.create()
+    for workload, run_seconds, run_jitter in BENCH_WORKLOADS:
+        server.state.config = MockConfig(queued_seconds=0.1, run_seconds=run_seconds, run_jitter=run_jitter)
+        print(f"\n📝 {workload}, {num_runs} runs per policy")
+        for label, policy in [("fixed 1s", FIXED_ONE_SECOND), ("backoff", BackoffPolicy())]:
+            history = DurationHistory() if policy is not FIXED_ONE_SECOND else None
+            polls = 0
+            elapsed = 0.0
+            added = 0.0
+            for _ in range(num_runs):
+                _, stats = create_and_wait(client, thread.id, "asst_mock", policy=policy, history=history)
+                polls += stats.polls
+                elapsed += stats.elapsed
+                added += stats.added_latency
+            print(f"  {label:>9}: {polls / num_runs:5.1f} retrieve calls/run, "
+                  f"avg {elapsed / num_runs:.2f}s per run, "
+                  f"avg ~{added / num_runs:.2f}s added by polling")
+
+
+def main():
+    """Benchmark fixed-interval polling against backoff on the mock server."""
+    if "--bench" not in sys.argv:
+        print(__doc__)
+        return
+
+    from openai import OpenAI
+    from mock_openai_server import start_mock_server
+
+    num_runs = 6
+    if "--runs" in sys.argv:
+        num_runs = int(sys.argv[sys.argv.index("--runs") + 1])
+
+    print("🚀 Run Waiter - Offline Benchmark")
+    print("=" * 50)
+
+    LEDGER.enabled = False  # mock ids must not end up in the cleanup ledger
+    server, base_url = start_mock_server()
+    print(f"🧪 Mock server: {base_url}")
+    try:
+        _benchmark(server, OpenAI(api_key="sk-mock", base_url=base_url), num_runs)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Schema Registry
+
+Derives strict json_schema response formats from the lab's Pydantic models
+so schemas are never written by hand (and never drift from the models).
+Each model's response format and its TypeAdapter are built once and cached,
+so repeated calls only pay for validation itself.
+
+Strict mode needs every property listed as required and
+additionalProperties set to false, and rejects a few JSON-schema keywords
+(defaults, examples, string length limits). Those constraints are stripped
+from the schema sent to the API and enforced by the cached validator instead.
+"""
+
+import copy
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from pydantic import TypeAdapter
+
+UNSUPPORTED_KEYWORDS = {"default", "example", "examples", "title", "minLength", "maxLength"}
+
+
+def _snake_case(name):
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def _make_strict(schema):
+    if isinstance(schema, list):
+        return [_make_strict(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    strict = {}
+    for key, value in schema.items():
+        if key in UNSUPPORTED_KEYWORDS:
+            continue
+        # "properties" maps field names to schemas, so keep its keys as-is
+        if key in ("properties", "$defs"):
+            strict[key] = {name: _make_strict(sub) for name, sub in value.items()}
+        else:
+            strict[key] = _make_strict(value)
+    if strict.get("type") == "object" and "properties" in strict:
+        strict["required"] = list(strict["properties"])
+        strict["additionalProperties"] = False
+    return strict
+
+
+@dataclass(frozen=True)
+class SchemaEntry:
+    """Everything needed to request and validate one model."""
+    model: type
+    name: str
+    schema: dict
+    strict_schema: dict
+    adapter: TypeAdapter
+
+    def response_format(self, description=None):
+        json_schema = {"name": self.name, "strict": True, "schema": self.strict_schema}
+        if description:
+            json_schema["description"] = description
+        return {"type": "json_schema", "json_schema": json_schema}
+
+    def validate_json(self, raw_json):
+        return self.adapter.validate_json(raw_json)
+
+    def validate(self, data):
+        return self.adapter.validate_python(data)
+
+
+@lru_cache(maxsize=None)
+def schema_for(model, name=None):
+    """Build (once) and return the SchemaEntry for a Pydantic model."""
+    schema = model.model_json_schema()
+    return SchemaEntry(
+        model=model,
+        name=name or _snake_case(model.__name__),
+        schema=schema,
+        strict_schema=_make_strict(copy.deepcopy(schema)),
+        adapter=TypeAdapter(model),
+    )
+
+
+def response_format(model, name=None, description=None):
+    """Strict json_schema response_format for chat.completions.create."""
+    return schema_for(model, name).response_format(description)
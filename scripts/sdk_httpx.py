@@ -0,0 +1,25 @@
+"""
+SDK HTTP Library
+
+The lab transports (pooling, rate limiting, metrics) have to be built from
+the same httpx package as the http_client the openai SDK is handed: openai
+1.x/2.x is built on httpx, newer releases on httpx2, and a transport from
+the other package fails on its first request.
+
+    from sdk_httpx import httpx
+"""
+
+import importlib
+
+from openai import DefaultHttpxClient
+
+
+def _sdk_httpx():
+    """The httpx package DefaultHttpxClient subclasses its Client from."""
+    for cls in DefaultHttpxClient.__mro__:
+        if cls.__name__ == "Client":
+            return importlib.import_module(cls.__module__.partition(".")[0])
+    return importlib.import_module("httpx")
+
+
+httpx = _sdk_httpx()
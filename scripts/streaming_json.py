@@ -0,0 +1,196 @@
+"""
+Streaming Structured Output
+
+Parses a JSON object while the model is still generating it, so each field
+can be shown (and validated) the moment its value is complete instead of
+after the whole response has arrived:
+    - "item"  every element of a top-level array (key_benefits, use_cases, ...)
+    - "field" every top-level field, once its full value is closed
+    - "done"  the validated Pydantic model at the end of the stream
+
+Each field and item is validated on arrival against the model's field type,
+so a bad value is reported as soon as it is generated.
+"""
+
+import json
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, get_args, get_origin
+
+from pydantic import TypeAdapter, ValidationError
+
+from schema_registry import schema_for
+
+WHITESPACE = " \t\r\n"
+
+
+@dataclass
+class StreamEvent:
+    """One completed piece of a streamed JSON object."""
+    kind: str
+    field: str | None
+    value: Any
+    elapsed: float
+    error: str | None = None
+
+
+class IncrementalJSONParser:
+    """Feed text deltas of one JSON object; get back completed fields and array items."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        self.expect_key = False
+        self.key = None
+        self.key_start = None
+        self.value_start = None
+        self.item_start = None
+
+    def feed(self, text):
+        """Consume more text; return [(kind, key, value)] completed by it."""
+        self.buffer += text
+        events = []
+        while self.pos < len(self.buffer):
+            self._step(self.buffer[self.pos], self.pos, events)
+            self.pos += 1
+        return events
+
+    @property
+    def done(self):
+        return self.pos > 0 and not self.stack and not self.in_string
+
+    def _in_field_array(self):
+        return len(self.stack) == 2 and self.stack[-1] == "["
+
+    def _emit_field(self, end, events):
+        events.append(("field", self.key, json.loads(self.buffer[self.value_start:end])))
+        self.value_start = None
+
+    def _emit_item(self, end, events):
+        events.append(("item", self.key, json.loads(self.buffer[self.item_start:end])))
+        self.item_start = None
+
+    def _is_scalar(self, start):
+        return start is not None and self.buffer[start] not in '"{['
+
+    def _step(self, c, i, events):
+        depth = len(self.stack)
+        if self.in_string:
+            if self.escape:
+                self.escape = False
+            elif c == "\\":
+                self.escape = True
+            elif c == '"':
+                self.in_string = False
+                if self.key_start is not None:
+                    self.key = json.loads(self.buffer[self.key_start:i + 1])
+                    self.key_start = None
+                elif depth == 1 and self.value_start is not None:
+                    self._emit_field(i + 1, events)
+                elif self._in_field_array() and self.item_start is not None:
+                    self._emit_item(i + 1, events)
+            return
+
+        if c in WHITESPACE:
+            return
+        if c == '"':
+            self.in_string = True
+            if depth == 1 and self.expect_key:
+                self.key_start = i
+            else:
+                self._mark_value(i, depth)
+        elif c in "{[":
+            self._mark_value(i, depth)
+            self.stack.append(c)
+            if depth == 0:
+                self.expect_key = c == "{"
+        elif c in "}]":
+            # A number/true/false/null ends at the bracket that follows it
+            if depth == 1 and self._is_scalar(self.value_start):
+                self._emit_field(i, events)
+            elif self._in_field_array() and self._is_scalar(self.item_start):
+                self._emit_item(i, events)
+            self.stack.pop()
+            if len(self.stack) == 1 and self.value_start is not None:
+                self._emit_field(i + 1, events)
+            elif self._in_field_array() and self.item_start is not None:
+                self._emit_item(i + 1, events)
+        elif c == ":" and depth == 1:
+            self.expect_key = False
+        elif c == ",":
+            if depth == 1:
+                if self._is_scalar(self.value_start):
+                    self._emit_field(i, events)
+                self.expect_key = True
+            elif self._in_field_array() and self._is_scalar(self.item_start):
+                self._emit_item(i, events)
+        else:
+            self._mark_value(i, depth)
+
+    def _mark_value(self, i, depth):
+        if depth == 1 and self.value_start is None:
+            self.value_start = i
+        elif self._in_field_array() and self.item_start is None:
+            self.item_start = i
+
+
+class FieldValidators:
+    """TypeAdapters for each field of a model and for its list items."""
+
+    def __init__(self, model):
+        self.fields = {name: TypeAdapter(info.annotation) for name, info in model.model_fields.items()}
+        self.items = {}
+        for name, info in model.model_fields.items():
+            if get_origin(info.annotation) is list:
+                self.items[name] = TypeAdapter(get_args(info.annotation)[0])
+
+    def check(self, kind, key, value):
+        """Return the validation error for one field or item, or None."""
+        adapter = (self.items if kind == "item" else self.fields).get(key)
+        if adapter is None:
+            return None
+        try:
+            adapter.validate_python(value)
+        except ValidationError as e:
+            return str(e)
+        return None
+
+
+@lru_cache(maxsize=None)
+def field_validators(model):
+    """FieldValidators for a model, built once per model."""
+    return FieldValidators(model)
+
+
+def stream_structured(client, schema_model, **create_kwargs):
+    """Stream a chat completion and yield StreamEvents as fields complete.
+
+    create_kwargs go to chat.completions.create (messages, response_format, ...);
+    the final "done" event carries the validated model, or the raw dict and
+    the error if validation failed.
+    """
+    start = time.perf_counter()
+    parser = IncrementalJSONParser()
+    validators = field_validators(schema_model)
+    parts = []
+
+    stream = client.chat.completions.create(stream=True, **create_kwargs)
+    for chunk in stream:
+        if not chunk.choices or not chunk.choices[0].delta.content:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not parts:
+            yield StreamEvent("first_token", None, None, time.perf_counter() - start)
+        parts.append(delta)
+        for kind, key, value in parser.feed(delta):
+            yield StreamEvent(kind, key, value, time.perf_counter() - start, validators.check(kind, key, value))
+
+    data = json.loads("".join(parts))
+    try:
+        yield StreamEvent("done", None, schema_for(schema_model).validate(data), time.perf_counter() - start)
+    except ValidationError as e:
+        yield StreamEvent("done", None, data, time.perf_counter() - start, str(e))
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Thread Recycling Pool
+
+Keeps a warm set of empty Assistants threads so a query never waits for
+threads.create: the question goes in with the run (additional_messages),
+and the thread it ran on is handed back to the pool afterwards.
+
+What happens to a returned thread is set by ThreadPolicy:
+    - max_uses=1 (default) retires it after one query, so no answer can
+      leak into the next question's context
+    - max_uses>1 resets it in the background (its messages are deleted)
+      and puts it back in the warm set, until it reaches max_uses or
+      max_age_seconds
+Retired threads are deleted in bulk by a background reaper, so the number
+of threads alive stays at warm_size + in use + awaiting the reaper instead
+of growing with every query.
+
+A lease that finds the warm set empty waits for a thread that is already
+being created rather than creating one more, and for a batch of known
+size (expected_leases) the pool never warms more threads than the batch
+will use, so a batch creates as many threads as it has queries.
+
+    async with ThreadPool(client) as pool:
+        async with pool.lease() as thread_id:
+            ...
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+import openai
+
+from resource_ledger import record, record_deleted
+
+
+@dataclass
+class ThreadPolicy:
+    """Sizing and recycling rules for a ThreadPool."""
+    warm_size: int = 4
+    max_uses: int = 1
+    max_age_seconds: float = 3600.0
+    reap_interval: float = 2.0   # seconds between bulk deletes
+    reap_workers: int = 8        # concurrent deletes per sweep
+    expected_leases: int = None  # known batch size; None keeps warm_size ready indefinitely
+
+
+@dataclass
+class PooledThread:
+    id: str
+    created: float = field(default_factory=time.monotonic)
+    uses: int = 0
+
+
+@dataclass
+class PoolStats:
+    warm_hits: int = 0
+    cold_creates: int = 0
+    resets: int = 0
+    retired: int = 0
+    reaped: int = 0
+    reap_failures: int = 0
+
+    def describe(self):
+        leases = self.warm_hits + self.cold_creates
+        return (f"{self.warm_hits}/{leases} leases served warm, {self.resets} resets, "
+                f"{self.reaped}/{self.retired} retired threads deleted"
+                f"{f', {self.reap_failures} deletes failed' if self.reap_failures else ''}")
+
+
+class ThreadPool:
+    """Warm, recycled Assistants threads for an AsyncOpenAI client."""
+
+    def __init__(self, client, policy=None):
+        self.client = client
+        self.policy = policy or ThreadPolicy()
+        self.stats = PoolStats()
+        self._warm = asyncio.Queue()  # PooledThread, or None for a warm create that failed
+        self._retired = []
+        self._tasks = []
+        self._pending = set()  # warm creates and resets in flight
+        self._creating = 0
+        self._waiting = 0
+        self._leases = 0
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def start(self):
+        """Start filling the warm set and the background reaper."""
+        self._tasks = [asyncio.create_task(self._reap_forever())]
+        self._top_up()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _create(self):
+        thread = await self.client.beta.threads.create()
+        record("threads", thread.id)
+        return PooledThread(thread.id)
+
+    def _missing(self):
+        target = self.policy.warm_size
+        if self.policy.expected_leases is not None:
+            target = min(target, self.policy.expected_leases - self._leases)
+        return target - self._warm.qsize() - self._creating
+
+    def _top_up(self):
+        """Start creating whatever the warm set is missing; counted as in flight right away."""
+        for _ in range(max(0, self._missing())):
+            self._creating += 1
+            self._spawn(self._create_warm())
+
+    async def _create_warm(self):
+        try:
+            thread = await self._create()
+        except Exception:
+            thread = None  # wakes a waiting lease, which then creates its own
+        finally:
+            self._creating -= 1
+        self._warm.put_nowait(thread)
+
+    async def _take_warm(self):
+        """A fresh warm thread, waiting for one being created; None if there is none to wait for."""
+        while not self._warm.empty() or self._creating > self._waiting:
+            self._waiting += 1
+            try:
+                thread = await self._warm.get()
+            finally:
+                self._waiting -= 1
+            if thread is None:
+                return None
+            if time.monotonic() - thread.created < self.policy.max_age_seconds:
+                return thread
+            self._retire(thread)
+        return None
+
+    async def acquire(self):
+        """A warm thread (waiting for one already being created), otherwise a fresh one."""
+        self._leases += 1
+        thread = await self._take_warm()
+        self._top_up()
+        if thread is not None:
+            self.stats.warm_hits += 1
+            return thread
+        self.stats.cold_creates += 1
+        return await self._create()
+
+    def release(self, thread, reusable=True):
+        """Return a thread after use: reset it for reuse or retire it."""
+        thread.uses += 1
+        expired = time.monotonic() - thread.created >= self.policy.max_age_seconds
+        if not reusable or expired or thread.uses >= self.policy.max_uses:
+            self._retire(thread)
+        else:
+            self._spawn(self._reset(thread))
+        self._top_up()
+
+    @asynccontextmanager
+    async def lease(self):
+        """Borrow a thread id for one query; a failed query retires its thread."""
+        thread = await self.acquire()
+        try:
+            yield thread.id
+        except BaseException:
+            self.release(thread, reusable=False)
+            raise
+        self.release(thread)
+
+    async def _reset(self, thread):
+        try:
+            messages = [m async for m in self.client.beta.threads.messages.list(thread_id=thread.id, limit=100)]
+            await asyncio.gather(*(self.client.beta.threads.messages.delete(message_id=m.id, thread_id=thread.id)
+                                   for m in messages))
+        except Exception:
+            self._retire(thread)
+            return
+        self.stats.resets += 1
+        self._warm.put_nowait(thread)
+
+    def _retire(self, thread):
+        self.stats.retired += 1
+        self._retired.append(thread.id)
+
+    async def reap(self):
+        """Delete every retired thread, reap_workers at a time."""
+        batch = list(self._retired)
+        if not batch:
+            return
+        semaphore = asyncio.Semaphore(max(1, self.policy.reap_workers))
+
+        async def delete(thread_id):
+            async with semaphore:
+                try:
+                    await self.client.beta.threads.delete(thread_id)
+                except openai.NotFoundError:
+                    pass  # Already gone
+                return thread_id
+
+        results = await asyncio.gather(*(delete(thread_id) for thread_id in batch), return_exceptions=True)
+        # Only now, so a sweep cancelled halfway is retried by the next one
+        del self._retired[:len(batch)]
+        deleted = [r for r in results if isinstance(r, str)]
+        self.stats.reaped += len(deleted)
+        self.stats.reap_failures += len(batch) - len(deleted)
+        record_deleted("threads", deleted)
+
+    async def _reap_forever(self):
+        while True:
+            await asyncio.sleep(self.policy.reap_interval)
+            await self.reap()
+
+    async def close(self):
+        """Stop the background tasks, retire the warm set and delete everything retired."""
+        # Let creates and resets land first, so no thread they make is left behind
+        await asyncio.gather(*self._pending, return_exceptions=True)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._warm.empty():
+            thread = self._warm.get_nowait()
+            if thread is not None:
+                self._retire(thread)
+        await self.reap()
@@ -0,0 +1,142 @@
+"""
+Token-Aware Chunker
+
+Splits long source text into pieces that each fit a fixed token budget, so
+prompts built from them stay bounded no matter how large the input is.
+
+Sections start at headings (same rules as local_index) and are packed
+paragraph by paragraph; a paragraph larger than the budget is split on
+sentences, and a sentence larger than the budget on token boundaries.
+
+Token counts come from tiktoken when it is installed and fall back to a
+~4 characters per token estimate otherwise.
+
+Usage: python scripts/token_chunker.py <file> [--max-tokens 1500]
+"""
+
+import re
+import sys
+from dataclasses import dataclass
+
+DEFAULT_MAX_TOKENS = 1500
+CHARS_PER_TOKEN = 4
+HEADING_PATTERN = re.compile(r"^(#{1,6}\s+.+|\d+\.\s+[A-Z].*)$")  # markdown or "1. Title" headings
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _ENCODING = None
+
+
+def count_tokens(text):
+    """Number of tokens in text (estimated when tiktoken is not installed)."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _split_tokens(text, max_tokens):
+    if _ENCODING is not None:
+        tokens = _ENCODING.encode(text)
+        return [_ENCODING.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+    step = max_tokens * CHARS_PER_TOKEN
+    return [text[i:i + step] for i in range(0, len(text), step)]
+
+
+@dataclass
+class TextChunk:
+    """A piece of source text that fits the token budget."""
+    heading: str
+    text: str
+    tokens: int
+    page: int | None = None
+
+
+def _pieces(paragraph, max_tokens):
+    # Paragraph -> sentences -> raw token windows, whichever first fits
+    if count_tokens(paragraph) <= max_tokens:
+        return [paragraph]
+    pieces = []
+    for sentence in SENTENCE_PATTERN.split(paragraph):
+        pieces.extend([sentence] if count_tokens(sentence) <= max_tokens else _split_tokens(sentence, max_tokens))
+    return pieces
+
+
+def _sections(text):
+    heading, lines = "", []
+    for line in text.splitlines():
+        if HEADING_PATTERN.match(line.strip()):
+            if any(l.strip() for l in lines):
+                yield heading, "\n".join(lines)
+            heading, lines = line.strip().lstrip("#").strip(), [line]
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        yield heading, "\n".join(lines)
+
+
+def chunk_by_tokens(text, max_tokens=DEFAULT_MAX_TOKENS, page=None, heading=""):
+    """Yield TextChunks of at most max_tokens, never mixing two sections."""
+    for section_heading, body in _sections(text):
+        section_heading = section_heading or heading
+        current, current_tokens = [], 0
+        for paragraph in re.split(r"\n\s*\n", body):
+            for piece in _pieces(paragraph.strip(), max_tokens):
+                if not piece:
+                    continue
+                # +2 for the blank line that joins pieces back together
+                piece_tokens = count_tokens(piece) + 2
+                if current and current_tokens + piece_tokens > max_tokens:
+                    yield TextChunk(section_heading, "\n\n".join(current), current_tokens, page)
+                    current, current_tokens = [], 0
+                current.append(piece)
+                current_tokens += piece_tokens
+        if current:
+            yield TextChunk(section_heading, "\n\n".join(current), current_tokens, page)
+
+
+def chunk_pages(pages, max_tokens=DEFAULT_MAX_TOKENS):
+    """Pack (page_number, text) pairs into TextChunks tagged with their first page.
+
+    Consecutive short pages share a chunk; pages are consumed lazily, so a
+    streaming page source is never held in memory at once.
+    """
+    pending, heading = None, ""
+    for page_number, text in pages:
+        for chunk in chunk_by_tokens(text, max_tokens, page=page_number, heading=heading):
+            heading = chunk.heading
+            if pending and pending.tokens + chunk.tokens + 2 <= max_tokens:
+                pending.text = f"{pending.text}\n\n{chunk.text}"
+                pending.tokens += chunk.tokens + 2
+                continue
+            if pending:
+                yield pending
+            pending = chunk
+    if pending:
+        yield pending
+
+
+def main():
+    """Show how a file would be chunked."""
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    max_tokens = DEFAULT_MAX_TOKENS
+    if "--max-tokens" in sys.argv:
+        max_tokens = int(sys.argv[sys.argv.index("--max-tokens") + 1])
+
+    with open(sys.argv[1], encoding="utf-8") as f:
+        text = f.read()
+
+    chunks = list(chunk_by_tokens(text, max_tokens))
+    print(f"📄 {count_tokens(text)} tokens -> {len(chunks)} chunks of at most {max_tokens} "
+          f"({'tiktoken' if _ENCODING else 'estimated'})")
+    for n, chunk in enumerate(chunks, 1):
+        print(f"  {n:>3}. {chunk.tokens:>5} tokens  {chunk.heading[:60]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Content-Addressed Upload Cache
+
+Keeps a local SHA-256 -> file_id index in .upload_cache.json so a document is
+only sent to files.create when its bytes have never been uploaded before.
+Identical copies (e.g. docs/calculus.pdf and scripts/data/calculus.pdf) share
+one upload, and re-running ingestion over an unchanged corpus makes zero
+upload calls.
+
+Entries that have not been confirmed for a while are checked against the
+remote file list (one list call per batch) before being trusted, so files
+removed by 99_cleanup.py are re-uploaded instead of handed out as dead ids.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from resource_ledger import record
+
+CACHE_FILE = ".upload_cache.json"
+TRUST_SECONDS = 3600  # re-check entries against the remote list after this long
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class CachedFile:
+    """Minimal stand-in for a FileObject when the upload was skipped."""
+    id: str
+    filename: str
+    bytes: int
+
+
+def sha256_file(path):
+    """Hash a file in chunks without loading it into memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadCache:
+    """JSON-backed index of content hash -> uploaded file."""
+
+    def __init__(self, path=CACHE_FILE, trust_seconds=TRUST_SECONDS):
+        self.path = Path(path)
+        self.trust_seconds = trust_seconds
+        self.entries = json.loads(self.path.read_text()) if self.path.exists() else {}
+        self._remote_ids = None
+        self._lock = threading.RLock()  # shared by parallel upload workers
+
+    def save(self):
+        with self._lock:
+            self.path.write_text(json.dumps(self.entries, indent=2, sort_keys=True))
+
+    def get(self, digest, purpose):
+        entry = self.entries.get(digest)
+        if entry and entry["purpose"] == purpose:
+            return entry
+        return None
+
+    def put(self, digest, file_obj, purpose):
+        with self._lock:
+            self.entries[digest] = {
+                "file_id": file_obj.id,
+                "filename": file_obj.filename,
+                "bytes": file_obj.bytes,
+                "purpose": purpose,
+                "verified_at": time.time(),
+            }
+
+    def forget_file_ids(self, file_ids):
+        """Drop entries pointing at files that were deleted remotely."""
+        file_ids = set(file_ids)
+        with self._lock:
+            stale = [d for d, e in self.entries.items() if e["file_id"] in file_ids]
+            for digest in stale:
+                del self.entries[digest]
+        if stale:
+            self.save()
+        return len(stale)
+
+    def is_trusted(self, entry):
+        return time.time() - entry["verified_at"] < self.trust_seconds
+
+    def remote_ids(self, client, purpose):
+        """Ids of files that currently exist remotely (listed once per cache instance)."""
+        with self._lock:
+            if self._remote_ids is None:
+                self._remote_ids = {f.id for f in client.files.list(purpose=purpose)}
+        return self._remote_ids
+
+    def verify(self, client, entry, purpose):
+        """Confirm a doubtful entry still exists remotely."""
+        if entry["file_id"] not in self.remote_ids(client, purpose):
+            return False
+        entry["verified_at"] = time.time()
+        return True
+
+
+def _create_file(client, path, purpose):
+    with open(path, "rb") as file:
+        return client.files.create(file=file, purpose=purpose)
+
+
+def upload_cached(client, path, purpose="assistants", cache=None, upload_fn=_create_file, digest=None):
+    """Upload `path` unless identical bytes are already uploaded.
+
+    upload_fn(client, path, purpose) performs the actual upload; pass
+    `digest` when the file has already been hashed. Returns (file, uploaded)
+    where file is a FileObject or CachedFile.
+    """
+    cache = cache or UploadCache()
+    path = Path(path)
+    digest = digest or sha256_file(path)
+
+    entry = cache.get(digest, purpose)
+    if entry and (cache.is_trusted(entry) or cache.verify(client, entry, purpose)):
+        cache.save()
+        return CachedFile(entry["file_id"], entry["filename"], entry["bytes"]), False
+
+    uploaded_file = upload_fn(client, path, purpose)
+    record("files", uploaded_file.id, filename=uploaded_file.filename, purpose=purpose)
+
+    cache.put(digest, uploaded_file, purpose)
+    cache.save()
+    return uploaded_file, True
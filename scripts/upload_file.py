@@ -1,21 +1,18 @@
-from openai import OpenAI
-import os
+from lab_client import get_client
+from upload_cache import upload_cached
 
-# Initialize OpenAI client with API key
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY", "your-api
-)
+# Initialize OpenAI client
+client = get_client()
 
 def upload_file():
     try:
-        # Upload the file
-        with open("new/data/calculus_basics.txt", "rb") as file:
-            file_response = client.files.create(
-                file=file,
-                purpose="assistants"
-            )
+        # Upload the file (skipped if the same bytes were uploaded before)
+        file_response, uploaded = upload_cached(client, "new/data/calculus_basics.txt")
         
-        print(f"✅ File uploaded successfully with ID: {file_response.id}")
+        if uploaded:
+            print(f"✅ File uploaded successfully with ID: {file_response.id}")
+        else:
+            print(f"♻️  File unchanged, reusing ID: {file_response.id}")
         
         # Save the file ID
         with open(".file_id", "w") as f:
@@ -0,0 +1,78 @@
+"""
+Validation Repair
+
+When model output fails Pydantic validation, ask the model to fix only the
+fields that failed instead of regenerating the whole object. The repair
+prompt carries just those fields, their schema and the validation errors;
+the answer is merged back into the otherwise valid data and revalidated.
+
+A single summary that is too long therefore costs one small call rather
+than a full regeneration of every note.
+"""
+
+import json
+
+from pydantic import ValidationError
+
+from hedging import create_completion
+from model_router import AUTO, resolve
+from schema_registry import schema_for
+
+REPAIR_MODEL = AUTO  # routed per call, see model_router
+MAX_REPAIR_ATTEMPTS = 2
+
+
+def invalid_fields(error):
+    """Top-level field names mentioned in a ValidationError."""
+    return list(dict.fromkeys(str(e["loc"][0]) for e in error.errors() if e["loc"]))
+
+
+def build_repair_prompt(schema_model, data, error):
+    fields = invalid_fields(error)
+    properties = schema_for(schema_model).schema.get("properties", {})
+    return (
+        "Some fields of a JSON object failed validation. Fix only these fields "
+        "and keep their meaning.\n\n"
+        f"Current values:\n{json.dumps({f: data.get(f) for f in fields}, indent=2)}\n\n"
+        f"Field schema:\n{json.dumps({f: properties.get(f, {}) for f in fields}, indent=2)}\n\n"
+        "Validation errors:\n"
+        + "\n".join(f"- {'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+        + "\n\nRespond *only* with a JSON object containing the corrected fields."
+    )
+
+
+def repair(client, schema_model, data, error, model=REPAIR_MODEL, max_attempts=MAX_REPAIR_ATTEMPTS):
+    """Return (validated instance or None, repair calls made)."""
+    data = dict(data)
+    for attempt in range(1, max_attempts + 1):
+        messages = [{"role": "user", "content": build_repair_prompt(schema_model, data, error)}]
+        response = create_completion(
+            client,
+            model=resolve(model, "repair", messages),
+            messages=messages,
+            response_format={"type": "json_object"}
+        )
+        try:
+            fixes = json.loads(response.choices[0].message.content)
+        except (TypeError, ValueError):
+            fixes = None
+        if not isinstance(fixes, dict):
+            # An unusable answer is a failed attempt, not the end of the repair
+            print(f"⚠️  Repair attempt {attempt} did not return a JSON object")
+            continue
+        # Only accept changes to the fields we asked about
+        data.update({k: v for k, v in fixes.items() if k in invalid_fields(error)})
+        try:
+            return schema_for(schema_model).validate(data), attempt
+        except ValidationError as e:
+            error = e
+    return None, max_attempts
+
+
+def validate_or_repair(client, schema_model, data, model=REPAIR_MODEL, max_attempts=MAX_REPAIR_ATTEMPTS):
+    """Validate data, repairing just the invalid fields if needed; returns (instance or None, calls)."""
+    try:
+        return schema_for(schema_model).validate(data), 0
+    except ValidationError as e:
+        print(f"🔧 Repairing {schema_model.__name__} field(s): {', '.join(invalid_fields(e))}")
+        return repair(client, schema_model, data, e, model, max_attempts)
@@ -0,0 +1,194 @@
+"""
+Incremental Vector Store Sync
+
+Keeps one long-lived "Practice Lab Knowledge Base" vector store in step with
+the local document set (data/, docs/) instead of building a new store each
+run. The store id is persisted in .vectorstore_sync (.vectorstore belongs to
+the assistant's own store) and a manifest of path -> (sha256, file_id) in
+.vectorstore_manifest.json. A persisted id whose store has another name is
+never adopted, since a sync detaches every file it does not know about.
+
+Each sync diffs the local files against the manifest and the store's current
+file list, then uploads and attaches only new or changed files and detaches
+removed ones, so the cost grows with the size of the change, not the corpus.
+"""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from parallel_uploader import attach_in_batches, upload_files_parallel
+from resource_ledger import record
+from upload_cache import sha256_file
+
+VECTOR_STORE_FILE = ".vectorstore_sync"
+MANIFEST_FILE = ".vectorstore_manifest.json"
+DOCUMENT_DIRS = ("data", "docs")
+VECTOR_STORE_CONFIG = {
+    "name": "Practice Lab Knowledge Base",
+    "expires_after": {"anchor": "last_active_at", "days": 7},
+}
+
+
+@dataclass
+class SyncPlan:
+    """What a sync needs to change."""
+    add: dict = field(default_factory=dict)  # path -> sha256
+    detach: list = field(default_factory=list)  # file ids
+    unchanged: int = 0
+
+    @property
+    def is_empty(self):
+        return not self.add and not self.detach
+
+
+def load_vector_store_id():
+    """Load the synced vector store ID if one was saved."""
+    store_file = Path(VECTOR_STORE_FILE)
+    if store_file.exists():
+        return store_file.read_text().strip()
+    return None
+
+
+def save_vector_store_id(vector_store_id):
+    """Save the synced vector store ID for reuse."""
+    Path(VECTOR_STORE_FILE).write_text(vector_store_id)
+    print(f"💾 Vector Store ID saved to {VECTOR_STORE_FILE}")
+
+
+def load_manifest():
+    manifest_file = Path(MANIFEST_FILE)
+    if manifest_file.exists():
+        return json.loads(manifest_file.read_text())
+    return {"vector_store_id": None, "files": {}}
+
+
+def save_manifest(manifest):
+    Path(MANIFEST_FILE).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+
+def synced_digests():
+    """Sorted sha256 of the documents the last sync left in the store."""
+    return sorted(entry["sha256"] for entry in load_manifest()["files"].values())
+
+
+def forget_vector_store():
+    """Remove local references after the store has been deleted."""
+    for name in (VECTOR_STORE_FILE, MANIFEST_FILE):
+        Path(name).unlink(missing_ok=True)
+
+
+def collect_documents(dirs=DOCUMENT_DIRS):
+    """Return {relative path: sha256} for every non-hidden file under `dirs`."""
+    documents = {}
+    for directory in dirs:
+        root = Path(directory)
+        if not root.is_dir():
+            continue
+        for path in sorted(root.rglob("*")):
+            if path.is_file() and not any(part.startswith(".") for part in path.parts):
+                documents[path.as_posix()] = sha256_file(path)
+    return documents
+
+
+def get_or_create_vector_store(client, vector_store_id=None):
+    """Reuse the persisted store if it still exists, otherwise create a new one."""
+    if vector_store_id:
+        try:
+            vector_store = client.vector_stores.retrieve(vector_store_id)
+            if vector_store.name != VECTOR_STORE_CONFIG["name"]:
+                print(f"⚠️  {vector_store_id} is {vector_store.name!r}, not the synced store; leaving it alone")
+            elif vector_store.status != "expired":
+                return vector_store, False
+        except Exception as e:
+            print(f"⚠️  Stored vector store {vector_store_id} unavailable: {e}")
+
+    vector_store = client.vector_stores.create(**VECTOR_STORE_CONFIG)
+    record("vector_stores", vector_store.id, name=vector_store.name)
+    save_vector_store_id(vector_store.id)
+    return vector_store, True
+
+
+def plan_sync(local_documents, manifest, remote_file_ids):
+    """Diff local documents against the manifest and the store's actual files."""
+    plan = SyncPlan()
+    tracked = manifest["files"]
+    kept_ids = set()
+
+    for path, digest in local_documents.items():
+        entry = tracked.get(path)
+        if entry and entry["sha256"] == digest and entry["file_id"] in remote_file_ids:
+            kept_ids.add(entry["file_id"])
+            plan.unchanged += 1
+        else:
+            plan.add[path] = digest
+
+    # Anything attached that no current document maps to is stale
+    plan.detach = sorted(remote_file_ids - kept_ids)
+    return plan
+
+
+def apply_sync(client, vector_store_id, plan, manifest, local_documents):
+    """Upload and attach new/changed files, detach stale ones, update the manifest."""
+    new_entries = {}
+
+    def on_uploaded(path, uploaded_file, uploaded):
+        key = path.as_posix()
+        new_entries[key] = {"sha256": plan.add[key], "file_id": uploaded_file.id}
+        print(f"  {'⬆️  Uploaded' if uploaded else '♻️  Reused'}: {key} -> {uploaded_file.id}")
+
+    if plan.add:
+        _, report, _ = upload_files_parallel(client, list(plan.add), on_file=on_uploaded)
+        for path, error in report.failures.items():
+            print(f"⚠️  Could not upload {path}: {error}")
+        print(f"📈 Upload throughput: {report.describe()}")
+
+    # A re-added file can carry the same file_id as a stale attachment
+    added_ids = {entry["file_id"] for entry in new_entries.values()}
+    detach_ids = [file_id for file_id in plan.detach if file_id not in added_ids]
+
+    for file_batch in attach_in_batches(client, vector_store_id, sorted(added_ids)):
+        print(f"📊 File batch status: {file_batch.status}")
+        print(f"📊 Files processed: {file_batch.file_counts.completed}/{file_batch.file_counts.total}")
+
+    for file_id in detach_ids:
+        try:
+            client.vector_stores.files.delete(vector_store_id=vector_store_id, file_id=file_id)
+            print(f"  ✂️  Detached: {file_id}")
+        except Exception as e:
+            print(f"⚠️  Could not detach {file_id}: {e}")
+
+    manifest["vector_store_id"] = vector_store_id
+    # Failed uploads stay out of the manifest so the next sync retries them
+    manifest["files"] = {
+        path: new_entries.get(path) or manifest["files"][path]
+        for path in local_documents
+        if path in new_entries or path not in plan.add
+    }
+    save_manifest(manifest)
+
+
+def sync_vector_store(client, dirs=DOCUMENT_DIRS):
+    """Bring the persisted vector store in line with the local documents."""
+    print("\n🔁 Syncing vector store...")
+
+    vector_store, created = get_or_create_vector_store(client, load_vector_store_id())
+    print(f"{'✅ Vector store created' if created else '♻️  Reusing vector store'}: {vector_store.id}")
+
+    manifest = load_manifest()
+    if manifest["vector_store_id"] != vector_store.id:
+        manifest = {"vector_store_id": vector_store.id, "files": {}}
+
+    local_documents = collect_documents(dirs)
+    remote_file_ids = {
+        f.id for f in client.vector_stores.files.list(vector_store_id=vector_store.id)
+    }
+
+    plan = plan_sync(local_documents, manifest, remote_file_ids)
+    print(f"📋 Plan: {len(plan.add)} to add, {len(plan.detach)} to detach, {plan.unchanged} unchanged")
+
+    if plan.is_empty:
+        print("✅ Vector store already up to date")
+    apply_sync(client, vector_store.id, plan, manifest, local_documents)
+
+    return vector_store
@@ -0,0 +1,28 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The lab modules live flat in scripts/ and import each other by name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from mock_openai_server import MockConfig, start_mock_server  # noqa: E402
+
+
+@pytest.fixture
+def make_client(monkeypatch, tmp_path):
+    """Build lab clients against a fresh mock server, with state files in tmp_path."""
+    server, base_url = start_mock_server(MockConfig(latency_seconds=0.0, completion_seconds=0.0,
+                                                    queued_seconds=0.0, run_seconds=0.05, run_jitter=0.0))
+    monkeypatch.setenv("OPENAI_BASE_URL", base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-mock")
+    monkeypatch.delenv("OPENAI_ORG", raising=False)
+    monkeypatch.chdir(tmp_path)
+
+    def make():
+        from lab_client import create_client
+        return create_client()
+
+    make.server = server
+    yield make
+    server.shutdown()
@@ -0,0 +1,38 @@
+import openai
+import pytest
+
+from api_metrics import METRICS
+
+
+def test_multipart_upload_is_sent_and_recorded(make_client, tmp_path):
+    client = make_client()
+    before = len(METRICS.calls(endpoint="/v1/files"))
+    path = tmp_path / "notes.txt"
+    path.write_text("limits and derivatives")
+
+    from_bytes = client.files.create(file=("a.txt", b"hello"), purpose="assistants")
+    with path.open("rb") as handle:
+        from_handle = client.files.create(file=handle, purpose="assistants")
+
+    assert from_bytes.id and from_handle.id
+    assert make_client.server.state.calls["create_file"] == 2
+    calls = METRICS.calls(endpoint="/v1/files")[before:]
+    assert [(c.method, c.status, c.model) for c in calls] == [("POST", 200, "")] * 2
+
+
+def test_chat_completion_is_budgeted_by_model(make_client):
+    client = make_client()
+    client.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "user", "content": "hi"}])
+    assert METRICS.calls(endpoint="/v1/chat/completions", model="gpt-4o-mini")
+
+
+def test_sdk_retries_are_counted(make_client):
+    client = make_client().with_options(max_retries=2)
+    make_client.server.state.config.error_rate = 1.0
+    make_client.server.state.config.error_status = 500
+    before = len(METRICS.calls(endpoint="/v1/threads"))
+
+    with pytest.raises(openai.InternalServerError):
+        client.beta.threads.create()
+    calls = METRICS.calls(endpoint="/v1/threads")[before:]
+    assert [c.retries for c in calls] == [0, 1, 1]
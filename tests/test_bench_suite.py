@@ -0,0 +1,34 @@
+import pytest
+
+import bench_suite
+from mock_openai_server import MockConfig
+
+
+def test_record_refuses_failing_flows(monkeypatch, tmp_path):
+    monkeypatch.setattr(bench_suite, "BASELINE_FILE", tmp_path / "baselines.json")
+    results = {
+        "rag": {"p50": 1.0, "p95": 1.2, "requests": 24, "failures": 0},
+        "cleanup": {"p50": 2.0, "p95": 2.1, "requests": 66, "failures": 1},
+    }
+    with pytest.raises(SystemExit) as exit_info:
+        bench_suite.save_baseline(results, MockConfig())
+    assert exit_info.value.code == 1
+    assert not bench_suite.BASELINE_FILE.exists()
+
+    results["cleanup"]["failures"] = 0
+    bench_suite.save_baseline(results, MockConfig())
+    assert set(bench_suite.load_baseline()["flows"]) == {"rag", "cleanup"}
+
+
+def test_request_counts_allow_small_drift():
+    baseline = {"config": {"error_rate": 0.0},
+                "flows": {"cleanup": {"p50": 2.0, "requests": 66}, "responses": {"p50": 1.0, "requests": 8}}}
+
+    def regressions(cleanup, responses):
+        results = {"cleanup": {"p50": 2.0, "requests": cleanup, "failures": 0},
+                   "responses": {"p50": 1.0, "requests": responses, "failures": 0}}
+        return bench_suite.compare(results, baseline, 0.25, MockConfig())
+
+    assert regressions(cleanup=69, responses=9) == []
+    assert regressions(cleanup=70, responses=10) == ["cleanup: 70 requests vs baseline 66",
+                                                      "responses: 10 requests vs baseline 8"]
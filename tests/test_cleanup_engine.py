@@ -0,0 +1,25 @@
+from cleanup_engine import execute_plan, plan_cleanup, plan_from_ledger
+from resource_ledger import ResourceLedger
+
+
+def test_scan_deletes_listable_resources(make_client):
+    client = make_client()
+    store = client.vector_stores.create(name="old")
+    client.beta.threads.create()
+
+    plan = plan_cleanup(client, ["vector_stores", "threads"], max_age_hours=0, now=store.created_at + 3600)
+    assert [(item.kind, item.id) for item in plan] == [("vector_stores", store.id)]
+
+    report = execute_plan(client, plan, workers=2)
+    assert report.deleted_ids("vector_stores") == [store.id]
+    assert make_client.server.state.calls["delete_vector_store"] == 1
+
+
+
+def test_ledger_plan_keeps_what_a_scan_keeps(tmp_path):
+    ledger = ResourceLedger(tmp_path / "ledger.jsonl")
+    ledger.record("files", "file-notes", filename="notes.md", purpose="assistants")
+    ledger.record("files", "file-batch", filename="batch.jsonl", purpose="batch")
+
+    plan = plan_from_ledger(ledger, ["files"], max_age_hours=0)
+    assert [item.id for item in plan] == ["file-notes"]
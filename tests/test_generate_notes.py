@@ -0,0 +1,48 @@
+import importlib
+
+import pytest
+
+from token_chunker import TextChunk
+
+
+@pytest.fixture
+def notes_lab(make_client, monkeypatch):
+    make_client()  # mock server environment for the lab's module-level client
+    lab = importlib.import_module("02_generate_notes")
+    prompts = []
+
+    def request_notes(system_prompt, user_prompt="", task="notes_reduce"):
+        prompts.append((task, system_prompt))
+        if "limits" in system_prompt:
+            raise RuntimeError("chunk failed")
+        if task == "notes_map":
+            topic = next(word for word in ("derivatives", "integrals") if word in system_prompt)
+            return [lab.Note(id=1, heading=topic.title(), summary="s", page_ref=2)]
+        return [lab.Note(id=1, heading="Merged", summary="s")]
+
+    monkeypatch.setattr(lab, "request_notes", request_notes)
+    lab.prompts = prompts
+    return lab
+
+
+def chunks(*texts):
+    return [TextChunk(heading="Calculus", text=text, tokens=1, page=2) for text in texts]
+
+
+def test_failed_chunk_is_skipped(notes_lab):
+    notes = notes_lab.map_reduce_notes(chunks("derivatives", "limits", "integrals"))
+    assert [note.heading for note in notes] == ["Merged"]
+    _, reduce_prompt = notes_lab.prompts[-1]
+    assert "Derivatives" in reduce_prompt and "Integrals" in reduce_prompt
+
+
+def test_reduce_asks_for_no_more_notes_than_candidates(notes_lab):
+    notes_lab.map_reduce_notes(chunks("derivatives", "integrals"))
+    task, reduce_prompt = notes_lab.prompts[-1]
+    assert task == "notes_reduce"
+    assert "exactly 2 unique notes" in reduce_prompt
+
+
+def test_all_chunks_failing_is_an_error(notes_lab):
+    with pytest.raises(RuntimeError):
+        notes_lab.map_reduce_notes(chunks("limits"))
@@ -0,0 +1,27 @@
+import time
+
+from api_metrics import CallRecord, MetricsRecorder
+from hedging import ENDPOINT, Hedger, HedgePolicy
+from rate_limiter import PRIORITY_BATCH, _priority, request_priority
+
+
+def hedger_with_fast_history():
+    metrics = MetricsRecorder()
+    for _ in range(20):
+        metrics.record(CallRecord(ENDPOINT, "POST", "m", 200, 0.0, 0.01, 0.01))
+    return Hedger(HedgePolicy(enabled=True, max_rate=1.0, min_delay=0.01), metrics=metrics)
+
+
+def test_both_legs_keep_the_callers_priority():
+    hedger = hedger_with_fast_history()
+    seen = []
+
+    def call():
+        seen.append(_priority.get())
+        time.sleep(0.2 if len(seen) == 1 else 0.0)
+        return len(seen)
+
+    with request_priority(PRIORITY_BATCH):
+        assert hedger.call(call, model="m") == 2
+    assert seen == [PRIORITY_BATCH, PRIORITY_BATCH]
+    assert (hedger.stats.hedged, hedger.stats.hedge_wins) == (1, 1)
@@ -0,0 +1,37 @@
+from local_index import LocalIndex, chunk_text
+
+DOCUMENT = """# Rate limits
+## Retries
+Back off exponentially when the API answers 429.
+
+Honour the Retry-After header.
+
+# Threads
+A thread stores the messages of one conversation.
+
+# Vector stores
+File search retrieves chunks from a vector store."""
+
+
+def test_chunks_follow_headings_and_size():
+    chunks = chunk_text(DOCUMENT, "guide.md")
+    assert [c.heading for c in chunks] == ["Rate limits > Retries", "Threads", "Vector stores"]
+    assert all(c.source == "guide.md" for c in chunks)
+
+    small = chunk_text(DOCUMENT, "guide.md", max_chars=60)
+    retries = [c.text for c in small if c.heading == "Rate limits > Retries"]
+    assert len(retries) == 2 and retries[1] == "Honour the Retry-After header."
+
+
+def test_search_ranks_the_relevant_chunk_first():
+    index = LocalIndex(chunk_text(DOCUMENT, "guide.md"))
+    (score, best), *rest = index.search("how should I handle a 429 and retry-after?", k=2)
+    assert best.heading == "Rate limits > Retries"
+    assert len(rest) == 1 and score > rest[0][0]
+
+
+def test_ann_search_matches_exact_search():
+    chunks = chunk_text("\n\n".join([DOCUMENT] * 20), "guide.md")
+    exact, ann = LocalIndex(chunks), LocalIndex(chunks, ann=True)
+    for query in ("conversation messages in a thread", "vector store file search"):
+        assert exact.search(query, k=1)[0][1].heading == ann.search(query, k=1)[0][1].heading
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from message_history import aiter_messages, iter_messages, message_text, parse_args
+
+
+@pytest.fixture
+def thread(make_client):
+    client = make_client()
+    thread = client.beta.threads.create()
+    for i in range(7):
+        client.beta.threads.messages.create(thread_id=thread.id, role="user" if i % 2 == 0 else "assistant",
+                                            content=f"message {i}")
+    for i, message in enumerate(make_client.server.state.messages[thread.id]):
+        message["created_at"] = 1000 + i
+    return client, thread.id
+
+
+def texts(messages):
+    return [message_text(m) for m in messages]
+
+
+def test_pages_through_the_whole_history_oldest_first(thread, make_client):
+    client, thread_id = thread
+    assert texts(iter_messages(client, thread_id, page_size=2)) == [f"message {i}" for i in range(7)]
+    assert texts(iter_messages(client, thread_id, page_size=2, prefetch=False))[-1] == "message 6"
+    assert make_client.server.state.calls["list_messages"] == 8
+
+
+def test_filters_trim_by_role_and_time(thread, make_client):
+    client, thread_id = thread
+    assert texts(iter_messages(client, thread_id, roles="assistant", page_size=2)) == [
+        "message 1", "message 3", "message 5"]
+
+    calls = make_client.server.state.calls
+    before = calls["list_messages"]
+    assert texts(iter_messages(client, thread_id, since=1001, until=1002, page_size=2, prefetch=False)) == [
+        "message 1", "message 2"]
+    # Paging stops at the first message past `until`
+    assert calls["list_messages"] - before == 2
+
+
+def test_async_reader_matches(thread):
+    from lab_client import create_async_client
+
+    _, thread_id = thread
+
+    async def read():
+        client = create_async_client()
+        try:
+            return [m async for m in aiter_messages(client, thread_id, roles={"user"}, page_size=3)]
+        finally:
+            await client.close()
+
+    assert texts(asyncio.run(read())) == ["message 0", "message 2", "message 4", "message 6"]
+
+
+def test_option_values_are_not_positional():
+    assert parse_args(["--role", "user", "thread_1", "--since", "5"]) == (
+        ["thread_1"], {"--role": "user", "--since": 5})
+    with pytest.raises(ValueError):
+        parse_args(["thread_1", "--until"])
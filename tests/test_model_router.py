@@ -0,0 +1,59 @@
+import pytest
+
+from model_router import AUTO, ModelRouter, resolve, route
+
+
+class FakeMetrics:
+    """Observed p95 per model; models without an entry have no calls yet."""
+
+    def __init__(self, p95=None):
+        self.p95 = p95 or {}
+
+    def summary(self, endpoint=None, model=None):
+        return {"calls": 100 if model in self.p95 else 0, "p95": self.p95.get(model, 0.0)}
+
+
+@pytest.fixture(autouse=True)
+def unpinned(monkeypatch):
+    for name in ("OPENAI_MODEL", "OPENAI_MODEL_QNA", "OPENAI_MODEL_STRUCTURED_OUTPUT"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def choose(task, metrics=None, **kwargs):
+    return ModelRouter(metrics=metrics or FakeMetrics()).choose(task, **kwargs)
+
+
+def test_cheapest_model_that_meets_the_task():
+    assert choose("structured_output").model == "gpt-4o-mini"
+    assert choose("repair").model == "gpt-4o-mini"
+    assert choose("qna").model == "gpt-4o"
+
+
+def test_prompt_size_excludes_small_context_windows():
+    assert choose("repair", prompt_tokens=20_000).model == "gpt-4o-mini"
+
+
+def test_observed_latency_replaces_the_prior():
+    slow_mini = FakeMetrics({"gpt-4o-mini": 30.0})
+    assert choose("structured_output", slow_mini).model == "gpt-4o"
+
+
+def test_deadline_fallback_keeps_the_quality_bar():
+    at_risk = choose("json_mode", latency_budget=1.0)
+    assert (at_risk.model, at_risk.reason) == ("gpt-4o-mini", "fallback, deadline at risk")
+    assert choose("repair", latency_budget=1.0).model == "gpt-3.5-turbo"
+
+
+def test_oversized_prompt_goes_to_the_largest_window():
+    huge = [{"role": "user", "content": "limit " * 200_000}]
+    assert route("qna", huge, router=ModelRouter(metrics=FakeMetrics())) == "gpt-4o"
+    over = choose("structured_output", prompt_tokens=500_000)
+    assert (over.model, over.reason) == ("gpt-4o-mini", "fallback, prompt exceeds every context window")
+
+
+def test_environment_pins_and_explicit_models(monkeypatch):
+    monkeypatch.setenv("OPENAI_MODEL_QNA", "gpt-4-turbo")
+    assert choose("qna").model == "gpt-4-turbo"
+    assert choose("repair").model == "gpt-4o-mini"
+    assert resolve("gpt-3.5-turbo", "qna") == "gpt-3.5-turbo"
+    assert resolve(AUTO, "qna") == "gpt-4-turbo"
@@ -0,0 +1,17 @@
+from parallel_uploader import upload_files_parallel
+
+
+def test_identical_files_are_uploaded_once(make_client, tmp_path):
+    client = make_client()
+    paths = []
+    for name, text in (("a.txt", "derivatives"), ("copy_of_a.txt", "derivatives"), ("b.txt", "integrals")):
+        paths.append(tmp_path / name)
+        paths[-1].write_text(text)
+    store = client.vector_stores.create(name="test")
+
+    files, report, batches = upload_files_parallel(client, paths, vector_store_id=store.id)
+
+    assert make_client.server.state.calls["create_file"] == 2
+    assert (report.files, report.uploaded, report.reused) == (3, 2, 1)
+    assert files[0].id == files[1].id != files[2].id
+    assert sum(batch.file_counts.total for batch in batches) == 2
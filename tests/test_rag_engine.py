@@ -0,0 +1,50 @@
+import asyncio
+
+from local_index import LocalIndex, chunk_text
+from rag_engine import local_backend, run_rag_queries, summarize_batch
+
+
+def test_queries_run_concurrently_within_the_limit():
+    in_flight, peak = 0, 0
+
+    async def backend(query, index):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        if query == "broken":
+            raise RuntimeError("no answer")
+        return {"index": index, "query": query, "response": query.upper(), "latency": 0.05}
+
+    queries = ["limits", "series", "broken", "integrals", "derivatives", "vectors"]
+    results, wall_time = asyncio.run(run_rag_queries(None, "asst_mock", queries, concurrency=3, backend=backend))
+
+    assert peak == 3
+    assert [r["index"] for r in results] == [1, 2, 3, 4, 5, 6]
+    assert results[2]["status"] == "error" and results[0]["response"] == "LIMITS"
+    assert summarize_batch(results, wall_time)["speedup"] > 1.5
+
+
+def test_file_search_queries_against_the_mock(make_client):
+    from lab_client import create_async_client
+
+    async def main():
+        client = create_async_client()
+        try:
+            return await run_rag_queries(client, "asst_mock", ["What is a limit?", "What is a series?"])
+        finally:
+            await client.close()
+
+    results, _ = asyncio.run(main())
+    assert all(r["response"] and r["thread_id"] for r in results)
+    calls = make_client.server.state.calls
+    assert calls["create_thread"] == 2 and calls["list_messages"] == 0
+
+
+def test_local_backend_without_a_model_returns_passages():
+    index = LocalIndex(chunk_text("# Limits\nA limit is approached.\n\n# Series\nA series is a sum.", "calc.md"))
+    results, _ = asyncio.run(run_rag_queries(None, None, ["what is a series"],
+                                             backend=local_backend(None, index, model=None, k=1)))
+    assert results[0]["response"].startswith("[1] (calc.md) # Series")
+    assert results[0]["citations"] == ["calc.md"]
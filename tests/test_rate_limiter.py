@@ -0,0 +1,55 @@
+import asyncio
+import os
+
+import openai
+import pytest
+
+from mock_openai_server import MockConfig, start_mock_server
+from rate_limiter import ModelLimits, RateLimitedTransport, RateLimiter, parse_usage
+from sdk_httpx import httpx
+
+
+def test_server_errors_are_retried_by_the_sdk_only(monkeypatch):
+    server, base_url = start_mock_server(MockConfig(latency_seconds=0.0, error_rate=1.0, error_status=500))
+    monkeypatch.setenv("OPENAI_BASE_URL", base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-mock")
+    try:
+        from lab_client import create_client
+        client = create_client().with_options(max_retries=1)
+        with pytest.raises(openai.InternalServerError):
+            client.beta.threads.create()
+        # One SDK retry, none added by the transport
+        assert sum(server.state.calls.values()) == 2
+    finally:
+        server.shutdown()
+
+
+def test_async_waiters_hold_no_threads_and_leave_when_cancelled():
+    limiter = RateLimiter({"gpt-4o-mini": ModelLimits(rpm=1, tpm=1000)})
+
+    async def main():
+        await limiter.acquire_async("gpt-4o-mini", 10)
+        waiters = [asyncio.create_task(limiter.acquire_async("gpt-4o-mini", 10)) for _ in range(40)]
+        await asyncio.sleep(0.1)
+        # More waiters than the default executor has threads, and it is still free
+        assert await asyncio.wait_for(asyncio.to_thread(lambda: "free"), timeout=2) == "free"
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+    asyncio.run(main())
+    assert limiter.stats["requests"] == 1
+    assert limiter.waiting["gpt-4o-mini"] == []
+
+
+def test_token_estimate_is_settled_from_reported_usage(make_client):
+    make_client()
+    limiter = RateLimiter({"gpt-4o-mini": ModelLimits(rpm=500, tpm=10_000)})
+    transport = RateLimitedTransport(httpx.HTTPTransport(), limiter)
+    with httpx.Client(transport=transport, base_url=os.environ["OPENAI_BASE_URL"]) as http:
+        response = http.post("/chat/completions", headers={"Authorization": "Bearer sk-mock"}, json={
+            "model": "gpt-4o-mini", "max_tokens": 5000, "messages": [{"role": "user", "content": "hi"}]})
+        used = sum(parse_usage(response.content))
+
+    assert 0 < used < 1000
+    assert limiter.budgets["gpt-4o-mini"].tokens.available > 10_000 - 1000
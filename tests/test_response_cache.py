@@ -0,0 +1,73 @@
+import asyncio
+
+from local_index import HashingEmbedder
+from response_cache import ResponseCache, cached_backend, context_fingerprint
+
+QUESTION = "What is the derivative of x squared?"
+ANSWER = {"response": "2x", "latency": 1.5}
+
+
+def test_exact_hits_ignore_case_whitespace_and_punctuation(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    assert cache.get(QUESTION, "gpt-4o") is None
+    cache.put(QUESTION, "gpt-4o", ANSWER, latency=1.5)
+
+    assert cache.get("  what is the DERIVATIVE of x   squared ", "gpt-4o") == ANSWER
+    assert (cache.stats.exact_hits, cache.stats.misses) == (1, 1)
+    assert cache.stats.latency_saved == 1.5
+    # Persisted for the next process
+    assert ResponseCache(tmp_path / "cache.sqlite").get(QUESTION, "gpt-4o") == ANSWER
+
+
+def test_model_and_context_are_part_of_the_key(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite", embedder=HashingEmbedder())
+    context = context_fingerprint("vs_1", ["sha-a"])
+    cache.put(QUESTION, "gpt-4o", ANSWER, 1.5, context)
+
+    assert cache.get(QUESTION, "gpt-4o", context) == ANSWER
+    assert cache.get(QUESTION, "gpt-4o-mini", context) is None
+    assert cache.get(QUESTION, "gpt-4o", context_fingerprint("vs_1", ["sha-b"])) is None
+
+
+def test_semantic_hits_respect_the_threshold(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite", embedder=HashingEmbedder())
+    cache.put(QUESTION, "gpt-4o", ANSWER, 1.5)
+
+    assert cache.get("what is the derivative of x squared, please", "gpt-4o") == ANSWER
+    assert cache.get("How do I integrate by parts?", "gpt-4o") is None
+    assert (cache.stats.semantic_hits, cache.stats.misses) == (1, 1)
+
+    strict = ResponseCache(tmp_path / "cache.sqlite", embedder=HashingEmbedder(), similarity=0.99)
+    assert strict.get("what is the derivative of x squared, please", "gpt-4o") is None
+
+
+def test_expired_and_least_recently_used_entries_go(tmp_path):
+    expired = ResponseCache(tmp_path / "expired.sqlite", ttl_seconds=-1)
+    expired.put(QUESTION, "gpt-4o", ANSWER, 1.5)
+    assert expired.get(QUESTION, "gpt-4o") is None
+
+    cache = ResponseCache(tmp_path / "lru.sqlite", max_entries=2)
+    cache.put("first", "gpt-4o", ANSWER, 1.0)
+    cache.put("second", "gpt-4o", ANSWER, 1.0)
+    cache.get("first", "gpt-4o")
+    cache.put("third", "gpt-4o", ANSWER, 1.0)
+    assert cache.get("second", "gpt-4o") is None
+    assert cache.get("first", "gpt-4o") == cache.get("third", "gpt-4o") == ANSWER
+
+
+def test_cached_backend_skips_the_model_on_repeats(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    calls = []
+
+    async def backend(query, index):
+        calls.append(query)
+        return {"index": index, "query": query, "response": "2x", "latency": 1.0}
+
+    query = cached_backend(backend, cache, "gpt-4o", context="vs_1")
+
+    async def main():
+        return [await query(QUESTION, 0), await query(QUESTION.upper(), 1)]
+
+    first, second = asyncio.run(main())
+    assert calls == [QUESTION]
+    assert second["cached"] and second["index"] == 1 and second["response"] == first["response"]
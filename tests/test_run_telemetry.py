@@ -0,0 +1,28 @@
+import importlib
+
+from run_telemetry import execute_run
+
+
+def test_one_stream_gives_text_steps_and_usage(make_client):
+    client = make_client()
+    thread = client.beta.threads.create(messages=[{"role": "user", "content": "What is a derivative?"}])
+    calls = make_client.server.state.calls
+
+    result = execute_run(client, thread.id, "asst_mock")
+    assert result.status == "completed"
+    assert result.text and result.message_id
+    assert result.usage.total_tokens > 0
+    assert result.steps and result.timing.ttft is not None
+    assert calls["list_run_steps"] == calls["list_messages"] == calls["retrieve_run"] == 0
+
+
+def test_lab_streams_by_default(make_client):
+    client = make_client()
+    lab = importlib.import_module("01_responces_api")
+    thread = lab.create_thread_with_messages(client)
+    calls = make_client.server.state.calls
+
+    run, telemetry = lab.demonstrate_polling_run(client, "asst_mock", thread.id)
+    lab.demonstrate_run_steps(client, thread.id, run.id, telemetry.steps)
+    assert run.status == "completed" and telemetry.steps
+    assert calls["list_run_steps"] == calls["retrieve_run"] == 0
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import run_waiter
+from run_waiter import BackoffPolicy, StreamTiming, create_and_wait
+
+
+def test_on_status_is_reported_when_polling_and_streaming(make_client):
+    client = make_client()
+    policy = BackoffPolicy(initial_interval=0.02, jitter=0.0)
+    for stream in (False, True):
+        thread = client.beta.threads.create()
+        statuses = []
+        run, _ = create_and_wait(client, thread.id, "asst_mock", stream=stream, policy=policy, history=None,
+                                 on_status=lambda r: statuses.append(r.status))
+        assert run.status == "completed"
+        assert statuses[0] in ("queued", "in_progress") and statuses[-1] == "completed"
+
+
+def event(kind, text=None, usage=None):
+    if kind == "thread.message.delta":
+        block = SimpleNamespace(text=SimpleNamespace(value=text))
+        return SimpleNamespace(event=kind, data=SimpleNamespace(delta=SimpleNamespace(content=[block])))
+    return SimpleNamespace(event=kind, data=SimpleNamespace(usage=usage))
+
+
+def test_stream_timing_from_deltas_and_usage(monkeypatch):
+    clock = iter([10.0, 10.5, 11.0, 11.5, 12.0])
+    monkeypatch.setattr(run_waiter.time, "perf_counter", lambda: next(clock))
+
+    timing = StreamTiming()
+    for item in (event("thread.run.created"), event("thread.message.delta", "Limits"),
+                 event("thread.message.delta", ""), event("thread.message.delta", " approach"),
+                 event("thread.message.delta", " values."),
+                 event("thread.run.completed", usage=SimpleNamespace(completion_tokens=20))):
+        timing.delta(item)
+
+    assert timing.ttft == 0.5
+    assert timing.gaps == [0.5, 0.5]
+    assert timing.tokens_per_second == 20 / 1.5
+    assert timing.duration == 2.0
+
+
+def test_streamed_run_reports_first_token(make_client):
+    client = make_client()
+    thread = client.beta.threads.create(messages=[{"role": "user", "content": "What is a limit?"}])
+    _, stats = create_and_wait(client, thread.id, "asst_mock", stream=True)
+    assert stats.polls == 0
+    assert 0 < stats.timing.ttft <= stats.elapsed
+    assert stats.timing.tokens_per_second > 0
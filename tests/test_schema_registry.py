@@ -0,0 +1,39 @@
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel, Field, ValidationError
+
+from schema_registry import response_format, schema_for
+
+
+class Source(BaseModel):
+    title: str = Field(..., max_length=30, examples=["Calculus"])
+
+
+class StudyCard(BaseModel):
+    heading: str = Field(..., min_length=3)
+    page_ref: Optional[int] = None
+    sources: list[Source]
+
+
+def test_strict_schema_requires_everything_and_drops_unsupported_keywords():
+    schema = response_format(StudyCard)["json_schema"]
+    assert schema["name"] == "study_card" and schema["strict"] is True
+
+    strict = schema["schema"]
+    assert strict["required"] == ["heading", "page_ref", "sources"]
+    assert strict["additionalProperties"] is False
+    source = strict["$defs"]["Source"]
+    assert source["required"] == ["title"] and source["additionalProperties"] is False
+    assert "maxLength" not in source["properties"]["title"]
+    assert "default" not in strict["properties"]["page_ref"]
+
+
+def test_stripped_constraints_are_still_validated():
+    entry = schema_for(StudyCard)
+    assert schema_for(StudyCard) is entry
+    assert entry.validate_json('{"heading": "Limits", "sources": []}').page_ref is None
+    with pytest.raises(ValidationError):
+        entry.validate({"heading": "Li", "sources": []})
+    with pytest.raises(ValidationError):
+        entry.validate({"heading": "Limits", "sources": [{"title": "x" * 31}]})
@@ -0,0 +1,44 @@
+import json
+from types import SimpleNamespace
+
+from pydantic import BaseModel
+
+from streaming_json import IncrementalJSONParser, stream_structured
+
+
+class Overview(BaseModel):
+    title: str
+    score: int
+    key_benefits: list[str]
+    details: dict
+
+
+DOCUMENT = {"title": "Threads \"and\" runs", "score": 7, "key_benefits": ["state", "tools"],
+            "details": {"nested": [1, {"a": "}"}]}}
+
+
+def deltas(text, size=3):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_fields_and_items_complete_while_streaming():
+    parser = IncrementalJSONParser()
+    events = [event for delta in deltas(json.dumps(DOCUMENT)) for event in parser.feed(delta)]
+    assert parser.done
+    assert ("item", "key_benefits", "state") in events
+    assert [(kind, key) for kind, key, _ in events] == [
+        ("field", "title"), ("field", "score"), ("item", "key_benefits"), ("item", "key_benefits"),
+        ("field", "key_benefits"), ("field", "details")]
+    assert {key: value for kind, key, value in events if kind == "field"} == DOCUMENT
+
+
+def test_stream_validates_each_field_and_the_result():
+    text = json.dumps({**DOCUMENT, "score": "high"})
+    chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=d))]) for d in deltas(text)]
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **_: iter(chunks))))
+
+    events = list(stream_structured(client, Overview, model="gpt-4o-mini", messages=[]))
+    assert events[0].kind == "first_token"
+    errors = {event.field for event in events if event.kind == "field" and event.error}
+    assert errors == {"score"}
+    assert events[-1].kind == "done" and events[-1].error and events[-1].value["score"] == "high"
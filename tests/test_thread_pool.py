@@ -0,0 +1,36 @@
+import asyncio
+
+from thread_pool import ThreadPolicy, ThreadPool
+
+
+def run_leases(policy, leases):
+    from lab_client import create_async_client
+
+    async def main():
+        client = create_async_client()
+
+        async def lease(pool):
+            async with pool.lease():
+                await asyncio.sleep(0.01)
+
+        # Leases start right away, while the warm set is still being created
+        async with ThreadPool(client, policy) as pool:
+            await asyncio.gather(*(lease(pool) for _ in range(leases)))
+        await client.close()
+        return pool.stats
+
+    return asyncio.run(main())
+
+
+def test_batch_creates_one_thread_per_query(make_client):
+    stats = run_leases(ThreadPolicy(warm_size=5, expected_leases=5), leases=5)
+    calls = make_client.server.state.calls
+    assert (stats.warm_hits, stats.cold_creates) == (5, 0)
+    assert calls["create_thread"] == calls["delete_thread"] == 5
+
+
+def test_first_leases_wait_for_the_warm_set(make_client):
+    stats = run_leases(ThreadPolicy(warm_size=4), leases=4)
+    calls = make_client.server.state.calls
+    assert (stats.warm_hits, stats.cold_creates) == (4, 0)
+    assert calls["create_thread"] == calls["delete_thread"]
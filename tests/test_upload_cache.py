@@ -0,0 +1,48 @@
+from upload_cache import UploadCache, sha256_file, upload_cached
+
+
+def test_identical_bytes_are_uploaded_once(make_client, tmp_path):
+    client = make_client()
+    (tmp_path / "a.pdf").write_bytes(b"%PDF calculus")
+    (tmp_path / "copy.pdf").write_bytes(b"%PDF calculus")
+    (tmp_path / "b.pdf").write_bytes(b"%PDF algebra")
+    calls = make_client.server.state.calls
+
+    first, uploaded = upload_cached(client, tmp_path / "a.pdf")
+    assert uploaded
+    copy, uploaded = upload_cached(client, tmp_path / "copy.pdf")
+    assert (copy.id, uploaded) == (first.id, False)
+    _, uploaded = upload_cached(client, tmp_path / "b.pdf")
+    assert uploaded
+    assert calls["create_file"] == 2
+
+    # A new process trusts the saved index without listing or uploading
+    again, uploaded = upload_cached(client, tmp_path / "a.pdf", cache=UploadCache())
+    assert (again.id, uploaded) == (first.id, False)
+    assert calls["create_file"] == 2 and calls["list_files"] == 0
+
+
+def test_stale_entries_are_checked_and_reuploaded(make_client, tmp_path):
+    client = make_client()
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"%PDF calculus")
+    first, _ = upload_cached(client, path)
+
+    # Still there: one list call confirms it
+    cached, uploaded = upload_cached(client, path, cache=UploadCache(trust_seconds=0))
+    assert (cached.id, uploaded) == (first.id, False)
+    assert make_client.server.state.calls["list_files"] == 1
+
+    client.files.delete(first.id)
+    replaced, uploaded = upload_cached(client, path, cache=UploadCache(trust_seconds=0))
+    assert uploaded and replaced.id != first.id
+    assert UploadCache().get(sha256_file(path), "assistants")["file_id"] == replaced.id
+
+
+def test_purpose_is_part_of_the_match(make_client, tmp_path):
+    client = make_client()
+    path = tmp_path / "batch.jsonl"
+    path.write_text("{}\n")
+    upload_cached(client, path, purpose="assistants")
+    _, uploaded = upload_cached(client, path, purpose="batch")
+    assert uploaded
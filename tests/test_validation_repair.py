@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from pydantic import BaseModel, Field
+
+from validation_repair import repair, validate_or_repair
+
+
+class Note(BaseModel):
+    heading: str
+    summary: str = Field(..., max_length=20)
+
+
+class ScriptedClient:
+    """Answers each chat completion with the next scripted message content."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **request):
+        self.prompts.append(request["messages"][-1]["content"])
+        message = SimpleNamespace(content=self.replies.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_valid_data_needs_no_calls():
+    client = ScriptedClient()
+    note, calls = validate_or_repair(client, Note, {"heading": "Limits", "summary": "short"})
+    assert note.summary == "short" and calls == 0
+
+
+def test_only_invalid_fields_are_sent_and_merged():
+    client = ScriptedClient('{"summary": "shorter", "heading": "ignored"}')
+    note, calls = validate_or_repair(client, Note, {"heading": "Limits", "summary": "x" * 40})
+    assert (note.heading, note.summary, calls) == ("Limits", "shorter", 1)
+    assert "summary" in client.prompts[0] and "Limits" not in client.prompts[0]
+
+
+def test_unusable_replies_count_as_failed_attempts():
+    data = {"heading": "Limits", "summary": "x" * 40}
+    error = None
+    try:
+        Note(**data)
+    except ValueError as e:
+        error = e
+
+    client = ScriptedClient("not json {", '["a list"]', '{"summary": "fixed"}')
+    note, calls = repair(client, Note, data, error, max_attempts=3)
+    assert (note.summary, calls) == ("fixed", 3)
+
+    client = ScriptedClient("not json {", '"a string"')
+    assert repair(client, Note, data, error) == (None, 2)
@@ -0,0 +1,49 @@
+from response_cache import context_fingerprint
+from vector_store_sync import sync_vector_store, synced_digests
+
+
+def test_resync_only_sends_changed_documents(make_client, tmp_path):
+    client = make_client()
+    docs = tmp_path / "data"
+    docs.mkdir()
+    (docs / "limits.md").write_text("# Limits")
+    (docs / "series.md").write_text("# Series")
+    calls = make_client.server.state.calls
+
+    store = sync_vector_store(client, dirs=("data",))
+    assert sync_vector_store(client, dirs=("data",)).id == store.id
+    assert calls["create_file"] == 2
+
+    (docs / "series.md").write_text("# Power series")
+    sync_vector_store(client, dirs=("data",))
+    assert calls["create_file"] == 3
+    attached = client.vector_stores.files.list(vector_store_id=store.id)
+    assert len(attached.data) == 2
+
+
+def test_resync_changes_the_cache_context(make_client, tmp_path):
+    client = make_client()
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "limits.md").write_text("# Limits")
+
+    store = sync_vector_store(client, dirs=("data",))
+    before = context_fingerprint(store.id, synced_digests())
+    (tmp_path / "data" / "limits.md").write_text("# One-sided limits")
+    assert sync_vector_store(client, dirs=("data",)).id == store.id
+    assert context_fingerprint(store.id, synced_digests()) != before
+
+
+def test_sync_leaves_other_stores_alone(make_client, tmp_path):
+    client = make_client()
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "limits.md").write_text("# Limits")
+    other = client.vector_stores.create(name="study_pdf_vector_store")
+    client.vector_stores.files.create(vector_store_id=other.id, file_id=client.files.create(
+        file=("study.pdf", b"%PDF"), purpose="assistants").id)
+    (tmp_path / ".vectorstore").write_text(other.id)
+    (tmp_path / ".vectorstore_sync").write_text(other.id)
+
+    store = sync_vector_store(client, dirs=("data",))
+    assert store.id != other.id
+    assert len(client.vector_stores.files.list(vector_store_id=other.id).data) == 1
+    assert (tmp_path / ".vectorstore").read_text() == other.id